@@ -6,16 +6,19 @@ from cms.admin.utils import GrouperModelAdmin
 from cms.models import ValidationError
 from cms.utils import get_language_from_request
 from cms.utils.urlutils import admin_reverse
+from django import forms
 from django.apps import apps
 from django.conf import settings
 from django.contrib import admin, messages
 from django.contrib.admin import helpers
 from django.contrib.admin.options import InlineModelAdmin, TO_FIELD_VAR, get_content_type_for_model, IS_POPUP_VAR
 from django.contrib.admin.utils import unquote
+from django.contrib.admin.views.main import SEARCH_VAR
 from django.contrib.sites.models import Site
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.db.models import Prefetch, signals
+from django.db.models import OuterRef, Prefetch, Q, Subquery, Value, signals
+from django.db.models.functions import Coalesce
 from django.http import Http404, HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.urls import NoReverseMatch, path
@@ -24,8 +27,9 @@ from django.views.generic import RedirectView
 from parler.admin import TranslatableAdmin
 
 from .cms_config import BlogCMSConfig
-from .forms import AppConfigForm, CategoryAdminForm
-from .models import BlogCategory, BlogConfig, Post, PostContent
+from .forms import AppConfigForm, CategoryAdminForm, PostChoiceIterator
+from .models import BlogCategory, BlogConfig, Post, PostContent, attach_post_contents
+from .search import search_post_contents
 from .settings import get_setting
 from .utils import is_versioning_enabled
 
@@ -460,12 +464,46 @@ class PostAdmin(
             return content_obj.title
         return _("Empty")
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        # load the contents of the listed posts at once instead of one query per row
+        for post in attach_post_contents(changelist.result_list, [self.language], show_draft_content=True):
+            post_content = post.get_content(self.language, show_draft_content=True)
+            if post_content:
+                self._content_obj_cache[post] = post_content
+        return changelist
+
+    def formfield_for_manytomany(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_manytomany(db_field, request, **kwargs)
+        if formfield is not None and db_field.name == "related":
+            formfield.iterator = PostChoiceIterator
+        return formfield
+
     def get_search_results(self, request, queryset, search_term):
-        # qs, distinct = super().get_search_results(request, queryset, search_term)
-        content_title = (
-            PostContent.admin_manager.filter(title__icontains=search_term).values("post_id").latest_content()
+        """
+        Filter the posts whose latest contents match the search term, annotated with the best content rank.
+
+        Contents not indexed yet (or all of them, if the search is disabled) are matched on their title.
+        """
+        if not search_term.strip():
+            return queryset, False
+        post_contents = PostContent.admin_manager.latest_content()
+        content_title = post_contents.filter(title__icontains=search_term).values("post_id")
+        if not get_setting("ENABLE_SEARCH"):
+            queryset = queryset.filter(pk__in=content_title)
+            return queryset.annotate(search_rank=Value(0.0, output_field=models.FloatField())), False
+        ranked = search_post_contents(post_contents, search_term)
+        rank = ranked.filter(post=OuterRef("pk")).order_by("-search_rank").values("search_rank")[:1]
+        queryset = queryset.alias(index_rank=Subquery(rank)).filter(
+            Q(index_rank__isnull=False) | Q(pk__in=content_title.filter(search_text=""))
         )
-        return queryset.filter(pk__in=content_title), True
+        return queryset.annotate(search_rank=Coalesce("index_rank", 0.0, output_field=models.FloatField())), False
+
+    def get_ordering(self, request):
+        """Sort search results by rank, unless a different sorting is requested."""
+        if request.GET.get(SEARCH_VAR, "").strip():
+            return ("-search_rank", *(super().get_ordering(request) or self.model._meta.ordering))
+        return super().get_ordering(request)
 
     def get_form(self, request, obj=None, **kwargs):
         """Adds the language from the request to the form class"""
@@ -825,6 +863,14 @@ class BlogConfigAdmin(TranslatableAdmin):
             ),
         ]
 
+    def get_form(self, request, obj=None, **kwargs):
+        form = super().get_form(request, obj, **kwargs)
+        # Remove urlconf from form if no apphook-based url config is enabled
+        if isinstance(get_setting("URLCONF"), str) and "urlconf" in form.base_fields:
+            form.base_fields["urlconf"].widget = forms.HiddenInput()
+            form.base_fields["urlconf"].label = ""  # Admin otherwise displays label for hidden field
+        return form
+
     def get_readonly_fields(self, request, obj=None):
         if obj and obj.pk:
             return tuple(self.readonly_fields) + ("namespace",)
@@ -1,6 +1,13 @@
+import copy
+import threading
+import time
+
 from cms.apphook_pool import apphook_pool
-from django import forms
-from django.db import models
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.urls import Resolver404, resolve
 from django.utils.translation import get_language_from_request, gettext_lazy as _, override
 from filer.models import ThumbnailOption
@@ -280,13 +287,6 @@ class BlogConfig(TranslatableModel):
         help_text=_("Emits a desktop notification -if enabled- when editing a published post"),
     )
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        """Remove urlconf from form if no apphook-based url config is enabled"""
-        if isinstance(get_setting("URLCONF"), str):
-            self.fields["urlconf"].widget = forms.HiddenInput()
-            self.fields["urlconf"].label = ""  # Admin otherwise displays label for hidden field
-
     def get_app_title(self):
         return getattr(self, "app_title", _("untitled"))
 
@@ -302,10 +302,118 @@ class BlogConfig(TranslatableModel):
             return str(e)
 
 
+class BlogConfigRegistry:
+    """
+    Process wide registry of the blog configurations, indexed by namespace.
+
+    All the configurations are loaded with a single query the first time one of them is requested and kept in memory
+    until a configuration is saved or deleted. The registry generation is stored in the cache, thus processes sharing
+    the cache backend reload their registry as well; while serving a request, the generation is read only once.
+
+    Configurations are returned as deep copies of the registry instances (translations included), thus changing them
+    does not affect the registry: load the configuration from the database to save it.
+    """
+
+    cache_key = "djangocms-blog:config-registry"
+
+    def __init__(self):
+        self._configs = {}
+        self._configs_pk = {}
+        self._generation = None
+        self._request = threading.local()
+
+    def _get_generation(self):
+        generation = cache.get(self.cache_key)
+        if generation is None:
+            # do not overwrite a generation set in the meantime
+            cache.add(self.cache_key, time.time(), timeout=None)
+            generation = cache.get(self.cache_key)
+        return generation
+
+    def _load(self):
+        if self._generation is not None and getattr(self._request, "checked", False):
+            return
+        generation = self._get_generation()
+        if generation is None or generation != self._generation:
+            configs = list(BlogConfig.objects.all())
+            self._configs = {config.namespace: config for config in configs}
+            self._configs_pk = {config.pk: config for config in configs}
+            self._generation = generation
+        self._request.checked = getattr(self._request, "active", False)
+
+    def _copy(self, config):
+        # deep copy to detach the translations cache as well, translations master is the copy itself
+        return copy.deepcopy(config) if config else None
+
+    def request_started(self, **kwargs):
+        """Read the registry generation once during the request handled by the current thread."""
+        self._request.active = True
+        self._request.checked = False
+
+    def request_finished(self, **kwargs):
+        self._request.active = False
+        self._request.checked = False
+
+    def get(self, namespace):
+        """
+        Return the configuration of the given namespace.
+
+        :param namespace: apphook namespace
+        :return: :py:class:`BlogConfig` instance or ``None`` if the namespace does not exist
+        """
+        self._load()
+        return self._copy(self._configs.get(namespace))
+
+    def get_by_pk(self, pk):
+        """
+        Return the configuration with the given primary key.
+
+        :param pk: configuration primary key
+        :return: :py:class:`BlogConfig` instance or ``None`` if the configuration does not exist
+        """
+        self._load()
+        return self._copy(self._configs_pk.get(pk))
+
+    def get_many(self, pks):
+        """
+        Return the configurations with the given primary keys, the registry generation is checked only once.
+
+        :param pks: configuration primary keys
+        :return: dictionary of :py:class:`BlogConfig` instances by primary key, missing configurations are skipped
+        """
+        self._load()
+        return {pk: self._copy(self._configs_pk[pk]) for pk in set(pks) if pk in self._configs_pk}
+
+    def clear(self):
+        """Discard the loaded configurations in all the processes."""
+        self._generation = None
+        cache.set(self.cache_key, time.time(), timeout=None)
+
+
+config_registry = BlogConfigRegistry()
+request_started.connect(config_registry.request_started, dispatch_uid="djangocms-blog-config-registry-started")
+request_finished.connect(config_registry.request_finished, dispatch_uid="djangocms-blog-config-registry-finished")
+
+
+@receiver(post_save, sender=BlogConfig)
+@receiver(post_delete, sender=BlogConfig)
+@receiver(post_save, sender=BlogConfig._parler_meta.root_model)
+@receiver(post_delete, sender=BlogConfig._parler_meta.root_model)
+def clear_config_registry(sender, **kwargs):
+    config_registry.clear()
+    # clear again once committed, as the registry may be reloaded with the previous data in the meantime
+    transaction.on_commit(config_registry.clear)
+
+
 def get_app_instance(request):
     """
     Return current app instance namespace and config
+
+    The result is stored on the request once the current page is known, thus the url is resolved only once per
+    request.
     """
+    if hasattr(request, "_blog_app_instance"):
+        return request._blog_app_instance
     app = None
     namespace, config = "", None
     if getattr(request, "current_page", None) and request.current_page.application_urls:
@@ -322,4 +430,5 @@ def get_app_instance(request):
                     config = app.get_config(namespace)
             except Resolver404:
                 pass
+        request._blog_app_instance = namespace, config
     return namespace, config
@@ -1,15 +1,16 @@
 import logging
 
-from cms.apphook_pool import apphook_pool
 from cms.menu_bases import CMSAttachMenu
+from cms.utils.conf import get_cms_setting
 from django.contrib.sites.shortcuts import get_current_site
-from django.db.models.signals import post_delete, post_save
-from django.urls import resolve
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.utils.translation import get_language_from_request, gettext_lazy as _
 from menus.base import Modifier, NavigationNode
 from menus.menu_pool import menu_pool
 
-from .models import BlogCategory, BlogConfig, Post, PostContent
+from .cms_appconfig import config_registry, get_app_instance
+from .models import BlogCategory, BlogConfig, Post, PostContent, get_post_urls, get_watermarked_cache
 from .settings import MENU_TYPE_CATEGORIES, MENU_TYPE_COMPLETE, MENU_TYPE_NONE, MENU_TYPE_POSTS, get_setting
 
 logger = logging.getLogger(__name__)
@@ -23,17 +24,17 @@ class BlogCategoryMenu(CMSAttachMenu):
     """
 
     name = _("Blog menu")
-    _config = {}
 
     def get_nodes(self, request):
         """
         Generates the nodelist
 
+        Nodes are cached per namespace, language and site: cached nodes are discarded as soon as posts,
+        categories or configurations change.
+
         :param request:
         :return: list of nodes
         """
-        nodes = []
-
         language = get_language_from_request(request, check_path=True)
         current_site = get_current_site(request)
 
@@ -41,85 +42,98 @@ class BlogCategoryMenu(CMSAttachMenu):
         if self.instance and page_site != current_site:
             return []
 
-        categories_menu = False
-        posts_menu = False
         config = False
+        namespace = None
         if self.instance:
-            if not self._config.get(self.instance.application_namespace, False):
-                try:
-                    self._config[self.instance.application_namespace] = BlogConfig.objects.get(
-                        namespace=self.instance.application_namespace
-                    )
-                except BlogConfig.DoesNotExist as e:
-                    logger.exception(e)
-                    return []
-            config = self._config[self.instance.application_namespace]
+            namespace = self.instance.application_namespace
+            config = config_registry.get(namespace)
+            if not config:
+                logger.error("Blog configuration %s does not exist", namespace)
+                return []
             # if not getattr(request, "toolbar", False) or not request.toolbar.edit_mode_active:
             #     if self.instance == self.instance.get_draft_object():
             #         return []
             # else:
             #     if self.instance == self.instance.get_public_object():
             #         return []
-        if config and config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES):
-            categories_menu = True
-        if config and config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_POSTS):
-            posts_menu = True
         if config and config.menu_structure in (MENU_TYPE_NONE,):
-            return nodes
+            return []
 
-        used_categories = []
-        if posts_menu:
-            post_contents = PostContent.objects.filter(language=language)
-            if hasattr(self, "instance") and self.instance:
-                post_contents = post_contents.filter(
-                    post__app_config__namespace=self.instance.application_namespace
-                ).on_site()
-            post_contents = (
-                post_contents.distinct()
-                .select_related("post", "post__app_config")
-                .prefetch_related("post__categories")
+        nodes = get_watermarked_cache(
+            f"menu:{current_site.pk}",
+            namespace,
+            language,
+            lambda: self.get_nodes_data(config, namespace, language, current_site),
+            timeout=get_cms_setting("CACHE_DURATIONS")["menus"],
+        )
+        return [NavigationNode(*node) for node in nodes]
+
+    def get_nodes_data(self, config, namespace, language, site):
+        """
+        Build the nodes of the menu as ``(title, url, id, parent id)`` tuples using a fixed number of queries.
+
+        :param config: blog config of the menu (if any)
+        :param namespace: apphook namespace of the menu (if any)
+        :param language: menu language
+        :param site: current site
+        :return: list of nodes data
+        """
+        categories_menu = bool(config and config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_CATEGORIES))
+        posts_menu = bool(config and config.menu_structure in (MENU_TYPE_COMPLETE, MENU_TYPE_POSTS))
+        nodes = []
+
+        post_contents = PostContent.objects.filter(language=language)
+        if namespace:
+            post_contents = post_contents.filter(listing_app_config__namespace=namespace).on_site(site)
+
+        main_categories = {}
+        used_categories = set()
+        if categories_menu:
+            post_categories = Post.categories.through.objects.filter(post__in=post_contents.values("post_id"))
+            post_categories = post_categories.order_by(
+                F("blogcategory__priority").asc(nulls_last=True), "blogcategory_id"
             )
-            for post_content in post_contents:
-                postcontent_id = None
+            for post_id, category_id in post_categories.values_list("post_id", "blogcategory_id"):
+                main_categories.setdefault(post_id, category_id)
+                used_categories.add(category_id)
+
+        if posts_menu:
+            rows = list(post_contents.values_list("pk", "post_id", "title", "permalink"))
+            missing = [pk for pk, __, __, permalink in rows if not permalink]
+            urls = {}
+            if missing:
+                missing = list(PostContent.objects.filter(pk__in=missing).select_related("post__app_config"))
+                urls = dict(zip((post_content.pk for post_content in missing), get_post_urls(missing, language)))
+            for pk, post_id, title, permalink in rows:
                 parent = None
-                used_categories.extend(post_content.post.categories.values_list("pk", flat=True))
                 if categories_menu:
-                    category = post_content.post.categories.first()
-                    if category:
-                        parent = f"{category.__class__.__name__}-{category.pk}"
-                        postcontent_id = (f"{post_content.__class__.__name__}-{post_content.pk}",)
-                else:
-                    postcontent_id = (f"{post_content.__class__.__name__}-{post_content.pk}",)
-                if postcontent_id:
-                    node = NavigationNode(
-                        post_content.title, post_content.get_absolute_url(language), postcontent_id, parent
-                    )
-                    nodes.append(node)
+                    if post_id not in main_categories:
+                        continue
+                    parent = f"{BlogCategory.__name__}-{main_categories[post_id]}"
+                nodes.append((title, permalink or urls[pk], f"{PostContent.__name__}-{pk}", parent))
 
         if categories_menu:
-            categories = BlogCategory.objects
-            if config:
-                categories = categories.filter(app_config__namespace=self.instance.application_namespace)
-            if config and not config.menu_empty_categories:
-                categories = categories.active_translations(language).filter(pk__in=used_categories).distinct()
-            else:
-                categories = categories.active_translations(language).distinct()
+            categories = BlogCategory.objects.filter(app_config__namespace=namespace)
+            if not config.menu_empty_categories:
+                categories = categories.filter(pk__in=used_categories)
             categories = (
-                categories.order_by("parent__id", "translations__name")
+                categories.active_translations(language)
+                .distinct()
                 .select_related("app_config")
                 .prefetch_related("translations")
             )
-            added_categories = []
+            category_nodes = []
             for category in categories:
-                if category.pk not in added_categories:
-                    node = NavigationNode(
-                        category.name,
-                        category.get_absolute_url(),
+                category_nodes.append(
+                    (
+                        category.safe_translation_getter("name", language_code=language),
+                        category.get_absolute_url(language),
                         f"{category.__class__.__name__}-{category.pk}",
-                        (f"{category.__class__.__name__}-{category.parent.id}" if category.parent else None),
+                        (f"{category.__class__.__name__}-{category.parent_id}" if category.parent_id else None),
                     )
-                    nodes.append(node)
-                    added_categories.append(category.pk)
+                )
+            # parent categories first
+            nodes.extend(sorted(category_nodes, key=lambda node: (node[3] is not None, node[3] or "", node[0] or "")))
 
         return nodes
 
@@ -131,8 +145,6 @@ class BlogNavModifier(Modifier):
     a corresponding category is selected in menu
     """
 
-    _config = {}
-
     def modify(self, request, nodes, namespace, root_id, post_cut, breadcrumb):
         """
         Actual modifier function
@@ -144,16 +156,7 @@ class BlogNavModifier(Modifier):
         :param breadcrumb: flag for modifier stage
         :return: nodeslist
         """
-        app = None
-        config = None
-        if getattr(request, "current_page", None) and request.current_page.application_urls:
-            app = apphook_pool.get_apphook(request.current_page.application_urls)
-
-        if app and app.app_config:
-            namespace = resolve(request.path).namespace
-            if not self._config.get(namespace, False):
-                self._config[namespace] = app.get_config(namespace)
-            config = self._config[namespace]
+        __, config = get_app_instance(request)
         try:
             if config and (not isinstance(config, BlogConfig) or config.menu_structure != MENU_TYPE_CATEGORIES):
                 return nodes
@@ -181,11 +184,17 @@ class BlogNavModifier(Modifier):
 
 def clear_menu_cache(**kwargs):
     """
-    Empty menu cache when saving categories
+    Empty menu cache when saving categories and posts
     """
-    menu_pool.clear(all=True)
-
-
-# post_save.connect(clear_menu_cache, sender=BlogCategory)
-# post_delete.connect(clear_menu_cache, sender=BlogCategory)
-# post_delete.connect(clear_menu_cache, sender=BlogConfig)
+    if kwargs.get("action", "post_").startswith("post_"):
+        menu_pool.clear(all=True)
+
+
+post_save.connect(clear_menu_cache, sender=Post)
+post_save.connect(clear_menu_cache, sender=BlogCategory)
+post_delete.connect(clear_menu_cache, sender=BlogCategory)
+post_delete.connect(clear_menu_cache, sender=BlogConfig)
+post_save.connect(clear_menu_cache, sender=PostContent)
+post_delete.connect(clear_menu_cache, sender=PostContent)
+m2m_changed.connect(clear_menu_cache, sender=Post.categories.through)
+m2m_changed.connect(clear_menu_cache, sender=Post.sites.through)
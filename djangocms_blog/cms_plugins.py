@@ -7,7 +7,17 @@ from django.db import models
 from django.template.loader import select_template
 
 from .forms import AuthorPostsForm, BlogPluginForm, LatestEntriesForm
-from .models import AuthorEntriesPlugin, BlogCategory, GenericBlogPlugin, LatestPostsPlugin, Post
+from .models import (
+    AuthorEntriesPlugin,
+    BlogCategory,
+    GenericBlogPlugin,
+    LatestPostsPlugin,
+    Post,
+    PostContent,
+    fill_media_previews,
+    get_post_urls,
+    get_site_posts_filter,
+)
 from .settings import get_setting
 
 
@@ -57,10 +67,17 @@ class BlogLatestEntriesPlugin(BlogPlugin):
             fields.append("template_folder")
         return fields
 
+    def get_post_contents(self, request, instance):
+        """Return the list of post contents shown by the plugin, with urls and media previews resolved."""
+        post_contents = list(instance.get_post_contents(request))
+        get_post_urls(post_contents)
+        fill_media_previews(post_contents)
+        return post_contents
+
     def render(self, context, instance, placeholder):
         """Render the plugin."""
         context = super().render(context, instance, placeholder)
-        context["postcontent_list"] = instance.get_post_contents(context["request"])
+        context["postcontent_list"] = self.get_post_contents(context["request"], instance)
         context["TRUNCWORDS_COUNT"] = get_setting("POSTS_LIST_TRUNCWORDS_COUNT")
         return context
 
@@ -69,11 +86,36 @@ class BlogLatestEntriesPlugin(BlogPlugin):
 class BlogLatestEntriesPluginCached(BlogLatestEntriesPlugin):
     """
     Return the latest published posts caching the result.
+
+    The ids of the post contents are cached by plugin, site, language and filters (see
+    :ref:`LATEST_ENTRIES_CACHE_TIMEOUT <LATEST_ENTRIES_CACHE_TIMEOUT>`) and discarded as soon as posts are changed;
+    post contents are then loaded by id with a single query.
     """
 
     name = get_setting("LATEST_ENTRIES_PLUGIN_NAME_CACHED")
     cache = True
 
+    def get_post_contents(self, request, instance):
+        computed = {}
+
+        def get_ids():
+            computed.update((item.pk, item) for item in instance.get_post_contents(request))
+            return list(computed)
+
+        ids = instance.get_cached(
+            request,
+            f"latest-entries:{instance.pk}:{instance.get_filter_key()}",
+            get_ids,
+            timeout=get_setting("LATEST_ENTRIES_CACHE_TIMEOUT"),
+        )
+        post_contents = computed or {
+            item.pk: item for item in instance.post_content_queryset(request).filter(pk__in=ids)
+        }
+        post_contents = [post_contents[pk] for pk in ids if pk in post_contents]
+        get_post_urls(post_contents)
+        fill_media_previews(post_contents)
+        return post_contents
+
 
 @plugin_pool.register_plugin
 class BlogAuthorPostsPlugin(BlogPlugin):
@@ -146,8 +188,14 @@ class BlogTagsPlugin(BlogPlugin):
     def render(self, context, instance, placeholder):
         """Render the plugin."""
         context = super().render(context, instance, placeholder)
-        qs = instance.post_queryset(context["request"])
-        context["tags"] = Post.objects.tag_cloud(queryset=qs.published())
+        request = context["request"]
+
+        def get_tags():
+            return PostContent.objects.tag_cloud(
+                queryset=instance.post_content_queryset(request), limit=get_setting("TAGS_PLUGIN_LIMIT")
+            )
+
+        context["tags"] = instance.get_cached(request, "tags", get_tags)
         return context
 
 
@@ -170,13 +218,18 @@ class BlogCategoryPlugin(BlogPlugin):
         qs = BlogCategory.objects.active_translations()
         if instance.app_config:
             qs = qs.filter(app_config__namespace=instance.app_config.namespace)
+        post_categories = Post.categories.through.objects.values("blogcategory_id")
         if instance.current_site:
+            # categories with posts visible on the site, or without posts
             site = get_current_site(context["request"])
-            qs = qs.filter(models.Q(blog_posts__sites__isnull=True) | models.Q(blog_posts__sites=site.pk))
-        categories = qs.distinct()
+            site_posts = Post.objects.filter(get_site_posts_filter(site)).values("pk")
+            qs = qs.filter(
+                models.Q(pk__in=post_categories.filter(post__in=site_posts)) | ~models.Q(pk__in=post_categories)
+            )
         if instance.app_config and not instance.app_config.menu_empty_categories:
-            categories = qs.filter(blog_posts__isnull=False).distinct()
-        context["categories"] = categories
+            qs = qs.filter(pk__in=post_categories)
+        # the fallback languages of active_translations can duplicate the categories
+        context["categories"] = qs.distinct()
         return context
 
 
@@ -196,6 +249,10 @@ class BlogArchivePlugin(BlogPlugin):
     def render(self, context, instance, placeholder):
         """Render the plugin."""
         context = super().render(context, instance, placeholder)
-        qs = instance.post_queryset(context["request"])
-        context["dates"] = Post.objects.get_months(queryset=qs.published())
+        request = context["request"]
+
+        def get_months():
+            return PostContent.objects.get_months(queryset=instance.post_content_queryset(request), current_site=False)
+
+        context["dates"] = instance.get_cached(request, "archive", get_months)
         return context
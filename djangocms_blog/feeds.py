@@ -1,32 +1,219 @@
+import logging
+from collections import defaultdict
 from html import unescape
-from io import BytesIO
+from io import BytesIO, StringIO
 
+from django.contrib.auth.models import AnonymousUser
 from django.contrib.sites.models import Site
-from django.contrib.syndication.views import Feed
+from django.contrib.sites.shortcuts import get_current_site
+from django.contrib.syndication.views import Feed, add_domain
 from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, Max, Q
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.urls import reverse
+from django.utils import translation
+from django.utils.cache import get_conditional_response
 from django.utils.encoding import force_str
 from django.utils.feedgenerator import Rss201rev2Feed
 from django.utils.html import strip_tags
+from django.utils.http import http_date, quote_etag
 from django.utils.safestring import mark_safe
 from django.utils.text import normalize_newlines
-from django.utils.translation import get_language_from_request, gettext as _
+from django.utils.timezone import now
+from django.utils.translation import gettext as _
+from django.utils.xmlutils import SimplerXMLGenerator
 from lxml import etree
 
 from .cms_appconfig import get_app_instance
-from .models import Post
+from .models import PostContent, get_watermark, get_watermarked_key, touch_watermark
 from .settings import get_setting
-from .views import PostDetailView
+from .views import ToolbarDetailView
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingRss201rev2Feed(Rss201rev2Feed):
+    """
+    RSS feed generator which can write the items one at a time, see :py:meth:`stream`.
+    """
+
+    def latest_post_date(self):
+        if self.feed.get("latest_date"):
+            return self.feed["latest_date"]
+        return super().latest_post_date()
+
+    def stream(self, encoding, items):
+        """
+        Write the feed as an iterator of encoded chunks, suitable for a streaming response.
+
+        Items are not stored in the feed generator, the latest date of the feed must be provided as the
+        ``latest_date`` feed attribute.
+
+        :param encoding: output encoding
+        :param items: iterable of :py:meth:`add_item` kwargs
+        """
+        output = StringIO()
+
+        def flush():
+            chunk = output.getvalue().encode(encoding)
+            output.seek(0)
+            output.truncate()
+            return chunk
+
+        handler = SimplerXMLGenerator(output, encoding, short_empty_elements=True)
+        handler.startDocument()
+        handler.startElement("rss", self.rss_attributes())
+        handler.startElement("channel", self.root_attributes())
+        self.add_root_elements(handler)
+        yield flush()
+        for item_kwargs in items:
+            self.add_item(**item_kwargs)
+            item = self.items.pop()
+            handler.startElement("item", self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement("item")
+            yield flush()
+        self.endChannelElement(handler)
+        handler.endElement("rss")
+        yield flush()
 
 
 class LatestEntriesFeed(Feed):
-    feed_type = Rss201rev2Feed
+    """
+    Feed of the latest post contents in the current language.
+
+    The feed content is cached until the blog content of the namespace and language changes (see
+    :py:func:`djangocms_blog.models.get_watermark`), and conditional requests are answered with the same watermark
+    as ``ETag`` and ``Last-Modified``.
+
+    If :ref:`FEED_STREAMING <FEED_STREAMING>` is set, the feed is returned as a streaming response: items are
+    fetched with a queryset iterator and written one at a time instead of building the whole document in memory;
+    streamed feeds are not cached.
+    """
+
+    feed_type = StreamingRss201rev2Feed
     feed_items_number = get_setting("FEED_LATEST_ITEMS")
+    streaming = get_setting("FEED_STREAMING")
+    #: number of items fetched at once in streaming mode
+    chunk_size = 20
+    #: fields used to compute the feed last modification date in streaming mode
+    latest_date_fields = ("post__date_modified", "post__date_published")
 
     def __call__(self, request, *args, **kwargs):
         self.request = request
         self.namespace, self.config = get_app_instance(request)
-        return super().__call__(request, *args, **kwargs)
+        language = translation.get_language()
+        watermark = get_watermark(self.namespace, language)
+        etag = "W/%s" % quote_etag(f"{self.namespace}-{language}-{watermark:f}")
+        last_modified = int(watermark)
+        if get_setting("CONDITIONAL_GET"):
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return response
+        if self.streaming:
+            # streamed feeds are not cached, as it would require holding the whole feed in memory
+            response = self.get_response(request, *args, **kwargs)
+        else:
+            key = get_watermarked_key(
+                self.get_cache_key(request, *args, **kwargs), self.namespace, language, watermark
+            )
+            content = cache.get(key)
+            if content is not None:
+                response = HttpResponse(content, content_type=self.feed_type.content_type)
+            else:
+                response = self.get_response(request, *args, **kwargs)
+                cache.set(key, response.content, timeout=get_setting("FEED_CACHE_TIMEOUT"))
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_cache_key(self, request, *args, **kwargs):
+        """
+        Return the cache key of the feed content, namespace and language excluded.
+        """
+        site_id = get_current_site(request).pk
+        return ":".join(
+            ["feed", self.__class__.__name__, str(site_id), request.scheme, *(str(arg) for arg in args)]
+            + [f"{name}={value}" for name, value in sorted(kwargs.items())]
+        )
+
+    def get_response(self, request, *args, **kwargs):
+        """
+        Build the feed response, bypassing the cache.
+        """
+        if not self.streaming:
+            return super().__call__(request, *args, **kwargs)
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404("Feed object does not exist.")
+        items = self._get_dynamic_attr("items", obj)
+        feedgen = self.get_streaming_feed(obj, request, items)
+        response = StreamingHttpResponse(
+            feedgen.stream("utf-8", self.get_items_kwargs(obj, request, items)), content_type=feedgen.content_type
+        )
+        response.headers["Last-Modified"] = http_date(feedgen.latest_post_date().timestamp())
+        return response
+
+    def get_streaming_feed(self, obj, request, items):
+        """
+        Return the feed generator without items, see :py:meth:`django.contrib.syndication.views.Feed.get_feed`.
+        """
+        current_site = get_current_site(request)
+        dates = items.aggregate(**{field: Max(field) for field in self.latest_date_fields})
+        return self.feed_type(
+            title=self._get_dynamic_attr("title", obj),
+            subtitle=self._get_dynamic_attr("subtitle", obj),
+            link=add_domain(current_site.domain, self._get_dynamic_attr("link", obj), request.is_secure()),
+            description=self._get_dynamic_attr("description", obj),
+            language=self.language or translation.get_language(),
+            feed_url=add_domain(
+                current_site.domain, self._get_dynamic_attr("feed_url", obj) or request.path, request.is_secure()
+            ),
+            author_name=self._get_dynamic_attr("author_name", obj),
+            author_link=self._get_dynamic_attr("author_link", obj),
+            author_email=self._get_dynamic_attr("author_email", obj),
+            categories=self._get_dynamic_attr("categories", obj),
+            feed_copyright=self._get_dynamic_attr("feed_copyright", obj),
+            feed_guid=self._get_dynamic_attr("feed_guid", obj),
+            ttl=self._get_dynamic_attr("ttl", obj),
+            latest_date=max((date for date in dates.values() if date), default=None),
+            **self.feed_extra_kwargs(obj),
+        )
+
+    def get_items_kwargs(self, obj, request, items):
+        """
+        Yield the :py:meth:`django.utils.feedgenerator.SyndicationFeed.add_item` kwargs of each item.
+
+        ``title_template`` and ``description_template`` are not supported in streaming mode.
+        """
+        current_site = get_current_site(request)
+        for item in items.iterator(chunk_size=self.chunk_size):
+            link = add_domain(current_site.domain, self._get_dynamic_attr("item_link", item), request.is_secure())
+            author_name = self._get_dynamic_attr("item_author_name", item)
+            if author_name is not None:
+                author_email = self._get_dynamic_attr("item_author_email", item)
+                author_link = self._get_dynamic_attr("item_author_link", item)
+            else:
+                author_email = author_link = None
+            yield {
+                "title": self._get_dynamic_attr("item_title", item),
+                "link": link,
+                "description": self._get_dynamic_attr("item_description", item),
+                "unique_id": self._get_dynamic_attr("item_guid", item, link),
+                "unique_id_is_permalink": self._get_dynamic_attr("item_guid_is_permalink", item),
+                "enclosures": self._get_dynamic_attr("item_enclosures", item),
+                "pubdate": self._get_dynamic_attr("item_pubdate", item),
+                "updateddate": self._get_dynamic_attr("item_updateddate", item),
+                "author_name": author_name,
+                "author_email": author_email,
+                "author_link": author_link,
+                "comments": self._get_dynamic_attr("item_comments", item),
+                "categories": self._get_dynamic_attr("item_categories", item),
+                "item_copyright": self._get_dynamic_attr("item_copyright", item),
+                **self.item_extra_kwargs(item),
+            }
 
     def link(self):
         return reverse("%s:posts-latest" % self.namespace, current_app=self.namespace)
@@ -37,26 +224,35 @@ class LatestEntriesFeed(Feed):
     def description(self):
         return _("Blog articles on %(site_name)s") % {"site_name": Site.objects.get_current().name}
 
+    def get_queryset(self):
+        return (
+            PostContent.objects.filter(
+                language=translation.get_language(), listing_app_config__namespace=self.namespace
+            )
+            .on_site()
+            .select_related("post__app_config", "post__author")
+        )
+
     def items(self, obj=None):
         return (
-            Post.objects.namespace(self.namespace)
-            .published_on_rss()
-            .order_by("-date_published")[: self.feed_items_number]
+            self.get_queryset()
+            .filter(post__include_in_rss=True)
+            .order_by("-listing_date_published", "-listing_date_created")[: self.feed_items_number]
         )
 
     def item_title(self, item):
-        return mark_safe(item.safe_translation_getter("title"))
+        return mark_safe(item.title)
 
     def item_description(self, item):
-        if item.app_config.use_abstract:
-            return mark_safe(item.safe_translation_getter("abstract"))
-        return mark_safe(item.safe_translation_getter("post_text"))
+        if item.post.app_config.use_abstract:
+            return mark_safe(item.abstract)
+        return mark_safe(item.post_text)
 
     def item_updateddate(self, item):
-        return item.date_modified
+        return item.post.date_modified
 
     def item_pubdate(self, item):
-        return item.date_published
+        return item.post.date_published
 
     def item_guid(self, item):
         return item.guid
@@ -75,10 +271,10 @@ class TagFeed(LatestEntriesFeed):
         return tag  # pragma: no cover
 
     def items(self, obj=None):
-        return Post.objects.published().filter(tags__slug=obj)[: self.feed_items_number]
+        return self.get_queryset().filter(post__tags__slug=obj)[: self.feed_items_number]
 
 
-class FBInstantFeed(Rss201rev2Feed):
+class FBInstantFeed(StreamingRss201rev2Feed):
     date_format = "%Y-%m-%dT%H:%M:%S%z"
 
     def rss_attributes(self):
@@ -121,49 +317,43 @@ class FBInstantFeed(Rss201rev2Feed):
 
 
 class FBInstantArticles(LatestEntriesFeed):
+    """
+    Facebook Instant Articles feed of the post contents in the current language.
+
+    Only post contents whose instant article has been rendered (see :py:func:`render_instant_articles`) are
+    included: the feed only assembles the stored HTML fragments.
+    """
+
     feed_type = FBInstantFeed
     feed_items_number = get_setting("FEED_INSTANT_ITEMS")
+    latest_date_fields = ("post__date_modified",)
 
     def items(self, obj=None):
-        return Post.objects.namespace(self.namespace).published().order_by("-date_modified")[: self.feed_items_number]
-
-    def _clean_html(self, content):
-        body = BytesIO(content)
-        document = etree.iterparse(body, html=True)
-        for _a, element in document:
-            if not (element.text and element.text.strip()) and len(element) == 0 and element.tag == "p":
-                element.getparent().remove(element)
-            if element.tag in ("h3", "h4", "h5", "h6") and "op-kicker" not in element.attrib.get("class", ""):
-                element.tag = "h2"
-        return etree.tostring(document.root)
+        return (
+            self.get_queryset()
+            .filter(instant_article_date__isnull=False)
+            .prefetch_related("post__categories__translations")
+            .order_by("-post__date_modified")[: self.feed_items_number]
+        )
 
     def item_extra_kwargs(self, item):
         if not item:
             return {}
-        language = get_language_from_request(self.request, check_path=True)
-        key = item.get_cache_key(language, "feed")
-        content = cache.get(key)
-        if not content:
-            view = PostDetailView.as_view(instant_article=True)
-            response = view(self.request, slug=item.safe_translation_getter("slug"))
-            response.render()
-            content = self._clean_html(response.content)
-            cache.set(key, content, timeout=get_setting("FEED_CACHE_TIMEOUT"))
-        if item.app_config.use_abstract:
-            abstract = strip_tags(item.safe_translation_getter("abstract"))
+        if item.post.app_config.use_abstract:
+            abstract = strip_tags(item.abstract)
         else:
-            abstract = strip_tags(item.safe_translation_getter("post_text"))
+            abstract = strip_tags(item.post_text)
         return {
             "author": item.get_author_name(),
-            "content": content,
-            "date": item.date_modified,
-            "date_pub": item.date_modified,
-            "date_mod": item.date_modified,
+            "content": item.instant_article,
+            "date": item.post.date_modified,
+            "date_pub": item.post.date_modified,
+            "date_mod": item.post.date_modified,
             "abstract": abstract,
         }
 
     def item_categories(self, item):
-        return [category.safe_translation_getter("name") for category in item.categories.all()]
+        return [category.safe_translation_getter("name") for category in item.post.categories.all()]
 
     def item_author_name(self, item):
         return ""
@@ -176,3 +366,75 @@ class FBInstantArticles(LatestEntriesFeed):
 
     def item_pubdate(self, item):
         return None
+
+
+def clean_instant_article_html(content):
+    """Adapt the rendered post to the Instant Articles markup: drop empty paragraphs and use ``h2`` headings."""
+    body = BytesIO(content)
+    document = etree.iterparse(body, html=True)
+    for _a, element in document:
+        if not (element.text and element.text.strip()) and len(element) == 0 and element.tag == "p":
+            element.getparent().remove(element)
+        if element.tag in ("h3", "h4", "h5", "h6") and "op-kicker" not in element.attrib.get("class", ""):
+            element.tag = "h2"
+    return force_str(etree.tostring(document.root))
+
+
+def render_instant_article(post_content):
+    """
+    Render the instant article of the given post content, outside of any request.
+
+    :param post_content: :py:class:`PostContent` instance
+    :return: cleaned HTML
+    """
+    request = HttpRequest()
+    request.method = "GET"
+    request.path = request.path_info = post_content.get_absolute_url()
+    request.user = AnonymousUser()
+    request.LANGUAGE_CODE = post_content.language
+    with translation.override(post_content.language):
+        view = ToolbarDetailView(instant_article=True)
+        view.setup(request, post_content)
+        view.namespace, view.config = post_content.post.app_config.namespace, post_content.post.app_config
+        response = view.get(request, post_content)
+        response.render()
+    return clean_instant_article_html(response.content)
+
+
+def render_instant_articles(post_contents=None, force=False):
+    """
+    Render and store the instant articles of the given post contents.
+
+    Post contents are rendered only if they have never been rendered or their post has been modified after the last
+    rendering, unless ``force`` is set. The watermarks of the rendered post contents are moved forward, thus the
+    cached feeds include them.
+
+    :param post_contents: post contents queryset (default: all the post contents)
+    :param force: render the instant articles even if up to date
+    :return: number of rendered instant articles
+    """
+    if post_contents is None:
+        post_contents = PostContent.objects.all()
+    if not force:
+        post_contents = post_contents.filter(
+            Q(instant_article_date__isnull=True) | Q(instant_article_date__lt=F("post__date_modified"))
+        )
+    post_contents = post_contents.filter(post__app_config__isnull=False).select_related(
+        "post__app_config", "post__author"
+    )
+    rendered = 0
+    languages = defaultdict(set)
+    for post_content in post_contents.order_by("pk"):
+        # rendered again on next run if the post is changed while rendering
+        date = now()
+        try:
+            html = render_instant_article(post_content)
+        except Exception:
+            logger.exception("Instant article of post content %s can't be rendered", post_content.pk)
+            continue
+        PostContent.objects.filter(pk=post_content.pk).update(instant_article=html, instant_article_date=date)
+        languages[post_content.post.app_config.namespace].add(post_content.language)
+        rendered += 1
+    for namespace, namespace_languages in languages.items():
+        touch_watermark(namespace, sorted(namespace_languages))
+    return rendered
@@ -1,18 +1,29 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxLengthValidator
+from django.forms.models import ModelChoiceIterator
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _
 
 from parler.forms import TranslatableModelForm
 from taggit_autosuggest.widgets import TagAutoSuggest
 
-from .models import BlogCategory, BlogConfig, Post
+from .models import BlogCategory, BlogConfig, Post, attach_post_contents
 from .settings import PERMALINK_TYPE_CATEGORY, get_setting
 
 User = get_user_model()
 
 
+class PostChoiceIterator(ModelChoiceIterator):
+    """Choices of posts, whose contents (used for the labels) are loaded with a single query."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for post in attach_post_contents(self.queryset, show_draft_content=True):
+            yield self.choice(post)
+
+
 class ConfigFormBase:
     """Base form class for all models depends on app_config."""
 
@@ -45,7 +56,9 @@ class CategoryAdminForm(ConfigFormBase, TranslatableModelForm):
         if "parent" in self.fields:
             qs = self.fields["parent"].queryset
             if self.instance.pk:
-                qs = qs.exclude(pk__in=[self.instance.pk] + [child.pk for child in self.instance.descendants()])
+                qs = qs.exclude(pk=self.instance.pk)
+                if self.instance.tree_path:
+                    qs = qs.exclude(tree_path__startswith=self.instance.tree_path)
             config = None
             if getattr(self.instance, "app_config_id", None):
                 qs = qs.filter(app_config__namespace=self.instance.app_config.namespace)
@@ -172,6 +185,7 @@ class PostAdminForm(PostAdminFormBase):
             self.fields["categories"].queryset = self.available_categories
         if "related" in self.fields:
             self.fields["related"].queryset = self.available_related_posts
+            self.fields["related"].iterator = PostChoiceIterator
 
         if "app_config" in self.fields:
             # Don't allow app_configs to be added here. The correct way to add an
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.models import rebuild_permalinks
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored permalink of the blog posts contents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespace", action="append", dest="namespaces", help="Only rebuild this namespace")
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of post contents per batch")
+
+    def handle(self, *args, **options):
+        changed, total = rebuild_permalinks(options["namespaces"], batch_size=options["batch_size"])
+        self.stdout.write(f"{changed} of {total} permalinks updated")
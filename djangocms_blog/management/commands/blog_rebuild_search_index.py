@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.models import PostContent
+from djangocms_blog.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index of the blog posts contents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespace", action="append", dest="namespaces", help="Only rebuild this namespace")
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of post contents per batch")
+
+    def handle(self, *args, **options):
+        post_contents = PostContent.admin_manager.order_by("pk")
+        if options["namespaces"]:
+            post_contents = post_contents.filter(post__app_config__namespace__in=options["namespaces"])
+        ids = list(post_contents.values_list("pk", flat=True))
+        indexed = 0
+        for start in range(0, len(ids), options["batch_size"]):
+            indexed += update_search_index(
+                PostContent.admin_manager.filter(pk__in=ids[start : start + options["batch_size"]])
+            )
+        self.stdout.write(f"{indexed} post contents indexed")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.feeds import render_instant_articles
+from djangocms_blog.models import PostContent
+
+
+class Command(BaseCommand):
+    help = "Render the Instant Articles of the blog posts contents changed since their last rendering"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespace", action="append", dest="namespaces", help="Only render this namespace")
+        parser.add_argument("--force", action="store_true", help="Render all the Instant Articles")
+
+    def handle(self, *args, **options):
+        post_contents = PostContent.objects.all()
+        if options["namespaces"]:
+            post_contents = post_contents.filter(post__app_config__namespace__in=options["namespaces"])
+        rendered = render_instant_articles(post_contents, force=options["force"])
+        self.stdout.write(f"{rendered} instant articles rendered")
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from djangocms_blog.related import update_related_posts
+
+
+class Command(BaseCommand):
+    help = "Compute the related posts of the blog posts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--namespace", action="append", dest="namespaces", help="Only update this namespace")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of posts per transaction")
+
+    def handle(self, *args, **options):
+        updated = update_related_posts(namespaces=options["namespaces"], batch_size=options["batch_size"])
+        self.stdout.write(f"related posts of {updated} posts updated")
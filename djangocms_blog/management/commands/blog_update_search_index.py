@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.utils.timezone import now
+
+from djangocms_blog.search import get_search_index_backlog, process_search_index_queue
+
+
+class Command(BaseCommand):
+    help = "Update the search index of the blog posts contents changed since the last update"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Number of post contents per batch")
+        parser.add_argument("--limit", type=int, help="Maximum number of post contents to index")
+        parser.add_argument("--backlog", action="store_true", help="Only report the number of pending updates")
+
+    def handle(self, *args, **options):
+        if not options["backlog"]:
+            processed = process_search_index_queue(batch_size=options["batch_size"], limit=options["limit"])
+            self.stdout.write(f"{processed} post contents indexed")
+        count, oldest = get_search_index_backlog()
+        if count:
+            self.stdout.write(f"{count} pending updates, oldest queued {int((now() - oldest).total_seconds())}s ago")
+        else:
+            self.stdout.write("0 pending updates")
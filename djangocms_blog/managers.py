@@ -1,9 +1,6 @@
-from collections import Counter
-
-from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.db import models
-from django.utils.timezone import now
+from django.db.models.functions import Coalesce, TruncMonth
 
 
 class TaggedFilterItem:
@@ -34,8 +31,12 @@ class TaggedFilterItem:
                     "tag_id", flat=True
                 )
             )
+        # tags are set on the posts, not on their contents
+        tagged_model = self.model._meta.get_field("post").related_model
         tags = set(
-            TaggedItem.objects.filter(content_type__model=self.model.__name__.lower()).values_list("tag_id", flat=True)
+            TaggedItem.objects.filter(content_type__model=tagged_model.__name__.lower()).values_list(
+                "tag_id", flat=True
+            )
         )
         if filters is not None:
             tags = tags.intersection(filters)
@@ -54,37 +55,52 @@ class TaggedFilterItem:
         queryset = self.tag_list(other_model, queryset)
         return queryset.values("slug")
 
-    def tag_cloud(self, other_model=None, queryset=None, published=True, on_site=False):
-        from taggit.models import TaggedItem
+    def tag_cloud(self, other_model=None, queryset=None, published=True, on_site=False, limit=None):
+        """
+        Return the tags of the posts in the queryset, ordered by the number of posts using them.
 
+        Tags and counts are computed in a single query, each tag carries the number of posts in the ``count``
+        attribute.
+
+        :param other_model: unused, kept for backward compatibility
+        :param queryset: post contents queryset, all the (published if ``published``) post contents if ``None``
+        :param published: use only published post contents if no queryset is provided
+        :param on_site: limit the post contents to the current site
+        :param limit: return only the ``limit`` most used tags
+        """
+        if queryset is None:
+            queryset = self.model.objects.all() if published else self.model.admin_manager.latest_content()
         if on_site:
             queryset = queryset.on_site()
-        tag_ids = self._taglist(other_model, queryset)
-        kwargs = {}
-        if published:
-            kwargs = {
-                "object_id__in": self.model.objects.published(),
-                "content_type": ContentType.objects.get_for_model(self.model),
-            }
-        kwargs["tag_id__in"] = tag_ids
-        counted_tags = dict(
-            TaggedItem.objects.filter(**kwargs)
-            .values("tag")
-            .annotate(count=models.Count("tag"))
-            .values_list("tag", "count")
+        tags_field = self.model._meta.get_field("post").related_model._meta.get_field("tags")
+        posts = tags_field.related_query_name()
+        tags = (
+            tags_field.related_model.objects.filter(**{f"{posts}__in": queryset.order_by().values("post_id")})
+            .annotate(count=models.Count(posts, distinct=True))
+            .order_by("-count", "name")
         )
-        tags = TaggedItem.tag_model().objects.filter(pk__in=counted_tags.keys())
-        for tag in tags:
-            tag.count = counted_tags[tag.pk]
-        return sorted(tags, key=lambda x: -x.count)
+        if limit:
+            tags = tags[:limit]
+        return list(tags)
 
 
 class SiteQuerySet(models.QuerySet):
+    start_date_field = "listing_date_published"
+    fallback_date_field = "listing_date_created"
 
     def on_site(self, site=None):
+        """
+        Filter the post contents visible on the given site (default: the current site).
+
+        Posts shown on all the sites are flagged on their contents, the others are matched with a semi-join on the post
+        sites table, thus no row is duplicated.
+        """
         if not site:
             site = Site.objects.get_current()
-        return self.filter(models.Q(post__sites__isnull=True) | models.Q(post__sites=site.pk))
+        sites = self.model._meta.get_field("post").related_model.sites.through
+        return self.filter(
+            models.Q(listing_all_sites=True) | models.Q(post__in=sites.objects.filter(site=site.pk).values("post_id"))
+        )
 
     def filter_by_language(self, language, current_site=True):
         if current_site:
@@ -140,31 +156,24 @@ class GenericDateTaggedManager(TaggedFilterItem, models.Manager):
         """
         Get months with aggregate count (how many posts is in the month).
         Results are ordered by date.
+
+        Months are computed and counted by the database, using the fallback date if the start date is not set.
         """
         if queryset is None:
             queryset = self.get_queryset()
         if current_site:
             queryset = queryset.on_site()
-        dates_qs = queryset.values_list(queryset.start_date_field, queryset.fallback_date_field)
-        dates = []
-        for blog_dates in dates_qs:
-            if blog_dates[0]:
-                current_date = blog_dates[0]
-            else:
-                current_date = blog_dates[1]
-            dates.append(
-                (
-                    current_date.year,
-                    current_date.month,
-                )
-            )
-        date_counter = Counter(dates)
-        dates = set(dates)
-        dates = sorted(dates, reverse=True)
-        return [
-            {"date": now().replace(year=year, month=month, day=1), "count": date_counter[year, month]}
-            for year, month in dates
-        ]
+        month = TruncMonth(Coalesce(queryset.start_date_field, queryset.fallback_date_field))
+        dates_qs = (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .order_by()
+            .annotate(month=month)
+            .values("month")
+            .annotate(count=models.Count("pk", distinct=True))
+            .order_by("-month")
+        )
+        return [{"date": dates["month"], "count": dates["count"]} for dates in dates_qs]
 
 
 class AdminDateTaggedManager(GenericDateTaggedManager):
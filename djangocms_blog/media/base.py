@@ -1,3 +1,70 @@
+import re
+import threading
+from collections import OrderedDict
+
+from ..settings import get_setting
+
+_MISSING = object()
+
+
+class MediaParamsCache:
+    """
+    Bounded least recently used cache of the media information, shared by all the media plugins.
+
+    Items are keyed by plugin class and media URL; unmatched URLs are cached as well (as ``None``). The cache size
+    is :ref:`MEDIA_PARAMS_CACHE_SIZE <MEDIA_PARAMS_CACHE_SIZE>`.
+    """
+
+    def __init__(self):
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                return default
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > get_setting("MEDIA_PARAMS_CACHE_SIZE"):
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+media_params_cache = MediaParamsCache()
+
+
+def resolve_media_params(plugins):
+    """
+    Fill the media information of all the given (downcasted) plugins at once.
+
+    Each plugin class and media URL is resolved once, plugins not implementing
+    :py:class:`MediaAttachmentPluginMixin` are skipped.
+
+    :param plugins: list of plugin instances
+    :return: list of media plugins
+    """
+    media_plugins = [plugin for plugin in plugins if isinstance(plugin, MediaAttachmentPluginMixin)]
+    resolved = {}
+    for plugin in media_plugins:
+        key = plugin.get_media_params_key()
+        if key not in resolved:
+            resolved[key] = plugin.media_params
+        plugin._cached_params = resolved[key]
+    return media_plugins
+
+
 class MediaAttachmentPluginMixin:
     """
     Base class for media-enabled plugins.
@@ -20,7 +87,8 @@ class MediaAttachmentPluginMixin:
 
     * ``'params'``: one or more regular expressions to retrieve the media ID
       according to the provided ``media_url``. It **must** contain a capturing
-      group called ``media_id`` (see examples below).
+      group called ``media_id`` (see examples below). The first matching
+      expression is used.
     * ``'thumb_url'``: URL of the intermediate resolution media cover (depending
       on the plaform).
       It supports string formatting via ``format`` by providing the return json
@@ -51,22 +119,36 @@ class MediaAttachmentPluginMixin:
         will be called instead (as method on the current model instance) to retrieve the
         information with any required logic.
 
-        :return: media information dictionary
+        Information is cached in :py:data:`media_params_cache` by plugin class and media URL, thus
+        the ``'callable'`` is called once for each media.
+
+        :return: media information dictionary (``None`` if the media URL is not matched)
         :rtype: dict
         """
-        if not self._cached_params:
-            for pattern in self._media_autoconfiguration["params"]:
-                match = pattern.match(self.media_url)
-                if match:
-                    if self._media_autoconfiguration["callable"]:
-                        self._cached_params = getattr(self, self._media_autoconfiguration["callable"])(
-                            **match.groupdict()
-                        )
-                    else:
-                        self._cached_params = match.groupdict()
-                        self._cached_params["url"] = self.media_url
+        if self._cached_params is None:
+            key = self.get_media_params_key()
+            params = media_params_cache.get(key)
+            if params is _MISSING:
+                params = self._get_media_params()
+                media_params_cache.set(key, params)
+            self._cached_params = params
         return self._cached_params
 
+    def get_media_params_key(self):
+        """
+        Key of the media information in :py:data:`media_params_cache`.
+        """
+        return self.__class__, self.media_url
+
+    def _get_media_params(self):
+        for pattern in self._media_autoconfiguration["params"]:
+            match = re.match(pattern, self.media_url)
+            if match:
+                if self._media_autoconfiguration["callable"]:
+                    return getattr(self, self._media_autoconfiguration["callable"])(**match.groupdict())
+                return {**match.groupdict(), "url": self.media_url}
+        return None
+
     @property
     def media_url(self):
         """
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0047_migrate_config"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcontent",
+            name="permalink",
+            field=models.CharField(blank=True, default="", editable=False, max_length=2000, verbose_name="permalink"),
+        ),
+    ]
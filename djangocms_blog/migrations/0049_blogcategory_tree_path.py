@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+def update_tree_paths(apps, schema_editor):
+    BlogCategory = apps.get_model("djangocms_blog", "BlogCategory")
+    parents = dict(BlogCategory.objects.values_list("pk", "parent_id"))
+    paths = {}
+
+    def get_path(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            paths[pk] = f"{get_path(parent_id) if parent_id else '/'}{pk}/"
+        return paths[pk]
+
+    categories = list(BlogCategory.objects.only("pk"))
+    for category in categories:
+        category.tree_path = get_path(category.pk)
+    BlogCategory.objects.bulk_update(categories, ["tree_path"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0048_postcontent_permalink"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blogcategory",
+            name="tree_path",
+            field=models.CharField(
+                blank=True, db_index=True, default="", editable=False, max_length=255, verbose_name="tree path"
+            ),
+        ),
+        migrations.RunPython(update_tree_paths, migrations.RunPython.noop),
+    ]
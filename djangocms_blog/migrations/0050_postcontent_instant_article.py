@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0049_blogcategory_tree_path"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcontent",
+            name="instant_article",
+            field=models.TextField(blank=True, default="", editable=False, verbose_name="instant article"),
+        ),
+        migrations.AddField(
+            model_name="postcontent",
+            name="instant_article_date",
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name="instant article rendered"),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import migrations, models
+
+SQLITE_TABLE = "djangocms_blog_postcontent_search"
+POSTGRES_INDEX = "djangocms_blog_search_gin"
+
+
+def install_search_backend(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {connection.ops.quote_name(SQLITE_TABLE)} "
+            "USING fts5(search_text, tokenize='unicode61 remove_diacritics 2')"
+        )
+    elif connection.vendor == "postgresql":
+        # the expression must match the SearchVector of the search queries
+        config = getattr(settings, "BLOG_SEARCH_POSTGRES_CONFIG", "simple")
+        schema_editor.execute(
+            f"CREATE INDEX {connection.ops.quote_name(POSTGRES_INDEX)} ON "
+            f"{connection.ops.quote_name('djangocms_blog_postcontent')} "
+            f"USING gin (to_tsvector({schema_editor.quote_value(config)}::regconfig, COALESCE("
+            f"{connection.ops.quote_name('search_text')}, '')))"
+        )
+
+
+def uninstall_search_backend(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {connection.ops.quote_name(SQLITE_TABLE)}")
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {connection.ops.quote_name(POSTGRES_INDEX)}")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0050_postcontent_instant_article"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcontent",
+            name="search_text",
+            field=models.TextField(blank=True, default="", editable=False, verbose_name="search text"),
+        ),
+        migrations.RunPython(install_search_backend, uninstall_search_backend),
+    ]
@@ -0,0 +1,26 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0051_postcontent_search_text"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexUpdate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("post_content_id", models.PositiveBigIntegerField(unique=True, verbose_name="post content")),
+                (
+                    "date_queued",
+                    models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name="queued at"),
+                ),
+            ],
+            options={
+                "verbose_name": "search index update",
+                "verbose_name_plural": "search index updates",
+            },
+        ),
+    ]
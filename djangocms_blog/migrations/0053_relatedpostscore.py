@@ -0,0 +1,45 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0052_searchindexupdate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedPostScore",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("rank", models.PositiveSmallIntegerField(verbose_name="rank")),
+                ("score", models.FloatField(verbose_name="score")),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_scores",
+                        to="djangocms_blog.post",
+                        verbose_name="post",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_to_scores",
+                        to="djangocms_blog.post",
+                        verbose_name="related post",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "related post score",
+                "verbose_name_plural": "related post scores",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="relatedpostscore",
+            constraint=models.UniqueConstraint(fields=("post", "rank"), name="djangocms_blog_related_post_rank"),
+        ),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0053_relatedpostscore"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcontent",
+            name="media_previews",
+            field=models.JSONField(blank=True, editable=False, null=True, verbose_name="media previews"),
+        ),
+    ]
@@ -0,0 +1,75 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def copy_listing_fields(apps, schema_editor):
+    Post = apps.get_model("djangocms_blog", "Post")
+    PostContent = apps.get_model("djangocms_blog", "PostContent")
+    posts = Post.objects.filter(pk=OuterRef("post_id"))
+    PostContent.objects.using(schema_editor.connection.alias).update(
+        listing_app_config=Subquery(posts.values("app_config")[:1]),
+        listing_pinned=Coalesce(Subquery(posts.values("pinned")[:1]), Value(2147483647)),
+        listing_date_published=Subquery(posts.values("date_published")[:1]),
+        listing_date_created=Subquery(posts.values("date_created")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0054_postcontent_media_previews"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="postcontent",
+            name="listing_app_config",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="djangocms_blog.blogconfig",
+            ),
+        ),
+        migrations.AddField(
+            model_name="postcontent",
+            name="listing_date_created",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="postcontent",
+            name="listing_date_published",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="postcontent",
+            name="listing_pinned",
+            field=models.IntegerField(default=2147483647, editable=False),
+        ),
+        migrations.RunPython(copy_listing_fields, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name="postcontent",
+            options={
+                "get_latest_by": "listing_date_published",
+                "ordering": ("listing_pinned", "-listing_date_published", "-listing_date_created"),
+                "verbose_name": "article content",
+                "verbose_name_plural": "article contents",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="postcontent",
+            index=models.Index(
+                fields=[
+                    "listing_app_config",
+                    "language",
+                    "listing_pinned",
+                    "-listing_date_published",
+                    "-listing_date_created",
+                ],
+                name="djangocms_blog_listing",
+            ),
+        ),
+    ]
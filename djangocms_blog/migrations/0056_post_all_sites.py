@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+def update_all_sites(apps, schema_editor):
+    Post = apps.get_model("djangocms_blog", "Post")
+    PostContent = apps.get_model("djangocms_blog", "PostContent")
+    db_alias = schema_editor.connection.alias
+    posts = Post.sites.through.objects.using(db_alias).values("post_id")
+    Post.objects.using(db_alias).filter(pk__in=posts).update(all_sites=False)
+    PostContent.objects.using(db_alias).filter(post__in=posts).update(listing_all_sites=False)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0055_postcontent_listing_fields"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="all_sites",
+            field=models.BooleanField(default=True, editable=False, verbose_name="all sites"),
+        ),
+        migrations.AddField(
+            model_name="postcontent",
+            name="listing_all_sites",
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.RunPython(update_all_sites, migrations.RunPython.noop),
+    ]
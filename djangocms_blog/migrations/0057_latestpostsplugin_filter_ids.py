@@ -0,0 +1,50 @@
+from django.db import migrations, models
+
+
+def update_filter_ids(apps, schema_editor):
+    LatestPostsPlugin = apps.get_model("djangocms_blog", "LatestPostsPlugin")
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    TaggedItem = apps.get_model("taggit", "TaggedItem")
+    db_alias = schema_editor.connection.alias
+    content_type = ContentType.objects.using(db_alias).filter(app_label="djangocms_blog", model="latestpostsplugin")
+    tags = {}
+    for plugin_id, tag_id in (
+        TaggedItem.objects.using(db_alias)
+        .filter(content_type__in=content_type)
+        .order_by("object_id", "tag_id")
+        .values_list("object_id", "tag_id")
+    ):
+        tags.setdefault(plugin_id, []).append(tag_id)
+    categories = {}
+    for plugin_id, category_id in (
+        LatestPostsPlugin.categories.through.objects.using(db_alias)
+        .order_by("latestpostsplugin_id", "blogcategory_id")
+        .values_list("latestpostsplugin_id", "blogcategory_id")
+    ):
+        categories.setdefault(plugin_id, []).append(category_id)
+    for plugin_id in tags.keys() | categories.keys():
+        LatestPostsPlugin.objects.using(db_alias).filter(pk=plugin_id).update(
+            tag_ids=tags.get(plugin_id, []), category_ids=categories.get(plugin_id, [])
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("taggit", "__first__"),
+        ("djangocms_blog", "0056_post_all_sites"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="latestpostsplugin",
+            name="tag_ids",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name="latestpostsplugin",
+            name="category_ids",
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(update_filter_ids, migrations.RunPython.noop),
+    ]
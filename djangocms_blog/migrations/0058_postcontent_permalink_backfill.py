@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def backfill_permalinks(apps, schema_editor):
+    # permalinks are resolved through the apphooks urls, which requires the current models and not the historical ones
+    from djangocms_blog.models import rebuild_permalinks
+
+    rebuild_permalinks(empty_only=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0057_latestpostsplugin_filter_ids"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_permalinks, migrations.RunPython.noop),
+    ]
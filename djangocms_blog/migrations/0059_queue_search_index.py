@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.utils.timezone import now
+
+
+def queue_search_index(apps, schema_editor):
+    # post contents created before the search index are indexed by the next run of the search index queue
+    PostContent = apps.get_model("djangocms_blog", "PostContent")
+    SearchIndexUpdate = apps.get_model("djangocms_blog", "SearchIndexUpdate")
+    db_alias = schema_editor.connection.alias
+    queued = set(SearchIndexUpdate.objects.using(db_alias).values_list("post_content_id", flat=True))
+    pks = PostContent.objects.using(db_alias).filter(search_text="").values_list("pk", flat=True)
+    date = now()
+    SearchIndexUpdate.objects.using(db_alias).bulk_create(
+        [SearchIndexUpdate(post_content_id=pk, date_queued=date) for pk in pks if pk not in queued], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("djangocms_blog", "0058_postcontent_permalink_backfill"),
+    ]
+
+    operations = [
+        migrations.RunPython(queue_search_index, migrations.RunPython.noop),
+    ]
@@ -1,23 +1,33 @@
 import hashlib
+import re
+import time
+from urllib.parse import quote
 
-from cms.models import CMSPlugin, PlaceholderRelationField, ContentAdminManager
+from cms.models import CMSPlugin, Placeholder, PlaceholderRelationField, ContentAdminManager
+from cms.signals import post_placeholder_operation, urls_need_reloading
+from cms.utils.apphook_reload import ensure_urlconf_is_up_to_date
 from cms.utils.placeholder import get_placeholder_from_slot
+from cms.utils.plugins import downcast_plugins
 from django.apps import apps
 from django.conf import settings as dj_settings
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.cache import cache
-from django.db import models
-from django.db.models import F, Q
-from django.db.models.signals import post_save, pre_delete
+from django.db import models, transaction
+from django.db.models import F, Q, Value, Window
+from django.db.models.functions import Concat, RowNumber, Substr
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.urls import NoReverseMatch, reverse
+from django.urls.converters import get_converter
 from django.utils import timezone, translation
 from django.utils.encoding import force_bytes, force_str
 from django.utils.functional import cached_property
 from django.utils.html import strip_tags
+from django.utils.http import RFC3986_SUBDELIMS
 from django.utils.timezone import now
 from django.utils.translation import get_language, gettext, gettext_lazy as _
 from filer.fields.image import FilerImageField
@@ -27,15 +37,19 @@ from parler.models import TranslatableModel, TranslatedFields
 from sortedm2m.fields import SortedManyToManyField
 from taggit_autosuggest.managers import TaggableManager
 
-from .cms_appconfig import BlogConfig
+from .cms_appconfig import BlogConfig, config_registry
 from .fields import slugify
 from .managers import GenericDateTaggedManager, AdminDateTaggedManager
+from .media.base import resolve_media_params
 from .settings import get_setting
+from .worker import worker
 
 BLOG_CURRENT_POST_IDENTIFIER = get_setting("CURRENT_POST_IDENTIFIER")
 BLOG_CURRENT_NAMESPACE = get_setting("CURRENT_NAMESPACE")
 BLOG_PLUGIN_TEMPLATE_FOLDERS = get_setting("PLUGIN_TEMPLATE_FOLDERS")
 BLOG_ALLOW_UNICODE_SLUGS = get_setting("ALLOW_UNICODE_SLUGS")
+PERMALINK_PARAMETER_RE = re.compile(r"<(?:(?P<converter>[^>:]+):)?(?P<parameter>[^>]+)>")
+PERMALINK_INT_MARKER = 9000000001
 
 
 thumbnail_model = f"{ThumbnailOption._meta.app_label}.{ThumbnailOption.__name__}"
@@ -66,6 +80,11 @@ else:
             super().__init__(*args, **kwargs)
 
 
+def _get_guid(language, namespace, slug):
+    base_string = f"-{language}-{slug}-{namespace}-"
+    return hashlib.sha256(force_bytes(base_string)).hexdigest()
+
+
 def _get_language(instance, language):
     available_languages = instance.get_available_languages()
     if language and language in available_languages:
@@ -83,6 +102,39 @@ def _get_language(instance, language):
     return language
 
 
+def get_permalink_parameters(urlconf):
+    """
+    Return the parameters of a permalink urlconf as a ``{name: converter}`` dictionary.
+
+    :param urlconf: one of the :ref:`PERMALINK_URLS <PERMALINK_URLS>` values
+    """
+    return {name: converter or "str" for converter, name in PERMALINK_PARAMETER_RE.findall(urlconf)}
+
+
+def get_permalink_kwargs(urlconf, date, slug, category_slug=None):
+    """
+    Build the kwargs to reverse the ``post-detail`` url for the given permalink urlconf.
+
+    :param urlconf: one of the :ref:`PERMALINK_URLS <PERMALINK_URLS>` values
+    :param date: post reference date (publishing or creation date)
+    :param slug: post slug
+    :param category_slug: slug of the post main category (only used if the urlconf requires it)
+    """
+    parameters = get_permalink_parameters(urlconf)
+    kwargs = {}
+    if "year" in parameters:
+        kwargs["year"] = date.year
+    if "month" in parameters:
+        kwargs["month"] = "%02d" % date.month
+    if "day" in parameters:
+        kwargs["day"] = "%02d" % date.day
+    if "slug" in parameters:
+        kwargs["slug"] = slug
+    if "category" in parameters:
+        kwargs["category"] = category_slug
+    return kwargs
+
+
 class BlogMetaMixin:
     def get_meta_attribute(self, param):
         """
@@ -116,6 +168,7 @@ class BlogCategory(BlogMetaMixin, ModelMeta, TranslatableModel):
         help_text=_("When selecting a value, the form is reloaded to get the updated default"),
     )
     priority = models.IntegerField(_("priority"), blank=True, null=True)
+    tree_path = models.CharField(_("tree path"), max_length=255, blank=True, default="", db_index=True, editable=False)
     main_image = FilerImageField(
         verbose_name=_("main image"),
         blank=True,
@@ -180,13 +233,48 @@ class BlogCategory(BlogMetaMixin, ModelMeta, TranslatableModel):
         verbose_name_plural = _("post categories")
         ordering = (F("priority").asc(nulls_last=True),)
 
+    @property
+    def depth(self):
+        """Level of the category in the tree, starting from 0 for root categories."""
+        return max(self.tree_path.count("/") - 2, 0)
+
+    def get_tree_path_ids(self):
+        """Return the ids of the categories in the tree path, from the root category down to the current one."""
+        return [int(pk) for pk in self.tree_path.strip("/").split("/") if pk]
+
     def descendants(self):
-        children = []
-        if self.children.exists():
-            children.extend(self.children.all())
-            for child in self.children.all():
-                children.extend(child.descendants())
-        return children
+        """Return all the categories below the current one, in tree order."""
+        if not self.tree_path:
+            return []
+        categories = BlogCategory.objects.filter(tree_path__startswith=self.tree_path).exclude(pk=self.pk)
+        return list(categories.order_by("tree_path"))
+
+    def ancestors(self):
+        """Return all the categories above the current one, from the root category down to the parent."""
+        ids = self.get_tree_path_ids()[:-1]
+        categories = BlogCategory.objects.in_bulk(ids)
+        return [categories[pk] for pk in ids if pk in categories]
+
+    def breadcrumbs(self):
+        """Return the ancestors and the current category, from the root category down."""
+        return [*self.ancestors(), self]
+
+    def update_tree_path(self):
+        """
+        Compute the materialized tree path of the category and update the one of the descendants accordingly.
+
+        The tree path is the list of ids from the root category to the current one (e.g.: ``/1/4/12/``).
+        """
+        parent_path = "/"
+        if self.parent_id:
+            parent_path = BlogCategory.objects.filter(pk=self.parent_id).values_list("tree_path", flat=True).get()
+        tree_path = f"{parent_path or '/'}{self.pk}/"
+        if tree_path != self.tree_path:
+            if self.tree_path:
+                categories = BlogCategory.objects.filter(tree_path__startswith=self.tree_path)
+                categories.update(tree_path=Concat(Value(tree_path), Substr("tree_path", len(self.tree_path) + 1)))
+            BlogCategory.objects.filter(pk=self.pk).update(tree_path=tree_path)
+            self.tree_path = tree_path
 
     @cached_property
     def linked_posts(self):
@@ -200,7 +288,7 @@ class BlogCategory(BlogMetaMixin, ModelMeta, TranslatableModel):
 
     @cached_property
     def count(self):
-        return self.linked_posts.filter(Q(sites__isnull=True) | Q(sites=Site.objects.get_current())).count()
+        return self.linked_posts.filter(get_site_posts_filter(Site.objects.get_current())).count()
 
     @cached_property
     def count_all_sites(self):
@@ -225,6 +313,7 @@ class BlogCategory(BlogMetaMixin, ModelMeta, TranslatableModel):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        self.update_tree_path()
         for lang in self.get_available_languages():
             self.set_current_language(lang)
             if not self.slug and self.name:
@@ -308,6 +397,7 @@ class Post(KnockerModel, models.Model):
             "visible in all the configured sites."
         ),
     )
+    all_sites = models.BooleanField(_("all sites"), default=True, editable=False)
     app_config = models.ForeignKey(
         BlogConfig,
         on_delete=models.CASCADE,
@@ -365,6 +455,7 @@ class Post(KnockerModel, models.Model):
         super().__init__(*args, **kwargs)
         self._content_cache = {}
         self._language_cache = None
+        self._url_cache = {}
 
     def __str__(self):
         default = gettext("Post (no translation)")
@@ -416,12 +507,11 @@ class Post(KnockerModel, models.Model):
     def guid(self, language=None):
         if not language:
             language = get_language()
-        base_string = "-{0}-{2}-{1}-".format(
+        return _get_guid(
             language,
             self.app_config.namespace,
             self.safe_translation_getter("slug", language_code=language, any_language=True),
         )
-        return hashlib.sha256(force_bytes(base_string)).hexdigest()
 
     @property
     def date(self):
@@ -430,32 +520,27 @@ class Post(KnockerModel, models.Model):
         return self.date_published
 
     def get_available_languages(self):
-        if not (self._language_cache):
+        if self._language_cache is None:
             self._language_cache = list(self.postcontent_set.all().values_list("language", flat=True))
         return self._language_cache
 
     def get_absolute_url(self, language=None):
         lang = language or translation.get_language()
+        if lang in self._url_cache:
+            return self._url_cache[lang]
         with translation.override(lang):
-            category = self.categories.first()
-            kwargs = {}
-            if self.date_published:
-                current_date = self.date_published
-            else:
-                current_date = self.date_created
             urlconf = get_setting("PERMALINK_URLS")[self.app_config.url_patterns]
-            if "<int:year>" in urlconf:
-                kwargs["year"] = current_date.year
-            if "<int:month>" in urlconf:
-                kwargs["month"] = "%02d" % current_date.month
-            if "<int:day>" in urlconf:
-                kwargs["day"] = "%02d" % current_date.day
-            if "<str:slug>" in urlconf or "<slug:slug>" in urlconf:
-                kwargs["slug"] = self.safe_translation_getter("slug", language_code=lang, any_language=True)  # NOQA
-            if "<slug:category>" in urlconf or "<str:category>" in urlconf:
-                kwargs["category"] = category.safe_translation_getter(
-                    "slug", language_code=lang, any_language=True
-                )  # NOQA
+            category_slug = None
+            if "category" in get_permalink_parameters(urlconf):
+                category = self.categories.first()
+                if category:
+                    category_slug = category.safe_translation_getter("slug", language_code=lang, any_language=True)
+            kwargs = get_permalink_kwargs(
+                urlconf,
+                self.date_published or self.date_created,
+                self.safe_translation_getter("slug", language_code=lang, any_language=True),
+                category_slug,
+            )
             try:
                 return reverse(
                     "%s:post-detail" % self.app_config.namespace, kwargs=kwargs, current_app=self.app_config.namespace
@@ -559,8 +644,23 @@ class PostContent(BlogMetaMixin, ModelMeta, models.Model):
     class Meta:
         verbose_name = _("article content")
         verbose_name_plural = _("article contents")
-        ordering = (F("post__pinned").asc(nulls_last=True), "-post__date_published", "-post__date_created")
-        get_latest_by = "date_published"
+        ordering = ("listing_pinned", "-listing_date_published", "-listing_date_created")
+        get_latest_by = "listing_date_published"
+        indexes = [
+            models.Index(
+                fields=[
+                    "listing_app_config",
+                    "language",
+                    "listing_pinned",
+                    "-listing_date_published",
+                    "-listing_date_created",
+                ],
+                name="djangocms_blog_listing",
+            ),
+        ]
+
+    #: :py:attr:`listing_pinned` of the posts which are not pinned
+    UNPINNED = 2147483647
 
     # Gruping fields
     post = models.ForeignKey(Post, on_delete=models.CASCADE)
@@ -587,6 +687,19 @@ class PostContent(BlogMetaMixin, ModelMeta, models.Model):
     )
     post_text = HTMLField(_("text"), default="", blank=True, configuration="BLOG_POST_TEXT_CKEDITOR")
     placeholders = PlaceholderRelationField()
+    permalink = models.CharField(_("permalink"), max_length=2000, blank=True, default="", editable=False)
+    instant_article = models.TextField(_("instant article"), blank=True, default="", editable=False)
+    instant_article_date = models.DateTimeField(_("instant article rendered"), null=True, blank=True, editable=False)
+    search_text = models.TextField(_("search text"), blank=True, default="", editable=False)
+    media_previews = models.JSONField(_("media previews"), null=True, blank=True, editable=False)
+    # Listing fields, copied from the post to filter and sort the post contents without joining the posts
+    listing_app_config = models.ForeignKey(
+        BlogConfig, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name="+"
+    )
+    listing_pinned = models.IntegerField(default=UNPINNED, editable=False)
+    listing_date_published = models.DateTimeField(null=True, blank=True, editable=False)
+    listing_date_created = models.DateTimeField(null=True, blank=True, editable=False)
+    listing_all_sites = models.BooleanField(default=True, editable=False)
 
     objects = GenericDateTaggedManager()
     admin_manager = AdminDateTaggedManager()
@@ -610,6 +723,16 @@ class PostContent(BlogMetaMixin, ModelMeta, models.Model):
     def categories(self):
         return self.post.categories
 
+    def get_author(self):
+        """
+        Return the author (user) of the post
+        """
+        return self.author
+
+    @property
+    def guid(self):
+        return _get_guid(self.language, self.post.app_config.namespace, self.slug)
+
     @cached_property
     def media(self):
         return get_placeholder_from_slot(self.placeholders, "media")
@@ -618,15 +741,33 @@ class PostContent(BlogMetaMixin, ModelMeta, models.Model):
     def content(self):
         return get_placeholder_from_slot(self.placeholders, "content")
 
+    def get_media_previews(self, main=True):
+        """
+        Return the preview URLs of the plugins in the ``media`` placeholder, computed on first access and stored
+        until the placeholder is changed (see :py:func:`update_media_previews`).
+
+        :param main: return the main images or the thumbnails
+        """
+        if self.media_previews is None:
+            update_media_previews([self])
+        return self.media_previews["main" if main else "thumb"]
+
     def save(self, *args, **kwargs):
         """
         Handle some auto-configuration during save
         """
         if not self.slug and self.title:
             self.slug = slugify(self.title)
+        update_permalinks([self], save=False)
+        for field, value in get_listing_fields(self.post).items():
+            setattr(self, field, value)
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "permalink", *LISTING_FIELDS}
         super().save(*args, **kwargs)
 
     def get_absolute_url(self, language=None):
+        if self.permalink and (not language or language == self.language):
+            return self.permalink
         return self.post.get_absolute_url(language=language)
 
     def get_template(self):
@@ -639,6 +780,567 @@ class PostContent(BlogMetaMixin, ModelMeta, models.Model):
         return self.title or _("Untitled")
 
 
+LISTING_FIELDS = (
+    "listing_app_config_id",
+    "listing_pinned",
+    "listing_date_published",
+    "listing_date_created",
+    "listing_all_sites",
+)
+
+
+def get_listing_fields(post):
+    """
+    Return the listing fields of the contents of the given post.
+
+    :param post: :py:class:`Post` instance
+    :return: dictionary of :py:class:`PostContent` field values
+    """
+    return {
+        "listing_app_config_id": post.app_config_id,
+        "listing_pinned": PostContent.UNPINNED if post.pinned is None else post.pinned,
+        "listing_date_published": post.date_published,
+        "listing_date_created": post.date_created,
+        "listing_all_sites": post.all_sites,
+    }
+
+
+def get_site_posts_filter(site, prefix=""):
+    """
+    Return the filter matching the posts visible on the given site: posts shown on all the sites, or listed in the
+    post sites table for the site. The latter is a semi-join, thus the filter never duplicates rows.
+
+    :param site: site instance
+    :param prefix: lookup path to the posts (e.g. ``"blog_posts__"``)
+    """
+    return Q(**{f"{prefix}all_sites": True}) | Q(
+        **{f"{prefix}pk__in": Post.sites.through.objects.filter(site=site.pk).values("post_id")}
+    )
+
+
+def update_sites_visibility(post_ids):
+    """
+    Update the :py:attr:`Post.all_sites` flag of the given posts, and the copy on their contents, from their sites.
+
+    The watermarks of the posts namespaces are moved forward, as the flags are updated without any signal.
+
+    :param post_ids: list of post ids
+    :return: ids of the posts shown only on their sites
+    """
+    with_sites = set(Post.sites.through.objects.filter(post_id__in=post_ids).values_list("post_id", flat=True))
+    for all_sites, ids in ((True, set(post_ids) - with_sites), (False, with_sites)):
+        if ids:
+            Post.objects.filter(pk__in=ids).update(all_sites=all_sites)
+            PostContent._base_manager.filter(post__in=ids).update(listing_all_sites=all_sites)
+    namespaces = Post.objects.filter(pk__in=post_ids, app_config__isnull=False).values_list(
+        "app_config__namespace", flat=True
+    )
+    for namespace in set(namespaces):
+        touch_watermark(namespace)
+    return with_sites
+
+
+def attach_post_contents(posts, languages=None, show_draft_content=False):
+    """
+    Load the contents of a batch of posts with a single query.
+
+    Contents are stored in the posts cache, thus :py:meth:`Post.get_content` and
+    :py:meth:`Post.safe_translation_getter` do not hit the database for the given languages, missing contents
+    included. If all the languages are loaded, the available languages of each post are set as well.
+
+    :param posts: list of :py:class:`Post` instances
+    :param languages: list of language codes to load (default: all the languages)
+    :param show_draft_content: load the contents returned by ``get_content(show_draft_content=True)``
+    :return: list of posts
+    """
+    posts = list(posts)
+    if not posts:
+        return posts
+    if show_draft_content:
+        post_contents = PostContent.admin_manager.current_content(post__in=posts)
+    else:
+        post_contents = PostContent.objects.filter(post__in=posts)
+    if languages is not None:
+        post_contents = post_contents.filter(language__in=languages)
+    contents = {}
+    for post_content in post_contents.prefetch_related("placeholders").order_by("pk"):
+        contents.setdefault(post_content.post_id, {}).setdefault(post_content.language, post_content)
+    suffix = "latest" if show_draft_content else "public"
+    for post in posts:
+        post_languages = contents.get(post.pk, {})
+        for language in languages if languages is not None else post_languages:
+            post_content = post_languages.get(language)
+            if post_content:
+                post_content.post = post
+            post._content_cache[f"{language}_{suffix}"] = post_content
+        if languages is None:
+            post._language_cache = list(post_languages)
+    return posts
+
+
+def _get_permalink_template(namespace, urlconf):
+    """
+    Reverse the ``post-detail`` url once for the given namespace using markers in place of the actual values.
+
+    Return a ``(template, parameters)`` tuple where template is a ``str.format`` compatible template,
+    or ``(None, parameters)`` if the url cannot be reversed.
+    """
+    parameters = get_permalink_parameters(urlconf)
+    markers = {}
+    for index, (name, converter) in enumerate(parameters.items()):
+        markers[name] = PERMALINK_INT_MARKER + index if converter == "int" else f"blogpermalink{index}x"
+    try:
+        url = reverse(f"{namespace}:post-detail", kwargs=markers, current_app=namespace)
+    except NoReverseMatch:
+        return None, parameters
+    template = url.replace("{", "{{").replace("}", "}}")
+    for name, marker in markers.items():
+        template = template.replace(str(marker), "{%s}" % name)
+    return template, parameters
+
+
+def _fill_permalink_template(template, parameters, kwargs):
+    values = {}
+    for name, converter in parameters.items():
+        value = force_str(kwargs.get(name) or "")
+        if not re.fullmatch(get_converter(converter).regex, value):
+            return ""
+        values[name] = quote(value, safe=RFC3986_SUBDELIMS + "/~:@")
+    return template.format(**values)
+
+
+def _get_post_configs(posts):
+    missing = [post for post in posts if not Post.app_config.is_cached(post)]
+    if missing:
+        configs = config_registry.get_many(post.app_config_id for post in missing)
+        for post in missing:
+            post.app_config = configs.get(post.app_config_id)
+    return {post.pk: post.app_config for post in posts}
+
+
+def _get_post_slugs(items, language):
+    slugs = {}
+    for item in items:
+        if isinstance(item, PostContent) and item.language == language:
+            slugs[item.post_id] = item.slug
+        else:
+            post = item.post if isinstance(item, PostContent) else item
+            content = post._content_cache.get(f"{language}_latest")
+            if content:
+                slugs[post.pk] = content.slug
+    missing = {item.post_id if isinstance(item, PostContent) else item.pk for item in items} - set(slugs)
+    if missing:
+        contents = PostContent.admin_manager.current_content(post__in=missing).order_by("pk")
+        fallback = {}
+        for post_id, content_language, slug in contents.values_list("post_id", "language", "slug"):
+            if content_language == language:
+                slugs[post_id] = slug
+            else:
+                fallback.setdefault(post_id, slug)
+        for post_id, slug in fallback.items():
+            slugs.setdefault(post_id, slug)
+    return slugs
+
+
+def _get_post_category_slugs(posts, language):
+    """Return the slug of the main category (i.e.: ``categories.first()``) of each post."""
+    post_categories = {}
+    missing = []
+    for post in posts:
+        if "categories" in getattr(post, "_prefetched_objects_cache", {}):
+            post_categories[post.pk] = list(post.categories.all())
+        else:
+            missing.append(post.pk)
+    if missing:
+        through = Post.categories.through.objects.filter(post_id__in=missing)
+        links = list(through.values_list("post_id", "blogcategory_id"))
+        categories = BlogCategory.objects.prefetch_related("translations").in_bulk({link[1] for link in links})
+        for post_id, category_id in links:
+            post_categories.setdefault(post_id, []).append(categories[category_id])
+    slugs = {}
+    for post_id, categories in post_categories.items():
+        if categories:
+            category = min(categories, key=lambda cat: (cat.priority is None, cat.priority or 0, cat.pk))
+            slugs[post_id] = category.safe_translation_getter("slug", language_code=language, any_language=True)
+    return slugs
+
+
+def get_post_urls(items, language=None, refresh=False):
+    """
+    Resolve the absolute urls of a batch of posts.
+
+    Configs, slugs and categories are fetched with at most one query each (prefetched data is used when available)
+    and the ``post-detail`` url is reversed only once per namespace, the resulting template being filled for each
+    post. Resolved urls are stored on the post instances, so that any later ``get_absolute_url`` call for the same
+    language does not trigger any query.
+
+    Post contents in the requested language use their stored ``permalink``, unless ``refresh`` is set.
+
+    :param items: list of :py:class:`Post` or :py:class:`PostContent` instances
+    :param language: language code (default: current language)
+    :param refresh: ignore both stored permalinks and urls already resolved on the post instances
+    :return: list of urls, in the same order as ``items``
+    """
+    lang = language or translation.get_language()
+    items = list(items)
+    posts = [item.post if isinstance(item, PostContent) else item for item in items]
+    for item, post in zip(items, posts):
+        if refresh:
+            post._url_cache.pop(lang, None)
+        elif isinstance(item, PostContent) and item.language == lang and item.permalink:
+            post._url_cache[lang] = item.permalink
+    missing = {post.pk: post for post in posts if lang not in post._url_cache}
+    if missing:
+        configs = _get_post_configs(missing.values())
+        slugs = _get_post_slugs([item for item, post in zip(items, posts) if post.pk in missing], lang)
+        urlconfs = {
+            post_id: get_setting("PERMALINK_URLS")[config.url_patterns]
+            for post_id, config in configs.items()
+            if config
+        }
+        category_slugs = _get_post_category_slugs(
+            [post for post in missing.values() if "category" in get_permalink_parameters(urlconfs.get(post.pk, ""))],
+            lang,
+        )
+        templates = {}
+        with translation.override(lang):
+            for post in missing.values():
+                config = configs[post.pk]
+                url = ""
+                if config:
+                    if config.namespace not in templates:
+                        templates[config.namespace] = _get_permalink_template(config.namespace, urlconfs[post.pk])
+                    template, parameters = templates[config.namespace]
+                    kwargs = get_permalink_kwargs(
+                        urlconfs[post.pk],
+                        post.date_published or post.date_created,
+                        slugs.get(post.pk),
+                        category_slugs.get(post.pk),
+                    )
+                    if template:
+                        url = _fill_permalink_template(template, parameters, kwargs)
+                post._url_cache[lang] = url
+        for post in posts:
+            if lang not in post._url_cache:
+                post._url_cache[lang] = missing[post.pk]._url_cache[lang]
+    return [post._url_cache[lang] for post in posts]
+
+
+def update_permalinks(post_contents, save=True):
+    """
+    Recompute the stored ``permalink`` of the given post contents.
+
+    :param post_contents: iterable of :py:class:`PostContent` instances
+    :param save: write the changed permalinks to the database with a bulk update
+    :return: number of post contents whose permalink has changed
+    """
+    changed = []
+    batches = {}
+    for post_content in post_contents:
+        # each batch must contain a single content per post and language
+        batch = 0
+        while post_content.post_id in batches.setdefault((post_content.language, batch), {}):
+            batch += 1
+        batches[(post_content.language, batch)][post_content.post_id] = post_content
+    for (language, __), batch in batches.items():
+        batch = list(batch.values())
+        for post_content, url in zip(batch, get_post_urls(batch, language, refresh=True)):
+            if post_content.permalink != url:
+                post_content.permalink = url
+                changed.append(post_content)
+    if save and changed:
+        PostContent.admin_manager.bulk_update(changed, ["permalink"], batch_size=500)
+    return len(changed)
+
+
+def update_post_permalinks(posts):
+    """
+    Recompute the stored ``permalink`` of all the contents of the given posts.
+
+    :param posts: list of :py:class:`Post` instances or ids
+    """
+    post_contents = PostContent.admin_manager.filter(post__in=posts).select_related("post__app_config")
+    return update_permalinks(post_contents.prefetch_related("post__categories__translations"))
+
+
+def rebuild_permalinks(namespaces=None, empty_only=False, batch_size=500):
+    """
+    Recompute the stored ``permalink`` of all the post contents, in batches.
+
+    :param namespaces: only rebuild the post contents of these apphook namespaces
+    :param empty_only: only rebuild the post contents without a stored permalink
+    :param batch_size: number of post contents per batch
+    :return: ``(changed, total)`` tuple of the number of changed and processed post contents
+    """
+    post_contents = PostContent.admin_manager.order_by("pk")
+    if namespaces:
+        post_contents = post_contents.filter(post__app_config__namespace__in=namespaces)
+    if empty_only:
+        post_contents = post_contents.filter(permalink="")
+    ids = list(post_contents.values_list("pk", flat=True))
+    changed = 0
+    for start in range(0, len(ids), batch_size):
+        batch = (
+            PostContent.admin_manager.filter(pk__in=ids[start : start + batch_size])
+            .select_related("post__app_config")
+            .prefetch_related("post__categories__translations")
+        )
+        changed += update_permalinks(batch)
+    return changed, len(ids)
+
+
+def _get_watermark_key(namespace=None, language=None):
+    return f"djangocms-blog:watermark:{namespace or '*'}:{language or '*'}"
+
+
+def get_watermark(namespace, language):
+    """
+    Return the timestamp of the last change of the blog content for the given namespace and language.
+
+    The watermark is stored in the cache and moved forward by :py:func:`touch_watermark` every time posts,
+    categories or apphook configurations are changed; if missing from the cache, it is initialized from the
+    modification dates stored in the database.
+
+    :param namespace: apphook namespace, ``None`` to track changes in all the namespaces
+    :param language: language code
+    :return: timestamp (float)
+    """
+    posts = Post.objects.filter(postcontent__language=language)
+    categories = BlogCategory.objects.all()
+    if namespace:
+        keys = [_get_watermark_key(namespace), _get_watermark_key(namespace, language)]
+        posts = posts.filter(app_config__namespace=namespace)
+        categories = categories.filter(app_config__namespace=namespace)
+    else:
+        keys = [_get_watermark_key()]
+    watermarks = cache.get_many(keys)
+    if len(watermarks) < len(keys):
+        dates = [
+            posts.aggregate(date=models.Max("date_modified"))["date"],
+            categories.aggregate(date=models.Max("date_modified"))["date"],
+        ]
+        initial = max((date.timestamp() for date in dates if date), default=time.time())
+        for key in keys:
+            if key not in watermarks:
+                # do not overwrite a watermark set in the meantime
+                cache.add(key, initial, timeout=None)
+                watermarks[key] = cache.get(key, initial)
+    return max(watermarks.values())
+
+
+def touch_watermark(namespace, languages=None):
+    """
+    Move the watermark of the given namespace to the current time.
+
+    :param namespace: apphook namespace
+    :param languages: list of language codes to update, all the languages if ``None``
+    """
+    if languages is None:
+        keys = [_get_watermark_key(namespace)]
+    else:
+        keys = [_get_watermark_key(namespace, language) for language in languages]
+    keys.append(_get_watermark_key())
+    timestamp = time.time()
+    cache.set_many({key: timestamp for key in keys}, timeout=None)
+
+
+def get_watermarked_key(key, namespace, language, watermark=None):
+    """
+    Return the cache key of a value depending on the blog content of the given namespace and language.
+
+    :param key: cache key, it must identify anything the value depends on (e.g.: the site) but namespace and language
+    :param namespace: apphook namespace, ``None`` if the value depends on all the namespaces
+    :param language: language code
+    :param watermark: current watermark, read from the cache if not provided
+    """
+    if watermark is None:
+        watermark = get_watermark(namespace, language)
+    return f"djangocms-blog:{key}:{namespace or '*'}:{language}:{watermark:f}"
+
+
+def get_watermarked_cache(key, namespace, language, compute, timeout):
+    """
+    Return the value cached under ``key``, calling ``compute`` to build it if missing.
+
+    The cache key contains the namespace / language watermark, thus the value is discarded as soon as the
+    blog content changes.
+
+    :param key: cache key, it must identify anything the value depends on (e.g.: the site) but namespace and language
+    :param namespace: apphook namespace, ``None`` if the value depends on all the namespaces
+    :param language: language code
+    :param compute: callable returning the value to cache
+    :param timeout: cache timeout
+    """
+    key = get_watermarked_key(key, namespace, language)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, timeout=timeout)
+    return value
+
+
+def _get_plugin_previews(plugin):
+    """
+    Return the main image and thumbnail URLs of a (downcasted) media plugin.
+
+    Support ``djangocms-video`` ``poster`` field in case the plugin does not implement
+    :py:class:`djangocms_blog.media.base.MediaAttachmentPluginMixin` API.
+    """
+    previews = {}
+    for key, image_method in (("main", "get_main_image"), ("thumb", "get_thumb_image")):
+        try:
+            previews[key] = getattr(plugin, image_method)()
+        except Exception:
+            try:
+                image = plugin.poster
+                if image:
+                    previews[key] = image.url
+            except AttributeError:
+                pass
+    return previews
+
+
+def update_media_previews(post_contents, save=True):
+    """
+    Compute and store the preview URLs of the plugins in the ``media`` placeholder of the given post contents.
+
+    Plugins of all the post contents are loaded at once.
+
+    :param post_contents: list of :py:class:`PostContent` instances
+    :param save: store the previews in the database
+    """
+    post_contents = {post_content.pk: post_content for post_content in post_contents}
+    placeholders = dict(
+        Placeholder.objects.filter(
+            content_type=ContentType.objects.get_for_model(PostContent), object_id__in=post_contents, slot="media"
+        ).values_list("pk", "object_id")
+    )
+    for post_content in post_contents.values():
+        post_content.media_previews = {"main": [], "thumb": []}
+    plugins = CMSPlugin.objects.filter(placeholder__in=placeholders, parent__isnull=True).order_by(
+        "placeholder_id", "position"
+    )
+    plugins = list(downcast_plugins(plugins))
+    resolve_media_params(plugins)
+    for plugin in plugins:
+        post_content = post_contents[placeholders[plugin.placeholder_id]]
+        if plugin.language == post_content.language:
+            for key, url in _get_plugin_previews(plugin).items():
+                post_content.media_previews[key].append(url)
+    if save and post_contents:
+        PostContent._base_manager.bulk_update(list(post_contents.values()), ["media_previews"])
+
+
+def fill_media_previews(post_contents):
+    """
+    Compute at once the media previews of the given post contents which are not stored yet.
+
+    :param post_contents: list of :py:class:`PostContent` instances
+    """
+    update_media_previews([post_content for post_content in post_contents if post_content.media_previews is None])
+
+
+def _touch_post_content(post_content):
+    """Mark the post as modified when one of its contents is changed."""
+    posts = Post.objects.filter(pk=post_content.post_id)
+    posts.update(date_modified=now())
+    for namespace in posts.filter(app_config__isnull=False).values_list("app_config__namespace", flat=True):
+        touch_watermark(namespace, [post_content.language])
+    schedule_instant_articles([post_content.post_id])
+
+
+def _render_instant_articles(post_ids):
+    from .feeds import render_instant_articles
+
+    render_instant_articles(PostContent.objects.filter(post__in=post_ids))
+
+
+def schedule_instant_articles(post_ids):
+    """
+    Render the instant articles of the given posts in the background worker, once the current transaction is
+    committed; posts scheduled while the rendering is pending are rendered together.
+
+    Nothing is done unless :ref:`INSTANT_ARTICLES_WORKER <INSTANT_ARTICLES_WORKER>` is ``"thread"``: run the
+    ``blog_render_instant_articles`` management command to render them instead.
+
+    :param post_ids: list of post ids
+    """
+    if get_setting("INSTANT_ARTICLES_WORKER") == "thread":
+        transaction.on_commit(lambda: worker.schedule("instant-articles", _render_instant_articles, post_ids))
+
+
+class SearchIndexUpdate(models.Model):
+    """
+    Pending update of the search index of a post content, see :py:func:`queue_search_index`.
+
+    Post contents are queued once: queuing them again only moves the queue date forward.
+    """
+
+    post_content_id = models.PositiveBigIntegerField(_("post content"), unique=True)
+    date_queued = models.DateTimeField(_("queued at"), default=now, db_index=True)
+
+    class Meta:
+        verbose_name = _("search index update")
+        verbose_name_plural = _("search index updates")
+
+    def __str__(self):
+        return str(self.post_content_id)
+
+
+class RelatedPostScore(models.Model):
+    """
+    Precomputed related post, see :py:func:`djangocms_blog.related.update_related_posts`.
+
+    Only the best :ref:`RELATED_POSTS_COUNT <RELATED_POSTS_COUNT>` related posts of each post are stored.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="related_scores", verbose_name=_("post"))
+    related = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="related_to_scores", verbose_name=_("related post")
+    )
+    rank = models.PositiveSmallIntegerField(_("rank"))
+    score = models.FloatField(_("score"))
+
+    class Meta:
+        verbose_name = _("related post score")
+        verbose_name_plural = _("related post scores")
+        constraints = [
+            models.UniqueConstraint(fields=["post", "rank"], name="djangocms_blog_related_post_rank"),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id}"
+
+
+def _process_search_index_queue(_ids):
+    from .search import process_search_index_queue
+
+    process_search_index_queue()
+
+
+def queue_search_index(post_content_ids):
+    """
+    Queue the update of the search index of the given post contents, if the search is enabled.
+
+    The queue is processed by the background worker once the current transaction is committed if
+    :ref:`SEARCH_INDEX_WORKER <SEARCH_INDEX_WORKER>` is ``"thread"``, by the ``blog_update_search_index``
+    management command otherwise.
+
+    :param post_content_ids: list of post content ids, deleted post contents are removed from the index
+    """
+    if not get_setting("ENABLE_SEARCH") or not post_content_ids:
+        return
+    date = now()
+    SearchIndexUpdate.objects.bulk_create(
+        [SearchIndexUpdate(post_content_id=pk, date_queued=date) for pk in post_content_ids],
+        update_conflicts=True,
+        unique_fields=["post_content_id"],
+        update_fields=["date_queued"],
+    )
+    if get_setting("SEARCH_INDEX_WORKER") == "thread":
+        transaction.on_commit(lambda: worker.schedule("search-index", _process_search_index_queue))
+
+
 class BasePostPlugin(CMSPlugin):
     app_config = models.ForeignKey(
         BlogConfig,
@@ -672,6 +1374,22 @@ class BasePostPlugin(CMSPlugin):
             "post__categories__app_config"
         )
 
+    def get_cached(self, request, key, compute, timeout=None):
+        """
+        Cache the value returned by ``compute`` according to the plugin namespace, site and language.
+
+        Cache is skipped in edit mode and if ``timeout`` (default: ``BLOG_AGGREGATES_CACHE_TIMEOUT``) is 0.
+        """
+        if timeout is None:
+            timeout = get_setting("AGGREGATES_CACHE_TIMEOUT")
+        if not timeout or (request and getattr(request, "toolbar", False) and request.toolbar.edit_mode_active):
+            return compute()
+        namespace = self.app_config.namespace if self.app_config else None
+        site_id = get_current_site(request).pk if self.current_site else "*"
+        return get_watermarked_cache(
+            f"{key}:{site_id}", namespace, translation.get_language(), compute, timeout=timeout
+        )
+
     def post_content_queryset(self, request=None):
         language = translation.get_language()
         if (request and getattr(request, "toolbar", False) and request.toolbar.edit_mode_active):
@@ -679,7 +1397,7 @@ class BasePostPlugin(CMSPlugin):
         else:
             post_contents = PostContent.objects.all()
         if self.app_config:
-            post_contents = post_contents.filter(post__app_config=self.app_config)
+            post_contents = post_contents.filter(listing_app_config=self.app_config)
         if self.current_site:
             post_contents = post_contents.on_site(get_current_site(request))
         post_contents = post_contents.filter(language=language)
@@ -704,23 +1422,63 @@ class LatestPostsPlugin(BasePostPlugin):
         verbose_name=_("filter by category"),
         help_text=_("Show only the blog articles tagged with chosen categories."),
     )
+    # Snapshot of the tags and categories ids, to filter the post contents without reading the relations
+    tag_ids = models.JSONField(default=list, blank=True, editable=False)
+    category_ids = models.JSONField(default=list, blank=True, editable=False)
 
     def __str__(self):
         return force_str(_("%s latest articles by tag") % self.latest_posts)
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.tag_ids, self.category_ids = self.get_filter_ids()
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "tag_ids", "category_ids"}
+        super().save(*args, **kwargs)
+
     def copy_relations(self, old_instance):
-        for tag in old_instance.tags.all():
-            self.tags.add(tag)
-        for category in old_instance.categories.all():
-            self.categories.add(category)
+        self.tags.add(*old_instance.tags.all())
+        self.categories.add(*old_instance.categories.all())
+        self.update_filter_ids()
+
+    def get_filter_ids(self):
+        """Return the ids of the selected tags and categories, read from the relations."""
+        return (
+            list(self.tags.order_by("pk").values_list("pk", flat=True)),
+            list(self.categories.order_by("pk").values_list("pk", flat=True)),
+        )
+
+    def update_filter_ids(self):
+        """Refresh the snapshot of the tags and categories ids (``tag_ids`` and ``category_ids``)."""
+        self.tag_ids, self.category_ids = self.get_filter_ids()
+        LatestPostsPlugin.objects.filter(pk=self.pk).update(tag_ids=self.tag_ids, category_ids=self.category_ids)
+
+    def get_filter_key(self):
+        """
+        Return a string identifying the post contents selected by the plugin: apphook config, number of entries,
+        tags and categories.
+        """
+        tags = ",".join(str(pk) for pk in sorted(self.tag_ids))
+        categories = ",".join(str(pk) for pk in sorted(self.category_ids))
+        return f"{self.app_config_id or '*'}:{self.latest_posts}:{tags}:{categories}"
 
     def get_post_contents(self, request):
+        """
+        Return the latest post contents matching any of the selected tags and any of the selected categories.
+
+        Tags and categories are matched with semi-joins on the snapshot ids, thus the post contents are fetched with
+        a single query and no row is duplicated.
+        """
         post_contents = self.post_content_queryset(request)
-        if self.tags.exists():
-            post_contents = post_contents.filter(post__tags__in=list(self.tags.all()))
-        if self.categories.exists():
-            post_contents = post_contents.filter(post__categories__in=list(self.categories.all()))
-        return self.optimize(post_contents.distinct())[: self.latest_posts]
+        if self.tag_ids:
+            tagged = Post.tags.through.objects.filter(
+                content_type=ContentType.objects.get_for_model(Post), tag_id__in=self.tag_ids
+            )
+            post_contents = post_contents.filter(post__in=tagged.values("object_id"))
+        if self.category_ids:
+            categories = Post.categories.through.objects.filter(blogcategory_id__in=self.category_ids)
+            post_contents = post_contents.filter(post__in=categories.values("post_id"))
+        return post_contents[: self.latest_posts]
 
 
 class AuthorEntriesPlugin(BasePostPlugin):
@@ -744,13 +1502,33 @@ class AuthorEntriesPlugin(BasePostPlugin):
         return self.post_content_queryset(request)
 
     def get_authors(self, request):
-        authors = self.authors.all()
+        """
+        Return the selected authors, each one annotated with the total number of articles (``count``) and the
+        latest ``latest_posts`` articles (``post_contents``).
+
+        Totals are computed with one grouped query, and the latest articles of all the authors are fetched with one
+        query ranking the articles of each author with a ``ROW_NUMBER()`` window function.
+        """
+        authors = list(self.authors.all())
+        if not authors:
+            return authors
+        post_contents = self.get_post_contents(request).filter(post__author__in=[author.pk for author in authors])
+        counts = dict(
+            post_contents.order_by()
+            .values("post__author")
+            .annotate(count=models.Count("pk", distinct=True))
+            .values_list("post__author", "count")
+        )
+        latest = {}
+        if self.latest_posts > 0:
+            ranked = post_contents.annotate(
+                author_rank=Window(RowNumber(), partition_by=F("post__author"), order_by=PostContent._meta.ordering)
+            ).filter(author_rank__lte=self.latest_posts)
+            for post_content in ranked:
+                latest.setdefault(post_content.post.author_id, []).append(post_content)
         for author in authors:
-            qs = self.get_post_contents(request).filter(author=author)
-            # total nb of articles
-            author.count = qs.count()
-            # "the number of author articles to be displayed"
-            author.post_contents = qs[: self.latest_posts]
+            author.count = counts.get(author.pk, 0)
+            author.post_contents = latest.get(author.pk, [])
         return authors
 
 
@@ -764,13 +1542,179 @@ class GenericBlogPlugin(BasePostPlugin):
 
 @receiver(pre_delete, sender=Post)
 def pre_delete_post(sender, instance, **kwargs):
-    for language in instance.get_available_languages():
-        key = instance.get_cache_key(language, "feed")
-        cache.delete(key)
+    if instance.app_config_id:
+        touch_watermark(instance.app_config.namespace)
 
 
 @receiver(post_save, sender=Post)
 def post_save_post(sender, instance, **kwargs):
-    for language in instance.get_available_languages():
-        key = instance.get_cache_key(language, "feed")
-        cache.delete(key)
+    instance._url_cache = {}
+    PostContent._base_manager.filter(post=instance).update(**get_listing_fields(instance))
+    update_post_permalinks([instance])
+    if instance.app_config_id:
+        touch_watermark(instance.app_config.namespace)
+    schedule_instant_articles([instance.pk])
+
+
+@receiver(post_save, sender=PostContent)
+@receiver(post_delete, sender=PostContent)
+def post_save_post_content(sender, instance, **kwargs):
+    _touch_post_content(instance)
+    queue_search_index([instance.pk])
+
+
+@receiver(post_placeholder_operation)
+def post_placeholder_operation_post_content(sender, **kwargs):
+    for key in ("placeholder", "source_placeholder", "target_placeholder"):
+        placeholder = kwargs.get(key)
+        source = getattr(placeholder, "source", None)
+        if isinstance(source, PostContent):
+            _touch_post_content(source)
+            queue_search_index([source.pk])
+            if placeholder.slot == "media":
+                update_media_previews([source])
+
+
+if apps.is_installed("djangocms_versioning"):
+    from djangocms_versioning.signals import post_version_operation
+
+    @receiver(post_version_operation, sender=PostContent)
+    def post_version_operation_post_content(sender, obj, **kwargs):
+        _touch_post_content(obj.content)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+def m2m_changed_post_categories(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            update_post_permalinks([instance])
+    elif action == "pre_clear":
+        instance._cleared_posts = list(instance.blog_posts.values_list("pk", flat=True))
+    elif action == "post_clear":
+        update_post_permalinks(getattr(instance, "_cleared_posts", []))
+    elif action in ("post_add", "post_remove"):
+        update_post_permalinks(pk_set)
+
+
+@receiver(m2m_changed, sender=Post.sites.through)
+def m2m_changed_post_sites(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        instance._blog_cleared_posts = list(sender.objects.filter(site=instance).values_list("post_id", flat=True))
+    elif action.startswith("post_"):
+        if not reverse:
+            instance.all_sites = instance.pk not in update_sites_visibility([instance.pk])
+        elif action == "post_clear":
+            update_sites_visibility(instance.__dict__.pop("_blog_cleared_posts", []))
+        else:
+            update_sites_visibility(pk_set)
+
+
+@receiver(pre_delete, sender=Site)
+def pre_delete_site(sender, instance, **kwargs):
+    # the posts sites are deleted by cascade, without any m2m_changed signal
+    instance._blog_deleted_posts = list(
+        Post.sites.through.objects.filter(site=instance).values_list("post_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Site)
+def post_delete_site(sender, instance, **kwargs):
+    post_ids = instance.__dict__.pop("_blog_deleted_posts", [])
+    if post_ids:
+        update_sites_visibility(post_ids)
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=Post.sites.through)
+@receiver(m2m_changed, sender=Post.tags.through)
+def m2m_changed_post_watermark(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and instance.app_config_id and action.startswith("post_"):
+        touch_watermark(instance.app_config.namespace)
+
+
+@receiver(m2m_changed, sender=LatestPostsPlugin.categories.through)
+@receiver(m2m_changed, sender=LatestPostsPlugin.tags.through)
+def m2m_changed_latest_posts_plugin(sender, instance, action, reverse, pk_set, **kwargs):
+    if isinstance(instance, LatestPostsPlugin):
+        if action.startswith("post_"):
+            instance.update_filter_ids()
+    elif reverse and sender is LatestPostsPlugin.categories.through:
+        if action == "pre_clear":
+            plugins = sender.objects.filter(blogcategory=instance).values_list("latestpostsplugin_id", flat=True)
+            instance._blog_cleared_plugins = list(plugins)
+        elif action.startswith("post_"):
+            plugin_ids = instance.__dict__.pop("_blog_cleared_plugins", []) if action == "post_clear" else pk_set
+            for plugin in LatestPostsPlugin.objects.filter(pk__in=plugin_ids):
+                plugin.update_filter_ids()
+
+
+@receiver(pre_delete, sender=BlogCategory)
+@receiver(pre_delete, sender=LatestPostsPlugin.tags.through.tag_model())
+def pre_delete_latest_posts_plugin_filter(sender, instance, **kwargs):
+    # the plugins relations are deleted by cascade, without any m2m_changed signal
+    if sender is BlogCategory:
+        plugins = LatestPostsPlugin.categories.through.objects.filter(blogcategory=instance)
+        plugin_ids = plugins.values_list("latestpostsplugin_id", flat=True)
+    else:
+        plugins = LatestPostsPlugin.tags.through.objects.filter(
+            tag=instance, content_type=ContentType.objects.get_for_model(LatestPostsPlugin)
+        )
+        plugin_ids = plugins.values_list("object_id", flat=True)
+    instance._blog_filtered_plugins = list(plugin_ids)
+
+
+@receiver(post_delete, sender=BlogCategory)
+@receiver(post_delete, sender=LatestPostsPlugin.tags.through.tag_model())
+def post_delete_latest_posts_plugin_filter(sender, instance, **kwargs):
+    plugin_ids = instance.__dict__.pop("_blog_filtered_plugins", [])
+    for plugin in LatestPostsPlugin.objects.filter(pk__in=plugin_ids):
+        plugin.update_filter_ids()
+
+
+@receiver(post_save, sender=BlogCategory._parler_meta.root_model)
+def post_save_category_translation(sender, instance, **kwargs):
+    url_patterns = [
+        url_pattern
+        for url_pattern, urlconf in get_setting("PERMALINK_URLS").items()
+        if "category" in get_permalink_parameters(urlconf)
+    ]
+    posts = instance.master.blog_posts.filter(app_config__url_patterns__in=url_patterns)
+    update_post_permalinks(posts.values("pk"))
+    if instance.master.app_config_id:
+        touch_watermark(instance.master.app_config.namespace)
+
+
+@receiver(post_save, sender=BlogCategory)
+@receiver(post_delete, sender=BlogCategory)
+def post_save_category(sender, instance, **kwargs):
+    if instance.app_config_id:
+        touch_watermark(instance.app_config.namespace)
+
+
+@receiver(pre_save, sender=BlogConfig)
+def pre_save_blog_config(sender, instance, **kwargs):
+    if instance.pk:
+        old_config = sender.objects.filter(pk=instance.pk).values_list("url_patterns", flat=True)
+        instance._old_url_patterns = old_config.first()
+
+
+@receiver(post_save, sender=BlogConfig)
+def post_save_blog_config(sender, instance, created, **kwargs):
+    if not created and getattr(instance, "_old_url_patterns", instance.url_patterns) != instance.url_patterns:
+        update_post_permalinks(Post.objects.filter(app_config=instance).values("pk"))
+    touch_watermark(instance.namespace)
+
+
+def _rebuild_apphook_permalinks(_ids):
+    ensure_urlconf_is_up_to_date()
+    changed, __ = rebuild_permalinks()
+    if changed:
+        for namespace in BlogConfig.objects.values_list("namespace", flat=True):
+            touch_watermark(namespace)
+
+
+@receiver(urls_need_reloading)
+def urls_need_reloading_permalinks(sender, **kwargs):
+    # the apphook pages urls have changed (page moved, slug or apphook changed): the stored permalinks are rebuilt
+    # in the background worker with the reloaded urlconf
+    transaction.on_commit(lambda: worker.schedule("permalinks", _rebuild_apphook_permalinks))
@@ -0,0 +1,182 @@
+"""
+Keyset (cursor) pagination of the post contents lists, see :ref:`PAGINATION_CURSOR <PAGINATION_CURSOR>`.
+
+Pages are fetched after (or before) the ordering key of the last (or first) post content of the current page, so any
+page costs an index range scan, however deep it is. The ordering key is encoded in an opaque signed token.
+"""
+from django.core import signing
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+
+class CursorPage:
+    """
+    Page of a :py:class:`CursorPaginator`, mimicking the ``django.core.paginator.Page`` API used by the templates.
+
+    ``next_page_number`` and ``previous_page_number`` return the cursors of the adjacent pages; ``number`` is
+    ``None`` as the position of the page is unknown.
+    """
+
+    number = None
+
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage {self.next_cursor or ''}>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    def next_page_number(self):
+        return self.next_cursor
+
+    def previous_page_number(self):
+        return self.previous_cursor
+
+
+class CursorPaginator:
+    """
+    Keyset paginator of a post contents queryset, ordered by pinning priority, publishing date, creation date and
+    primary key.
+
+    :param object_list: post contents queryset
+    :param per_page: number of post contents per page
+    :param count_limit: ``None`` to count all the post contents, ``0`` to skip counting them, ``N`` to count at most
+                        ``N`` post contents (``count_approximate`` is then ``True`` if there are more)
+    """
+
+    #: ordering key fields, as ``(field, descending)``; ``NULL`` values are placed by the database as in the
+    #: default ordering of the post contents, thus the listing index is used
+    keys = (
+        ("listing_pinned", False),
+        ("listing_date_published", True),
+        ("listing_date_created", True),
+        ("pk", False),
+    )
+    salt = "djangocms_blog.pagination"
+
+    def __init__(self, object_list, per_page, count_limit=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.count_limit = count_limit
+
+    def get_ordering(self, backward=False):
+        return [F(field).desc() if descending != backward else F(field).asc() for field, descending in self.keys]
+
+    def is_nullable(self, field):
+        meta = self.object_list.model._meta
+        return (meta.pk if field == "pk" else meta.get_field(field)).null
+
+    def nulls_after(self, descending):
+        """
+        Whether ``NULL`` values come after the other values when sorting in the given direction.
+        """
+        return connections[self.object_list.db].features.nulls_order_largest != descending
+
+    def get_filter(self, values, backward=False):
+        """
+        Return the filter matching the post contents after (or before if ``backward``) the given ordering key.
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            descending = descending != backward
+            if value is None:
+                if not self.nulls_after(descending):
+                    condition |= equal & Q(**{f"{field}__isnull": False})
+                equal &= Q(**{f"{field}__isnull": True})
+            else:
+                strict = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+                if self.is_nullable(field) and self.nulls_after(descending):
+                    strict |= Q(**{f"{field}__isnull": True})
+                condition |= equal & strict
+                equal &= Q(**{field: value})
+        return condition
+
+    def get_values(self, obj):
+        return [getattr(obj, field) for field, _descending in self.keys]
+
+    def encode_cursor(self, obj, backward=False):
+        values = [value.isoformat() if hasattr(value, "isoformat") else value for value in self.get_values(obj)]
+        return signing.dumps([backward, *values], salt=self.salt)
+
+    def decode_cursor(self, cursor):
+        try:
+            backward, pinned, date_published, date_created, pk = signing.loads(cursor, salt=self.salt)
+            return bool(backward), [
+                int(pinned),
+                parse_datetime(date_published) if date_published else None,
+                parse_datetime(date_created) if date_created else None,
+                int(pk),
+            ]
+        except (signing.BadSignature, TypeError, ValueError):
+            raise InvalidPage("Invalid page cursor")
+
+    def page(self, cursor=None):
+        """
+        Return the page starting after the given cursor (the first page if ``None``).
+        """
+        queryset = self.object_list
+        backward = False
+        if cursor:
+            backward, values = self.decode_cursor(cursor)
+            queryset = queryset.filter(self.get_filter(values, backward))
+        object_list = list(queryset.order_by(*self.get_ordering(backward))[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if backward:
+            object_list.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+        if not object_list:
+            return CursorPage(object_list, self)
+        return CursorPage(
+            object_list,
+            self,
+            next_cursor=self.encode_cursor(object_list[-1]) if has_next else None,
+            previous_cursor=self.encode_cursor(object_list[0], backward=True) if has_previous else None,
+        )
+
+    @cached_property
+    def _count(self):
+        if self.count_limit == 0:
+            return None
+        if self.count_limit is None:
+            return self.object_list.count()
+        return self.object_list.order_by()[: self.count_limit + 1].count()
+
+    @property
+    def count(self):
+        """
+        Number of post contents (at most ``count_limit``), ``None`` if not counted.
+        """
+        if self._count is None or self.count_limit is None:
+            return self._count
+        return min(self._count, self.count_limit)
+
+    @property
+    def count_approximate(self):
+        """
+        Whether there are more post contents than :py:attr:`count`.
+        """
+        return bool(self.count_limit) and self._count > self.count_limit
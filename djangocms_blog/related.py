@@ -0,0 +1,169 @@
+"""
+Automatic related posts.
+
+Related posts are computed in bulk by :py:func:`update_related_posts` (see the ``blog_update_related_posts``
+management command) and stored in :py:class:`djangocms_blog.models.RelatedPostScore`. Posts manually selected as
+related are read live and come first, the computed scores fill the remaining slots: showing them only costs one
+indexed query (see :py:func:`get_related_post_contents`).
+"""
+import heapq
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils.timezone import now
+
+from .cms_appconfig import BlogConfig
+from .models import Post, PostContent, RelatedPostScore
+from .settings import get_setting
+
+#: ``use_related`` value selecting the related posts among the posts of the same site
+SITE_RELATED = 2
+
+
+def _get_groups(pairs, posts, max_group_size):
+    """
+    Map each post to its groups (tags or categories) and each group to its most recent ``max_group_size`` posts.
+    """
+    post_groups = defaultdict(set)
+    group_posts = defaultdict(list)
+    for post_id, group_id in pairs:
+        if post_id in posts:
+            post_groups[post_id].add(group_id)
+            group_posts[group_id].append(post_id)
+    for group_id, post_ids in group_posts.items():
+        post_ids.sort(key=lambda post_id: posts[post_id][1], reverse=True)
+        del post_ids[max_group_size:]
+    return post_groups, group_posts
+
+
+def compute_related_posts(namespaces=None, count=None, max_group_size=1000):
+    """
+    Score the related posts of all the posts.
+
+    Each tag and category shared by two posts adds its :ref:`RELATED_POSTS_WEIGHTS <RELATED_POSTS_WEIGHTS>` to
+    their score, which is then decayed by the related post age (see :ref:`RELATED_POSTS_HALF_LIFE
+    <RELATED_POSTS_HALF_LIFE>`). Posts manually selected as related are not scored: they are read live by
+    :py:func:`get_related_post_contents`.
+
+    Candidates are the posts of the same apphook, or the posts sharing a site with the post if the apphook
+    ``use_related`` option is "Yes, from this site".
+
+    Tags and categories are loaded at once; only the most recent ``max_group_size`` posts of each tag or category
+    are candidates, to bound the work for very common tags.
+
+    :param namespaces: only compute the posts of these namespaces (default: all the posts)
+    :param count: number of related posts per post (default: :ref:`RELATED_POSTS_COUNT <RELATED_POSTS_COUNT>`)
+    :param max_group_size: maximum number of candidates per tag or category
+    :return: dictionary of ``[(related post id, score), ...]`` lists by post id, best first
+    """
+    count = count or get_setting("RELATED_POSTS_COUNT")
+    weights = get_setting("RELATED_POSTS_WEIGHTS")
+    half_life = get_setting("RELATED_POSTS_HALF_LIFE")
+    queryset = Post.objects.filter(app_config__isnull=False)
+    posts = {
+        pk: (app_config_id, date_published or date_created)
+        for pk, app_config_id, date_published, date_created in queryset.values_list(
+            "pk", "app_config_id", "date_published", "date_created"
+        )
+    }
+    if namespaces:
+        queryset = queryset.filter(app_config__namespace__in=namespaces)
+    # posts which are not shown on all the sites, and their sites
+    post_sites = defaultdict(set)
+    for post_id, site_id in Post.sites.through.objects.filter(post__all_sites=False).values_list("post_id", "site_id"):
+        post_sites[post_id].add(site_id)
+    site_scoped = {
+        pk for pk, use_related in BlogConfig.objects.values_list("pk", "use_related") if use_related == SITE_RELATED
+    }
+    current = now()
+    decay = {pk: 0.5 ** (max((current - date).days, 0) / half_life) for pk, (_config, date) in posts.items()}
+    tags = Post.tags.through.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+    categories = Post.categories.through.objects.all()
+    groups = [
+        (weights["tags"], *_get_groups(tags.values_list("object_id", "tag_id").iterator(), posts, max_group_size)),
+        (
+            weights["categories"],
+            *_get_groups(categories.values_list("post_id", "blogcategory_id").iterator(), posts, max_group_size),
+        ),
+    ]
+    def is_candidate(pk, candidate, app_config_id):
+        if posts[candidate][0] == app_config_id:
+            return True
+        if app_config_id not in site_scoped:
+            return False
+        sites, candidate_sites = post_sites.get(pk), post_sites.get(candidate)
+        return sites is None or candidate_sites is None or bool(sites & candidate_sites)
+
+    related = {}
+    for pk in queryset.values_list("pk", flat=True):
+        app_config_id = posts[pk][0]
+        scores = defaultdict(float)
+        for weight, post_groups, group_posts in groups:
+            for group_id in post_groups.get(pk, ()):
+                for candidate in group_posts[group_id]:
+                    scores[candidate] += weight
+        scores.pop(pk, None)
+        candidates = (
+            (candidate, score * decay[candidate])
+            for candidate, score in scores.items()
+            if is_candidate(pk, candidate, app_config_id)
+        )
+        related[pk] = heapq.nlargest(count, candidates, key=lambda item: (item[1], posts[item[0]][1], item[0]))
+    return related
+
+
+def update_related_posts(namespaces=None, count=None, batch_size=1000):
+    """
+    Compute and store the related posts of all the posts.
+
+    :param namespaces: only update the posts of these namespaces (default: all the posts)
+    :param count: number of related posts per post (default: :ref:`RELATED_POSTS_COUNT <RELATED_POSTS_COUNT>`)
+    :param batch_size: number of posts updated in each transaction
+    :return: number of updated posts
+    """
+    related = list(compute_related_posts(namespaces, count).items())
+    for start in range(0, len(related), batch_size):
+        batch = related[start : start + batch_size]
+        with transaction.atomic():
+            RelatedPostScore.objects.filter(post__in=[pk for pk, _ranked in batch]).delete()
+            RelatedPostScore.objects.bulk_create(
+                [
+                    RelatedPostScore(post_id=pk, related_id=related_pk, rank=rank, score=score)
+                    for pk, ranked in batch
+                    for rank, (related_pk, score) in enumerate(ranked)
+                ]
+            )
+    return len(related)
+
+
+def get_related_post_contents(post_content, count=None):
+    """
+    Return the contents of the related posts of the given post content, in the same language and best first.
+
+    Posts manually selected as related come first, in their sorting order; the remaining slots are filled with the
+    best scored posts.
+
+    :param post_content: :py:class:`PostContent` instance
+    :param count: maximum number of related posts (default: :ref:`RELATED_POSTS_COUNT <RELATED_POSTS_COUNT>`)
+    :return: post contents queryset
+    """
+    curated = Post.related.through.objects.filter(from_post=post_content.post_id)
+    scores = RelatedPostScore.objects.filter(post=post_content.post_id)
+    post_contents = (
+        PostContent.objects.filter(
+            Q(post__in=curated.values("to_post")) | Q(post__in=scores.values("related")),
+            language=post_content.language,
+        )
+        .exclude(post=post_content.post_id)
+        .on_site()
+        .annotate(
+            curated_order=Subquery(curated.filter(to_post=OuterRef("post")).values("sort_value")[:1]),
+            related_rank=Subquery(scores.filter(related=OuterRef("post")).values("rank")[:1]),
+        )
+        .select_related("post__app_config", "post__author")
+        .prefetch_related("post__categories", "post__categories__translations", "post__categories__app_config")
+        .order_by(F("curated_order").asc(nulls_last=True), "related_rank")
+    )
+    return post_contents[: count or get_setting("RELATED_POSTS_COUNT")]
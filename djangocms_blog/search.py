@@ -0,0 +1,302 @@
+"""
+Full-text search of the blog post contents.
+
+The searchable document of each post content (title, subtitle, abstract, text and plugins text) is stored in
+:py:attr:`djangocms_blog.models.PostContent.search_text` by :py:func:`update_search_index` and matched by the
+search backend of the database (see :ref:`SEARCH_BACKEND <SEARCH_BACKEND>`):
+
+* :py:class:`PostgresSearchBackend`: ``SearchVector`` matched against a GIN expression index;
+* :py:class:`SQLiteSearchBackend`: FTS5 virtual table ranked with ``bm25``;
+* :py:class:`SimpleSearchBackend`: unranked ``icontains`` lookups, used for any other database.
+
+Backend database objects (index, virtual table) are created by the ``djangocms_blog`` migrations.
+
+Changed post contents are not indexed while saving them: they are queued (see
+:py:func:`djangocms_blog.models.queue_search_index`) and indexed in batches by :py:func:`process_search_index_queue`.
+"""
+import re
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from html import unescape
+
+from cms.models import CMSPlugin, Placeholder
+from cms.utils.plugins import downcast_plugins
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router
+from django.db.models import Count, F, FloatField, Func, Min, Value
+from django.db.models.expressions import RawSQL
+from django.utils.encoding import force_str
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+
+from .models import PostContent, SearchIndexUpdate
+from .settings import get_setting
+
+#: default search backend per database vendor
+SEARCH_BACKENDS = {
+    "postgresql": "djangocms_blog.search.PostgresSearchBackend",
+    "sqlite": "djangocms_blog.search.SQLiteSearchBackend",
+}
+
+
+def _get_text(value):
+    return " ".join(unescape(strip_tags(force_str(value or ""))).split())
+
+
+def get_plugin_text(plugin):
+    """
+    Return the searchable text of a (downcasted) plugin, read from the ``search_fields`` of its model or plugin class.
+    """
+    search_fields = getattr(plugin, "search_fields", None) or getattr(plugin.get_plugin_class(), "search_fields", ())
+    return " ".join(filter(None, (_get_text(getattr(plugin, field, "")) for field in search_fields)))
+
+
+def get_search_documents(post_contents):
+    """
+    Build the searchable document of the given post contents.
+
+    Plugins of all the post contents are loaded at once.
+
+    :param post_contents: list of :py:class:`PostContent` instances
+    :return: dictionary of documents by post content id
+    """
+    post_contents = {post_content.pk: post_content for post_content in post_contents}
+    placeholders = dict(
+        Placeholder.objects.filter(
+            content_type=ContentType.objects.get_for_model(PostContent), object_id__in=post_contents
+        ).values_list("pk", "object_id")
+    )
+    plugins_text = defaultdict(list)
+    plugins = CMSPlugin.objects.filter(placeholder__in=placeholders).order_by("placeholder_id", "position")
+    for plugin in downcast_plugins(plugins):
+        post_content = post_contents[placeholders[plugin.placeholder_id]]
+        if plugin.language == post_content.language:
+            plugins_text[post_content.pk].append(get_plugin_text(plugin))
+    return {
+        pk: " ".join(
+            filter(
+                None,
+                (
+                    _get_text(post_content.title),
+                    _get_text(post_content.subtitle),
+                    _get_text(post_content.abstract),
+                    _get_text(post_content.post_text),
+                    *plugins_text[pk],
+                ),
+            )
+        )
+        for pk, post_content in post_contents.items()
+    }
+
+
+class BaseSearchBackend(ABC):
+    """
+    Base class of the search backends.
+
+    :py:meth:`search` must return the matching post contents annotated with ``search_rank`` (higher is better);
+    database objects needed by custom backends must be created by the project migrations.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def update(self, documents):
+        """
+        Index the given documents, :py:attr:`PostContent.search_text` is already updated.
+
+        :param documents: dictionary of documents by post content id
+        """
+
+    def remove(self, pks):
+        """Remove the given post contents from the index."""
+
+    @abstractmethod
+    def search(self, queryset, query):
+        """Filter the post contents matching the query and annotate them with ``search_rank``."""
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Match all the words of the query in the stored documents; results are not ranked.
+    """
+
+    def search(self, queryset, query):
+        for word in query.split():
+            queryset = queryset.filter(search_text__icontains=word)
+        return queryset.annotate(search_rank=Value(1.0, output_field=FloatField()))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL full-text search on a GIN expression index, using the :ref:`SEARCH_POSTGRES_CONFIG
+    <SEARCH_POSTGRES_CONFIG>` text search configuration.
+
+    Queries use the ``websearch_to_tsquery`` syntax (quoted phrases, ``or``, ``-excluded``).
+    """
+
+    @property
+    def config(self):
+        return get_setting("SEARCH_POSTGRES_CONFIG")
+
+    def get_vector(self):
+        from django.contrib.postgres.search import SearchVector
+
+        return SearchVector("search_text", config=self.config)
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        search_query = SearchQuery(query, config=self.config, search_type="websearch")
+        return (
+            queryset.alias(search_vector=self.get_vector())
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(self.get_vector(), search_query))
+        )
+
+
+class BM25Rank(Func):
+    """
+    Rank of the FTS5 match of the given rowid expression, as a correlated subquery.
+    """
+
+    output_field = FloatField()
+
+    def __init__(self, table, match, expression, **extra):
+        self.table = table
+        self.match = match
+        super().__init__(expression, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        rowid, params = compiler.compile(self.get_source_expressions()[0])
+        table = connection.ops.quote_name(self.table)
+        return (
+            f"(SELECT -bm25({table}) FROM {table} WHERE {table} MATCH %s AND {table}.rowid = {rowid})",
+            (self.match, *params),
+        )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 full-text search, the documents are copied in a virtual table whose ``rowid`` is the post content id.
+
+    All the words of the query must match, FTS5 query syntax is not supported.
+    """
+
+    table = "djangocms_blog_postcontent_search"
+
+    def update(self, documents):
+        self.remove(documents)
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.connection.ops.quote_name(self.table)} (rowid, search_text) VALUES (%s, %s)",
+                list(documents.items()),
+            )
+
+    def remove(self, pks):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {self.connection.ops.quote_name(self.table)} WHERE rowid = %s", [(pk,) for pk in pks]
+            )
+
+    def get_match(self, query):
+        """Convert the query in a FTS5 expression matching all the query words."""
+        return " ".join('"%s"' % word for word in re.findall(r"\w+", query))
+
+    def search(self, queryset, query):
+        match = self.get_match(query)
+        if not match:
+            return queryset.none()
+        table = self.connection.ops.quote_name(self.table)
+        matching = RawSQL(f"SELECT rowid FROM {table} WHERE {table} MATCH %s", (match,))
+        rank = BM25Rank(self.table, match, F("pk"))
+        return queryset.filter(pk__in=matching).annotate(search_rank=rank)
+
+
+def get_search_backend(connection=None):
+    """
+    Return the search backend for the given database connection (default: the post contents database).
+    """
+    if connection is None:
+        connection = connections[router.db_for_read(PostContent)]
+    backend = get_setting("SEARCH_BACKEND") or SEARCH_BACKENDS.get(
+        connection.vendor, "djangocms_blog.search.SimpleSearchBackend"
+    )
+    return import_string(backend)(connection)
+
+
+def update_search_index(post_contents):
+    """
+    Rebuild the searchable document of the given post contents and update the search index.
+
+    :param post_contents: list or queryset of :py:class:`PostContent` instances
+    :return: number of indexed post contents
+    """
+    documents = get_search_documents(post_contents)
+    if not documents:
+        return 0
+    PostContent._base_manager.bulk_update(
+        [PostContent(pk=pk, search_text=document) for pk, document in documents.items()], ["search_text"]
+    )
+    get_search_backend().update(documents)
+    return len(documents)
+
+
+def remove_from_search_index(pks):
+    """
+    Remove the given post contents from the search index.
+
+    :param pks: list of post content ids
+    """
+    get_search_backend().remove(pks)
+
+
+def process_search_index_queue(batch_size=500, limit=None):
+    """
+    Update the search index of the post contents queued by :py:func:`djangocms_blog.models.queue_search_index`.
+
+    The queue is processed in batches, oldest updates first; updates queued again while their batch is processed are
+    kept for the next batch.
+
+    :param batch_size: number of post contents indexed at once
+    :param limit: maximum number of post contents to process (default: until the queue is empty)
+    :return: number of processed post contents
+    """
+    processed = 0
+    while limit is None or processed < limit:
+        size = batch_size if limit is None else min(batch_size, limit - processed)
+        updates = list(SearchIndexUpdate.objects.order_by("date_queued", "pk")[:size])
+        if not updates:
+            break
+        ids = [update.post_content_id for update in updates]
+        post_contents = list(PostContent.admin_manager.filter(pk__in=ids).order_by())
+        update_search_index(post_contents)
+        deleted = set(ids) - {post_content.pk for post_content in post_contents}
+        if deleted:
+            remove_from_search_index(deleted)
+        SearchIndexUpdate.objects.filter(
+            pk__in=[update.pk for update in updates], date_queued__lte=max(update.date_queued for update in updates)
+        ).delete()
+        processed += len(updates)
+    return processed
+
+
+def get_search_index_backlog():
+    """
+    Return the number of queued search index updates and the date of the oldest one (``None`` if the queue is empty).
+    """
+    backlog = SearchIndexUpdate.objects.aggregate(count=Count("pk"), oldest=Min("date_queued"))
+    return backlog["count"], backlog["oldest"]
+
+
+def search_post_contents(queryset, query):
+    """
+    Filter the post contents matching the query, best matches first.
+
+    :param queryset: post contents queryset
+    :param query: search query
+    :return: queryset annotated with ``search_rank``
+    """
+    query = query.strip()
+    if not query:
+        return queryset.none()
+    return get_search_backend().search(queryset, query).order_by("-search_rank", *PostContent._meta.ordering)
@@ -115,6 +115,26 @@ BLOG_PAGINATION = 10
 Number of post per page.
 """
 
+BLOG_PAGINATION_CURSOR = False
+"""
+.. _PAGINATION_CURSOR:
+
+Paginate the posts lists (latest, category, tag, author and archive views) by cursor instead of page number.
+
+Each page is fetched after the last post of the previous page, thus deep pages are as fast as the first one; pages
+are not numbered and the ``page`` parameter is an opaque token (see
+:py:class:`djangocms_blog.pagination.CursorPaginator`).
+"""
+
+BLOG_PAGINATION_COUNT_LIMIT = None
+"""
+.. _PAGINATION_COUNT_LIMIT:
+
+Maximum number of posts counted for the posts lists when :ref:`PAGINATION_CURSOR <PAGINATION_CURSOR>` is set:
+``None`` counts all the posts, ``0`` skips counting them, any other value shows an approximate count (``100+``) when
+there are more posts.
+"""
+
 BLOG_LATEST_POSTS = 5
 """
 .. _LATEST_POSTS:
@@ -327,6 +347,33 @@ BLOG_USE_RELATED = True
 Enable related posts to link one post to others.
 """
 
+BLOG_RELATED_POSTS_COUNT = 5
+"""
+.. _RELATED_POSTS_COUNT:
+
+Number of related posts computed for each post by the ``blog_update_related_posts`` management command, and shown
+by default.
+
+Related posts are the posts of the same apphook (or of the same site, if the apphook ``use_related`` option is "Yes,
+from this site") sharing most tags and categories, newer posts first (see :ref:`RELATED_POSTS_HALF_LIFE
+<RELATED_POSTS_HALF_LIFE>`); posts manually selected as related always come first, and the computed posts only fill
+the remaining slots.
+"""
+
+BLOG_RELATED_POSTS_WEIGHTS = {"tags": 1.0, "categories": 2.0}
+"""
+.. _RELATED_POSTS_WEIGHTS:
+
+Score of each tag and category shared by two posts.
+"""
+
+BLOG_RELATED_POSTS_HALF_LIFE = 180
+"""
+.. _RELATED_POSTS_HALF_LIFE:
+
+Age (in days) after which the score of a related post is halved.
+"""
+
 BLOG_MULTISITE = True
 """
 .. _MULTISITE:
@@ -453,7 +500,54 @@ BLOG_ENABLE_SEARCH = True
 """
 .. _ENABLE_SEARCH:
 
-Enable ``aldryn-search`` (i.e.: ``django-haystack``) indexes.
+Enable the full-text search of the posts: the search index is updated when post contents are changed (see
+:ref:`SEARCH_INDEX_WORKER <SEARCH_INDEX_WORKER>`), and the posts search view and admin search use it.
+
+Existing post contents are queued by the migrations: run ``blog_update_search_index`` after upgrading. Until they
+are indexed (or if the search is disabled), the admin search matches the post contents titles.
+"""
+
+BLOG_SEARCH_BACKEND = None
+"""
+.. _SEARCH_BACKEND:
+
+Dotted path of the search backend class (see ``djangocms_blog.search``).
+
+If ``None``, the backend is selected according to the database: PostgreSQL full-text search, SQLite FTS5 or a
+simple ``icontains`` search for any other database. The database objects of the default backends are created by the
+migrations, custom backends must create their own.
+"""
+
+BLOG_SEARCH_INDEX_WORKER = "thread"
+"""
+.. _SEARCH_INDEX_WORKER:
+
+How the queued updates of the search index are processed; changed post contents are queued in the database, and
+only indexed when the queue is processed.
+
+* ``"thread"``: processed by a background thread of the process each time a post content is changed; changes made
+  while the processing is pending are processed together;
+* ``"command"``: processed by the ``blog_update_search_index`` management command, which must be run
+  periodically.
+"""
+
+BLOG_SEARCH_POSTGRES_CONFIG = "simple"
+"""
+.. _SEARCH_POSTGRES_CONFIG:
+
+PostgreSQL text search configuration used to build and query the search index.
+
+The search index is created by the migrations with this configuration: if changed, the ``djangocms_blog_search_gin``
+index must be rebuilt.
+"""
+
+BLOG_CONDITIONAL_GET = True
+"""
+.. _CONDITIONAL_GET:
+
+Enable conditional requests (``ETag`` / ``Last-Modified``) on posts list and detail views and on RSS feeds.
+
+Anonymous requests for unchanged content get a ``304 Not Modified`` response without rendering the page.
 """
 
 BLOG_CURRENT_POST_IDENTIFIER = "djangocms_postcontent_current"
@@ -539,11 +633,57 @@ BLOG_ARCHIVE_PLUGIN_NAME = _("Archive")
 Name of the plugin showing the blog archive index.
 """
 
+BLOG_AGGREGATES_CACHE_TIMEOUT = 3600
+"""
+.. _AGGREGATES_CACHE_TIMEOUT:
+
+Cache timeout for the months list of the **Archive** plugin and the tag cloud of the **Tags** plugin.
+
+Cached values are discarded as soon as posts are changed; set to ``0`` to disable caching.
+"""
+
+BLOG_LATEST_ENTRIES_CACHE_TIMEOUT = 3600
+"""
+.. _LATEST_ENTRIES_CACHE_TIMEOUT:
+
+Cache timeout for the articles of the **Latest Blog Articles - Cache** plugin.
+
+The ids of the articles are cached by plugin, site, language and filters and are discarded as soon as posts are
+changed; set to ``0`` to disable caching. The rendered plugin is also cached by the django CMS placeholder cache.
+"""
+
+BLOG_MEDIA_PARAMS_CACHE_SIZE = 1000
+"""
+.. _MEDIA_PARAMS_CACHE_SIZE:
+
+Maximum number of media information entries (see
+:py:attr:`djangocms_blog.media.base.MediaAttachmentPluginMixin.media_params`) cached in memory by each process; least
+recently used entries are discarded first.
+"""
+
+BLOG_TAGS_PLUGIN_LIMIT = None
+"""
+.. _TAGS_PLUGIN_LIMIT:
+
+Maximum number of tags shown by the **Tags** plugin (most used first); ``None`` shows all the tags.
+"""
+
 BLOG_FEED_CACHE_TIMEOUT = 3600
 """
 .. _FEED_CACHE_TIMEOUT:
 
 Cache timeout for RSS feeds.
+
+Feeds are cached per namespace, language, site and tag, and discarded as soon as the blog content changes;
+streamed feeds (see :ref:`FEED_STREAMING <FEED_STREAMING>`) are not cached.
+"""
+
+BLOG_FEED_STREAMING = False
+"""
+.. _FEED_STREAMING:
+
+Return the RSS feeds as streaming responses: items are written one at a time while they are fetched from the
+database, instead of building the whole feed in memory before responding; streamed feeds are not cached.
 """
 
 BLOG_FEED_INSTANT_ITEMS = 50
@@ -553,6 +693,19 @@ BLOG_FEED_INSTANT_ITEMS = 50
 Number of items in Instant Article feed.
 """
 
+BLOG_INSTANT_ARTICLES_WORKER = "command"
+"""
+.. _INSTANT_ARTICLES_WORKER:
+
+How the HTML of the Instant Article feed items is rendered; the feed only contains the post contents already
+rendered.
+
+* ``"command"``: rendered by the ``blog_render_instant_articles`` management command, which must be run
+  periodically if the Instant Article feed is used;
+* ``"thread"``: rendered by a background thread of the process each time a post is saved; posts saved while the
+  rendering is pending are rendered together.
+"""
+
 BLOG_FEED_LATEST_ITEMS = 10
 """
 .. _FEED_LATEST_ITEMS:
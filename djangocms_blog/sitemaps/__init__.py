@@ -1,51 +1,154 @@
+from collections.abc import Mapping
+
 from cms.utils import get_language_list
 from django.contrib.sitemaps import Sitemap
-from django.urls.exceptions import NoReverseMatch
-from parler.utils.context import smart_override
+from django.db.models import Max
 
-from ..models import Post
+from ..cms_appconfig import BlogConfig
+from ..models import PostContent, get_post_urls
 from ..settings import get_setting
 
 
+class BlogSitemapItems:
+    """
+    Lazy sequence of the sitemap items of a post contents values queryset.
+
+    Items are read one page at a time, and the urls of the post contents without a stored permalink (e.g. on upgraded
+    installations) are computed in bulk for the whole page.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def count(self):
+        return self.queryset.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        items = list(self.queryset[key])
+        missing = {item["pk"]: item for item in items if not item["permalink"]}
+        if missing:
+            post_contents = (
+                PostContent.admin_manager.filter(pk__in=missing)
+                .select_related("post__app_config")
+                .prefetch_related("post__categories__translations")
+            )
+            languages = {}
+            for post_content in post_contents:
+                languages.setdefault(post_content.language, []).append(post_content)
+            for language, batch in languages.items():
+                for post_content, url in zip(batch, get_post_urls(batch, language)):
+                    missing[post_content.pk]["permalink"] = url
+        return [item for item in items if item["permalink"]]
+
+
 class BlogSitemap(Sitemap):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.url_cache = {}
+    """
+    Sitemap of the blog posts.
+
+    Items are plain dictionaries read from the stored post contents permalinks, thus no url is computed
+    and no model instance is created while building the sitemap (but for the post contents without a stored
+    permalink, see :py:class:`BlogSitemapItems`); each page is limited to :py:attr:`limit` urls.
+
+    If ``language`` and / or ``namespace`` are provided, the sitemap is limited to the matching post contents,
+    see :py:class:`BlogSitemapSections` to generate one sitemap section per language and namespace.
+    """
+
+    item_fields = (
+        "pk",
+        "permalink",
+        "post__date_modified",
+        "post__app_config__sitemap_priority",
+        "post__app_config__sitemap_changefreq",
+    )
+
+    def __init__(self, language=None, namespace=None):
+        self.language = language
+        self.namespace = namespace
+
+    def get_queryset(self):
+        post_contents = PostContent.objects.on_site().filter(post__app_config__isnull=False)
+        if self.language:
+            post_contents = post_contents.filter(language=self.language)
+        else:
+            post_contents = post_contents.filter(language__in=get_language_list())
+        if self.namespace:
+            post_contents = post_contents.filter(listing_app_config__namespace=self.namespace)
+        return post_contents
 
     def priority(self, obj):
-        if obj and obj.app_config:
-            return obj.app_config.sitemap_priority
+        if obj and obj["post__app_config__sitemap_priority"] is not None:
+            return obj["post__app_config__sitemap_priority"]
         return get_setting("SITEMAP_PRIORITY_DEFAULT")
 
     def changefreq(self, obj):
-        if obj and obj.app_config:
-            return obj.app_config.sitemap_changefreq
+        if obj and obj["post__app_config__sitemap_changefreq"]:
+            return obj["post__app_config__sitemap_changefreq"]
         return get_setting("SITEMAP_CHANGEFREQ_DEFAULT")
 
     def location(self, obj):
-        with smart_override(obj.get_current_language()):
-            return self.url_cache[obj.get_current_language()][obj]
+        return obj["permalink"]
 
     def items(self):
-        items = []
-        self.url_cache.clear()
-        for lang in get_language_list():
-            self.url_cache[lang] = {}
-            posts = Post.objects.translated(lang).language(lang).published()
-            for post in posts:
-                # check if the post actually has a url before appending
-                # if a post is published but the associated app config is not
-                # then this post will not have a url
-                try:
-                    with smart_override(post.get_current_language()):
-                        self.url_cache[lang][post] = post.get_absolute_url()
-                except NoReverseMatch:
-                    # couldn't determine the url of the post so pass on it
-                    continue
-
-                items.append(post)
-
-        return items
+        return BlogSitemapItems(self.get_queryset().order_by("pk").values(*self.item_fields))
 
     def lastmod(self, obj):
-        return obj.date_modified
+        return obj["post__date_modified"]
+
+    def get_latest_lastmod(self):
+        return self.get_queryset().aggregate(lastmod=Max("post__date_modified"))["lastmod"]
+
+
+class BlogSitemapSections(Mapping):
+    """
+    Lazy mapping of one :py:class:`BlogSitemap` per language and namespace, suitable for the django sitemap
+    ``index`` and ``sitemap`` views:
+
+    .. code-block:: python
+
+        from django.contrib.sitemaps import views as sitemaps_views
+
+        sitemaps = BlogSitemapSections()
+
+        urlpatterns = [
+            path("sitemap.xml", sitemaps_views.index, {"sitemaps": sitemaps}),
+            path(
+                "sitemap-<section>.xml",
+                sitemaps_views.sitemap,
+                {"sitemaps": sitemaps},
+                name="django.contrib.sitemaps.views.sitemap",
+            ),
+        ]
+
+    Sections are computed on access, as namespaces are stored in the database.
+    """
+
+    def __init__(self, prefix="blog"):
+        self.prefix = prefix
+
+    def _get_sections(self):
+        namespaces = BlogConfig.objects.order_by("namespace").values_list("namespace", flat=True)
+        return {
+            f"{self.prefix}-{namespace}-{language}": BlogSitemap(language=language, namespace=namespace)
+            for namespace in namespaces
+            for language in get_language_list()
+        }
+
+    def __getitem__(self, key):
+        return self._get_sections()[key]
+
+    def __iter__(self):
+        return iter(self._get_sections())
+
+    def __len__(self):
+        return len(self._get_sections())
+
+    def items(self):
+        return self._get_sections().items()
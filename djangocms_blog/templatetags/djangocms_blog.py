@@ -8,6 +8,7 @@ from cms.utils.urlutils import admin_reverse
 from django import template
 
 from djangocms_blog.models import PostContent
+from djangocms_blog.related import get_related_post_contents
 
 register = template.Library()
 
@@ -32,7 +33,7 @@ def media_plugins(context, post_content):
     :return: list of :py:class:`djangocms_blog.media.base.MediaAttachmentPluginMixin` plugins
     :rtype: List[djangocms_blog.media.base.MediaAttachmentPluginMixin]
     """
-    if post_content and post_content.media and post_content.media.get_plugins().exists():
+    if post_content and post_content.media:
         return get_plugins(context["request"], post_content.media, None)
     return []
 
@@ -47,6 +48,10 @@ def media_images(context, post_content, main=True):
     Support ``djangocms-video`` ``poster`` field in case the plugin
     does not implement ``MediaAttachmentPluginMixin`` API.
 
+    Images are computed once and stored on the post content until the
+    ``media`` placeholder is changed, see
+    :py:meth:`djangocms_blog.models.PostContent.get_media_previews`.
+
     Usage:
 
     .. code-block: python
@@ -68,23 +73,34 @@ def media_images(context, post_content, main=True):
     :return: list of images urls
     :rtype: list
     """
-    plugins = media_plugins(context, post_content)
-    if main:
-        image_method = "get_main_image"
-    else:
-        image_method = "get_thumb_image"
-    images = []
-    for plugin in plugins:
-        try:
-            images.append(getattr(plugin, image_method)())
-        except Exception:
-            try:
-                image = plugin.poster
-                if image:
-                    images.append(image.url)
-            except AttributeError:
-                pass
-    return images
+    if not post_content:
+        return []
+    return post_content.get_media_previews(main)
+
+
+@register.simple_tag(name="related_posts")
+def related_posts(post_content, count=None):
+    """
+    Return the contents of the posts related to the provided post content, computed by the
+    ``blog_update_related_posts`` management command.
+
+    Usage:
+
+    .. code-block: python
+
+        {% related_posts post_content 3 as related %}
+        {% for related_content in related %}{{ related_content.title }}{% endfor %}
+
+    :param post_content: post content instance
+    :type post_content: :py:class:`djangocms_blog.models.PostContent`
+    :param count: maximum number of related posts
+    :type count: int
+    :return: list of related post contents, best first
+    :rtype: List[djangocms_blog.models.PostContent]
+    """
+    if not post_content:
+        return []
+    return list(get_related_post_contents(post_content, count))
 
 
 class GetAbsoluteUrl(AsTag):
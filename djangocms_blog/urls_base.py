@@ -9,6 +9,7 @@ from .views import (
     PostArchiveView,
     PostDetailView,
     PostListView,
+    PostSearchView,
     TaggedListView,
 )
 
@@ -20,6 +21,7 @@ def get_urls(post_list_path, category_path, category_list_path):
         path(category_list_path + "<str:category>/", CategoryEntriesView.as_view(), name="posts-category"),
         path("feed/", LatestEntriesFeed(), name="posts-latest-feed"),
         path("feed/fb/", FBInstantArticles(), name="posts-latest-feed-fb"),
+        path("search/", PostSearchView.as_view(), name="posts-search"),
         path("<int:year>/", PostArchiveView.as_view(), name="posts-archive"),
         path("<int:year>/<int:month>/", PostArchiveView.as_view(), name="posts-archive"),
         path("author/<str:username>/", AuthorEntriesView.as_view(), name="posts-author"),
@@ -3,16 +3,22 @@ import os.path
 from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ImproperlyConfigured
+from django.core.paginator import InvalidPage
 from django.http import Http404
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django.utils.timezone import now
 from django.utils.translation import get_language
 from django.views.generic import DetailView, ListView
 from parler.views import TranslatableSlugMixin, ViewUrlMixin
 
 from .cms_appconfig import get_app_instance
-from .models import BlogCategory, PostContent
+from .models import BlogCategory, PostContent, fill_media_previews, get_post_urls, get_watermark
+from .pagination import CursorPaginator
+from .related import get_related_post_contents
+from .search import search_post_contents
 from .settings import get_setting
 
 User = get_user_model()
@@ -34,7 +40,41 @@ class BlogConfigMixin:
         return super().render_to_response(context, **response_kwargs)
 
 
-class PostDetailView(BlogConfigMixin, DetailView):
+class ConditionalGetMixin:
+    """
+    Answer conditional requests before querying the posts, using the namespace / language watermark
+    (see :py:func:`djangocms_blog.models.get_watermark`) as ``ETag`` and ``Last-Modified``.
+
+    Only anonymous requests are handled, as the response for authenticated users depends on the user itself.
+    """
+
+    conditional_get = True
+
+    def use_conditional_get(self):
+        user = getattr(self.request, "user", None)
+        return (
+            self.conditional_get
+            and get_setting("CONDITIONAL_GET")
+            and self.namespace
+            and not (user and user.is_authenticated)
+        )
+
+    def get(self, request, *args, **kwargs):
+        if not self.use_conditional_get():
+            return super().get(request, *args, **kwargs)
+        watermark = get_watermark(self.namespace, get_language())
+        etag = "W/%s" % quote_etag(f"{self.namespace}-{get_language()}-{watermark:f}")
+        last_modified = int(watermark)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code == 200:
+                response.headers.setdefault("ETag", etag)
+                response.headers.setdefault("Last-Modified", http_date(last_modified))
+        return response
+
+
+class PostDetailView(ConditionalGetMixin, BlogConfigMixin, DetailView):
     model = PostContent
     context_object_name = "post_content"
     base_template_name = "post_detail.html"
@@ -80,12 +120,18 @@ class PostDetailView(BlogConfigMixin, DetailView):
         context["meta"] = self.get_object().as_meta()
         context["instant_article"] = self.instant_article
         context["use_placeholder"] = get_setting("USE_PLACEHOLDER")
+        if self.object.post.app_config and self.object.post.app_config.use_related:
+            context["related_post_contents"] = list(get_related_post_contents(self.object))
+            get_post_urls(context["related_post_contents"])
+            fill_media_previews(context["related_post_contents"])
         return context
 
 
 class ToolbarDetailView(PostDetailView):
     """Mimics DetailView but takes content object from render function"""
 
+    conditional_get = False
+
     def get_object(self):
         content_object = self.args[0]
         self.request.current_app = content_object.post.app_config.namespace
@@ -93,7 +139,10 @@ class ToolbarDetailView(PostDetailView):
         return content_object
 
 
-class BaseConfigListViewMixin(BlogConfigMixin):
+class BaseConfigListViewMixin(ConditionalGetMixin, BlogConfigMixin):
+    #: use the cursor pagination if enabled, results must be in the post contents ordering
+    cursor_pagination = True
+
     def optimize(self, qs):
         """
         Apply select_related / prefetch_related to optimize the view queries
@@ -119,7 +168,7 @@ class BaseConfigListViewMixin(BlogConfigMixin):
             queryset = self.model.admin_manager.latest_content()
         else:
             queryset = self.model.objects.all()
-        queryset = queryset.filter(language=language, post__app_config__namespace=self.namespace)
+        queryset = queryset.filter(language=language, listing_app_config__namespace=self.namespace)
         setattr(self.request, get_setting("CURRENT_NAMESPACE"), self.config)
         return self.optimize(queryset.on_site())
 
@@ -130,11 +179,28 @@ class BaseConfigListViewMixin(BlogConfigMixin):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["TRUNCWORDS_COUNT"] = get_setting("POSTS_LIST_TRUNCWORDS_COUNT")
+        # resolve the urls and media previews of the whole page at once
+        get_post_urls(context["object_list"])
+        fill_media_previews(context["object_list"])
         return context
 
     def get_paginate_by(self, queryset):
         return (self.config and self.config.paginate_by) or get_setting("PAGINATION")
 
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginate the queryset with a :py:class:`djangocms_blog.pagination.CursorPaginator` if
+        :ref:`PAGINATION_CURSOR <PAGINATION_CURSOR>` is set: the ``page`` parameter is then an opaque cursor.
+        """
+        if not (self.cursor_pagination and get_setting("PAGINATION_CURSOR")):
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size, count_limit=get_setting("PAGINATION_COUNT_LIMIT"))
+        try:
+            page = paginator.page(self.request.GET.get(self.page_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
 
 class PostListView(BaseConfigListViewMixin, ListView):
     model = PostContent
@@ -169,7 +235,7 @@ class PostArchiveView(BaseConfigListViewMixin, ListView):
     model = PostContent
     context_object_name = "postcontent_list"
     base_template_name = "post_list.html"
-    date_field = "date_published"
+    date_field = "listing_date_published"
     allow_empty = True
     allow_future = True
     view_url_name = "djangocms_blog:posts-archive"
@@ -199,7 +265,7 @@ class TaggedListView(BaseConfigListViewMixin, ListView):
 
     def get_queryset(self):
         qs = super().get_queryset()
-        return self.optimize(qs.filter(tags__slug=self.kwargs["tag"]))
+        return self.optimize(qs.filter(post__tags__slug=self.kwargs["tag"]))
 
     def get_context_data(self, **kwargs):
         kwargs["tagged_entries"] = self.kwargs.get("tag") if "tag" in self.kwargs else None
@@ -254,3 +320,32 @@ class CategoryEntriesView(BaseConfigListViewMixin, ListView):
         context = super().get_context_data(**kwargs)
         context["meta"] = self.category.as_meta()
         return context
+
+
+class PostSearchView(BaseConfigListViewMixin, ListView):
+    """
+    Post contents matching the ``q`` query string parameter, best matches first.
+    """
+
+    model = PostContent
+    context_object_name = "postcontent_list"
+    base_template_name = "post_list.html"
+    view_url_name = "djangocms_blog:posts-search"
+    query_kwarg = "q"
+    # results depend on the search index, which is not tracked by the watermark
+    conditional_get = False
+    # results are ordered by rank
+    cursor_pagination = False
+
+    def get_search_query(self):
+        return self.request.GET.get(self.query_kwarg, "").strip()
+
+    def get_queryset(self):
+        if not get_setting("ENABLE_SEARCH"):
+            raise Http404
+        return search_post_contents(super().get_queryset(), self.get_search_query())
+
+    def get_context_data(self, **kwargs):
+        kwargs["search_query"] = self.get_search_query()
+        context = super().get_context_data(**kwargs)
+        return context
@@ -0,0 +1,64 @@
+"""
+Background worker running the blog deferred tasks (instant articles rendering, search index updates).
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Process wide worker running the queued tasks one at a time in a single thread.
+
+    Tasks are queued by name with the ids they apply to: a task queued again while it is still pending is coalesced
+    with the pending one, thus a burst of saves runs it once. The thread is started on demand and stops once the queue
+    is empty; it is not a daemon thread, so pending tasks are completed before the process exits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks = OrderedDict()
+        self._thread = None
+
+    def schedule(self, name, func, ids=()):
+        """
+        Queue a task, starting the worker thread if needed.
+
+        :param name: task name, pending tasks with the same name are run once
+        :param func: callable run with the set of the ids of all the coalesced tasks
+        :param ids: ids the task applies to
+        """
+        with self._lock:
+            _func, pending = self._tasks.setdefault(name, (func, set()))
+            pending.update(ids)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="djangocms-blog-worker")
+                self._thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the queued tasks to be completed."""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._tasks:
+                        self._thread = None
+                        return
+                    name, (func, ids) = self._tasks.popitem(last=False)
+                try:
+                    func(ids)
+                except Exception:
+                    logger.exception("Blog background task %s failed", name)
+        finally:
+            connections.close_all()
+
+
+worker = BackgroundWorker()
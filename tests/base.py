@@ -9,7 +9,6 @@ from menus.menu_pool import menu_pool
 from parler.utils.context import smart_override
 
 from djangocms_blog.cms_appconfig import BlogConfig
-from djangocms_blog.cms_menus import BlogCategoryMenu, BlogNavModifier
 from djangocms_blog.models import BlogCategory, Post, ThumbnailOption, PostContent
 from tests.base_test import BaseTestCase
 
@@ -268,8 +267,6 @@ class BaseTest(BaseTestCase):
 
     def _reset_menus(self):
         cache.clear()
-        BlogCategoryMenu._config = {}
-        BlogNavModifier._config = {}
 
     def _reload_menus(self):
         menu_pool.clear(all=True)
@@ -0,0 +1,226 @@
+import json
+import os
+import statistics
+import time
+
+from cms.api import add_plugin
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.template import RequestContext
+from django.template.loader import get_template
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils.timezone import now
+from menus.menu_pool import menu_pool
+from parler.utils.context import smart_override
+
+from djangocms_blog.cms_appconfig import BlogConfig
+from djangocms_blog.cms_menus import BlogCategoryMenu
+from djangocms_blog.feeds import LatestEntriesFeed, TagFeed
+from djangocms_blog.models import BlogCategory, Post, PostContent
+from djangocms_blog.settings import MENU_TYPE_COMPLETE
+from djangocms_blog.sitemaps import BlogSitemap
+from tests.base import BaseTest
+
+BENCHMARK_POSTS = int(os.environ.get("BLOG_BENCHMARK_POSTS", 20))
+BENCHMARK_RUNS = int(os.environ.get("BLOG_BENCHMARK_RUNS", 5))
+BENCHMARK_REPORT = os.environ.get("BLOG_BENCHMARK_REPORT", "")
+
+
+class BenchmarkTest(BaseTest):
+    """
+    Query count budget and timing of the blog public surfaces.
+
+    Each surface is rendered ``BLOG_BENCHMARK_RUNS`` times with an empty cache against ``BLOG_BENCHMARK_POSTS``
+    posts: the test fails if the number of queries exceeds the surface budget, which must not depend on the number
+    of posts. Query counts and latency percentiles are written to ``BLOG_BENCHMARK_REPORT`` (if set) as JSON.
+    """
+
+    results = {}
+
+    #: maximum number of queries per surface, cache is empty
+    budgets = {
+        "view-list": 17,
+        "view-category": 18,
+        "view-tag": 16,
+        "view-author": 15,
+        "view-archive": 14,
+        "view-detail": 35,
+        "feed-latest": 4,
+        "feed-latest-streaming": 5,
+        "feed-tag": 4,
+        "sitemap": 2,
+        "menu": 7,
+        "plugin-BlogLatestEntriesPlugin": 6,
+        "plugin-BlogLatestEntriesPluginCached": 6,
+        "plugin-BlogAuthorPostsPlugin": 6,
+        "plugin-BlogAuthorPostsListPlugin": 6,
+        "plugin-BlogTagsPlugin": 3,
+        "plugin-BlogCategoryPlugin": 21,
+        "plugin-BlogArchivePlugin": 3,
+    }
+
+    @classmethod
+    def tearDownClass(cls):
+        if BENCHMARK_REPORT and cls.results:
+            with open(BENCHMARK_REPORT, "w") as report:
+                json.dump(cls.results, report, indent=2, sort_keys=True)
+        super().tearDownClass()
+
+    def seed(self):
+        """Create posts in two languages with categories, tags and sites."""
+        self.pages = self.get_pages()
+        categories = [self.category_1]
+        for index in range(4):
+            parent = categories[index // 2] if index else None
+            category = BlogCategory.objects.create(
+                name=f"benchmark category {index}", parent=parent, app_config=self.app_config_1
+            )
+            category.set_current_language("it", initialize=True)
+            category.name = f"categoria benchmark {index}"
+            category.save()
+            categories.append(category)
+        for index in range(BENCHMARK_POSTS):
+            post = Post.objects.create(
+                author=self.user, app_config=self.app_config_1, date_published=now(), main_image=None
+            )
+            for language in ("en", "it"):
+                PostContent.objects.create(
+                    post=post,
+                    language=language,
+                    title=f"Benchmark post {index} {language}",
+                    abstract=f"<p>abstract {index}</p>",
+                    post_text=f"<p>text {index}</p>",
+                )
+            post.categories.add(categories[index % len(categories)], categories[(index + 1) % len(categories)])
+            post.tags.add(f"tag {index % 5}", f"tag {index % 3}")
+            if index % 4 == 0:
+                post.sites.add(self.site_1)
+            elif index % 4 == 1:
+                post.sites.add(self.site_2)
+        self.categories = categories
+        self.post_content = PostContent.objects.filter(language="en").on_site().order_by("pk").first()
+
+    def measure(self, name, func):
+        """Run ``func`` with an empty cache and check its number of queries against the surface budget."""
+        queries = []
+        timings = []
+        for _run in range(BENCHMARK_RUNS):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            queries.append(len(context.captured_queries))
+        percentiles = statistics.quantiles(timings, n=20, method="inclusive") if len(timings) > 1 else timings * 19
+        self.results[name] = {
+            "posts": BENCHMARK_POSTS,
+            "queries": max(queries),
+            "p50": statistics.median(timings),
+            "p95": percentiles[18],
+            "max": max(timings),
+        }
+        captured = "\n".join(query["sql"] for query in context.captured_queries)
+        self.assertLessEqual(
+            max(queries), self.budgets[name], f"{name} query budget exceeded ({max(queries)}):\n{captured}"
+        )
+
+    def render_view(self, path, lang="en"):
+        request = self.get_request(self.pages[1], lang, AnonymousUser(), path=path)
+        match = resolve(path)
+        response = match.func(request, *match.args, **match.kwargs)
+        if hasattr(response, "render"):
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def render_plugin(self, plugin_type, authors=None, **data):
+        plugin = add_plugin(self.get_placeholder(), plugin_type, language="en", app_config=self.app_config_1, **data)
+        if authors:
+            plugin.authors.set(authors)
+        plugin_class = plugin.get_plugin_class_instance()
+        request = self.get_request(self.pages[1], "en", AnonymousUser())
+
+        def render():
+            context = RequestContext(request, {"request": request})
+            context = plugin_class.render(context, plugin, None)
+            template = plugin_class.get_render_template(context, plugin, None)
+            get_template(template).render(context.flatten(), request)
+
+        return render
+
+    def get_placeholder(self):
+        return self.post_content.placeholders.get_or_create(slot="content")[0]
+
+    def test_views(self):
+        self.seed()
+        tag = self.post_content.post.tags.first()
+        category = self.post_content.post.categories.first()
+        date = self.post_content.post.date_published
+        with smart_override("en"):
+            surfaces = {
+                "view-list": reverse("sample_app:posts-latest"),
+                "view-category": reverse("sample_app:posts-category", kwargs={"category": category.slug}),
+                "view-tag": reverse("sample_app:posts-tagged", kwargs={"tag": tag.slug}),
+                "view-author": reverse("sample_app:posts-author", kwargs={"username": self.user.get_username()}),
+                "view-archive": reverse("sample_app:posts-archive", kwargs={"year": date.year, "month": date.month}),
+                "view-detail": self.post_content.get_absolute_url(),
+            }
+            for name, path in surfaces.items():
+                with self.subTest(surface=name):
+                    self.measure(name, lambda path=path: self.render_view(path))
+
+    def test_feeds(self):
+        self.seed()
+        tag = self.post_content.post.tags.first()
+        streaming_feed = LatestEntriesFeed()
+        streaming_feed.streaming = True
+        with smart_override("en"):
+            tag_path = reverse("sample_app:posts-tagged-feed", kwargs={"tag": tag.slug})
+            surfaces = {
+                "feed-latest": (LatestEntriesFeed(), reverse("sample_app:posts-latest-feed"), {}),
+                "feed-latest-streaming": (streaming_feed, reverse("sample_app:posts-latest-feed"), {}),
+                "feed-tag": (TagFeed(), tag_path, {"tag": tag.slug}),
+            }
+            for name, (feed, path, kwargs) in surfaces.items():
+                with self.subTest(surface=name):
+                    request = self.get_request(self.pages[1], "en", AnonymousUser(), path=path)
+
+                    def render(feed=feed, request=request, kwargs=kwargs):
+                        response = feed(request, **kwargs)
+                        return b"".join(response) if response.streaming else response.content
+
+                    self.measure(name, render)
+
+    def test_sitemap(self):
+        self.seed()
+        sitemap = BlogSitemap(language="en", namespace="sample_app")
+        self.measure("sitemap", lambda: sitemap.get_urls(site=self.site_1, protocol="http"))
+
+    def test_menu(self):
+        self.seed()
+        BlogConfig.objects.filter(pk=self.app_config_1.pk).update(menu_structure=MENU_TYPE_COMPLETE)
+        request = self.get_request(self.pages[1], "en")
+        menu = BlogCategoryMenu(menu_pool.get_renderer(request))
+        menu.instance = self.pages[1]
+
+        with smart_override("en"):
+            self.measure("menu", lambda: menu.get_nodes(request))
+
+    def test_plugins(self):
+        self.seed()
+        surfaces = {
+            "BlogLatestEntriesPlugin": {"latest_posts": 5},
+            "BlogLatestEntriesPluginCached": {"latest_posts": 5},
+            "BlogAuthorPostsPlugin": {"authors": [self.user, self.user_staff]},
+            "BlogAuthorPostsListPlugin": {"authors": [self.user, self.user_staff], "latest_posts": 5},
+            "BlogTagsPlugin": {},
+            "BlogCategoryPlugin": {},
+            "BlogArchivePlugin": {},
+        }
+        with smart_override("en"):
+            for plugin_type, data in surfaces.items():
+                with self.subTest(surface=plugin_type):
+                    render = self.render_plugin(plugin_type, **data)
+                    self.measure(f"plugin-{plugin_type}", render)
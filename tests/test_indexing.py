@@ -1,9 +1,29 @@
+from importlib import import_module
+from io import StringIO
 from unittest import skipIf
+from unittest.mock import ANY, patch
 
 from cms.api import add_plugin
-from django.test import override_settings
+from django.apps import apps as django_apps
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.http import Http404
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from parler.utils.context import smart_override
 
-from djangocms_blog.models import Post
+from djangocms_blog.models import Post, PostContent, SearchIndexUpdate
+from djangocms_blog.search import (
+    BaseSearchBackend,
+    get_search_backend,
+    get_search_index_backlog,
+    process_search_index_queue,
+    search_post_contents,
+    update_search_index,
+)
+from djangocms_blog.views import PostSearchView
 
 from tests.base import BaseTest
 
@@ -75,3 +95,159 @@ class BlogIndexingTests(BaseTest):
         posts = self.get_posts()
         all_results = SearchQuerySet().models(Post)
         self.assertEqual(len(posts), len(all_results))
+
+
+class SearchTest(BaseTest):
+    def test_search_index(self):
+        posts = self.get_posts()
+        process_search_index_queue()
+        post_content = posts[0].postcontent_set.get(language="en")
+        add_plugin(post_content.content, "TextPlugin", language="en", body="<p>A searchable &amp; unique body</p>")
+        self.assertEqual(update_search_index([post_content]), 1)
+        post_content.refresh_from_db()
+        self.assertEqual(post_content.search_text, "First post first line A searchable & unique body")
+
+        post_contents = PostContent.objects.filter(language="en")
+        self.assertEqual(list(search_post_contents(post_contents, "UNIQUE")), [post_content])
+        results = list(search_post_contents(post_contents, "first line"))
+        self.assertEqual(results[0], post_content)
+        self.assertGreater(len(results), 1)
+        self.assertEqual([result.search_rank for result in results], sorted(r.search_rank for r in results)[::-1])
+        self.assertEqual(list(search_post_contents(post_contents, "  ")), [])
+        self.assertEqual(list(search_post_contents(post_contents, '"unique (*')), [post_content])
+        self.assertEqual(list(search_post_contents(post_contents, "unique missing")), [])
+
+        # changed post contents are indexed when the queue is processed
+        post_content.title = "Renamed post"
+        post_content.save()
+        self.assertEqual(list(search_post_contents(post_contents, "renamed")), [])
+        self.assertEqual(process_search_index_queue(), 1)
+        self.assertEqual(list(search_post_contents(post_contents, "renamed")), [post_content])
+        with override_settings(BLOG_ENABLE_SEARCH=False):
+            post_content.title = "Untracked post"
+            post_content.save()
+        self.assertEqual(process_search_index_queue(), 0)
+        self.assertEqual(list(search_post_contents(post_contents, "untracked")), [])
+        call_command("blog_rebuild_search_index", stdout=StringIO())
+        self.assertEqual(list(search_post_contents(post_contents, "untracked")), [post_content])
+
+        # deleted post contents are removed from the index
+        italian = posts[0].postcontent_set.get(language="it")
+        italian_pk = italian.pk
+        if connection.vendor == "sqlite":
+            query = f"SELECT rowid FROM {get_search_backend().table} WHERE rowid = %s"
+            with connection.cursor() as cursor:
+                cursor.execute(query, [italian_pk])
+                self.assertEqual(cursor.fetchall(), [(italian_pk,)])
+                italian.delete()
+                self.assertEqual(process_search_index_queue(), 1)
+                cursor.execute(query, [italian_pk])
+                self.assertEqual(cursor.fetchall(), [])
+
+    def test_search_backend_abstract(self):
+        class IncompleteSearchBackend(BaseSearchBackend):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSearchBackend(connection)
+        self.assertIsInstance(get_search_backend(), BaseSearchBackend)
+
+    def test_search_index_queue(self):
+        posts = self.get_posts()
+        process_search_index_queue()
+        post_contents = list(PostContent.objects.filter(post__in=posts[:2]).order_by("pk"))
+
+        # updates are processed after commit, unless left to the management command
+        with self.captureOnCommitCallbacks() as callbacks:
+            post_contents[0].save()
+        self.assertEqual(len(callbacks), 1)
+        # processed by the shared background worker
+        with patch("djangocms_blog.models.worker.schedule") as schedule:
+            callbacks[0]()
+        schedule.assert_called_once_with("search-index", ANY)
+        with override_settings(BLOG_SEARCH_INDEX_WORKER="command"):
+            with self.captureOnCommitCallbacks() as callbacks:
+                for post_content in post_contents:
+                    post_content.save()
+            self.assertEqual(callbacks, [])
+        # repeated updates are coalesced
+        self.assertEqual(SearchIndexUpdate.objects.count(), len(post_contents))
+        self.assertEqual(get_search_index_backlog()[0], len(post_contents))
+
+        out = StringIO()
+        call_command("blog_update_search_index", "--backlog", stdout=out)
+        self.assertTrue(out.getvalue().startswith(f"{len(post_contents)} pending updates"))
+
+        # queue, post contents, placeholders, document, index (delete and insert), processed updates
+        with self.assertNumQueries(14):
+            self.assertEqual(process_search_index_queue(batch_size=1, limit=2), 2)
+        self.assertEqual(SearchIndexUpdate.objects.count(), len(post_contents) - 2)
+
+        out = StringIO()
+        call_command("blog_update_search_index", stdout=out)
+        self.assertEqual(
+            out.getvalue().splitlines(), [f"{len(post_contents) - 2} post contents indexed", "0 pending updates"]
+        )
+        self.assertEqual(get_search_index_backlog(), (0, None))
+
+    def test_search_view(self):
+        pages = self.get_pages()
+        posts = self.get_posts()
+        process_search_index_queue()
+        post_content = posts[0].postcontent_set.get(language="en")
+
+        with smart_override("en"):
+            path = reverse("sample_app:posts-search")
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=f"{path}?q=first+line")
+            response = PostSearchView.as_view()(request)
+            self.assertEqual(response.context_data["search_query"], "first line")
+            self.assertEqual(response.context_data["postcontent_list"][0], post_content)
+            response.render()
+            self.assertContains(response, "Search &ndash; first line")
+            self.assertContains(response, post_content.title)
+
+            with override_settings(BLOG_ENABLE_SEARCH=False):
+                with self.assertRaises(Http404):
+                    PostSearchView.as_view()(request)
+
+    def test_admin_search(self):
+        posts = self.get_posts()
+        process_search_index_queue()
+        post_admin = admin.site._registry[Post]
+        request = RequestFactory().get("/", {"q": "first line"})
+        request.user = self.user
+
+        queryset, may_have_duplicates = post_admin.get_search_results(request, Post.objects.all(), "first line")
+        self.assertFalse(may_have_duplicates)
+        results = list(queryset.order_by(*post_admin.get_ordering(request)))
+        self.assertEqual(results[0], posts[0])
+        self.assertNotIn(posts[3], results[:1])
+        self.assertTrue(all(post.search_rank for post in results))
+        self.assertEqual(post_admin.get_search_results(request, Post.objects.all(), "")[0].count(), len(posts))
+        self.assertEqual(post_admin.get_ordering(RequestFactory().get("/")), post_admin.ordering or ())
+        self.assertEqual(post_admin.get_ordering(request), ("-search_rank", *Post._meta.ordering))
+
+        # contents not indexed yet are matched on their title
+        PostContent.admin_manager.filter(post=posts[3]).update(title="Unindexed post", search_text="")
+        queryset = post_admin.get_search_results(request, Post.objects.all(), "unindexed")[0]
+        self.assertEqual([(post, post.search_rank) for post in queryset], [(posts[3], 0.0)])
+
+        # the title is searched when the search is disabled
+        with override_settings(BLOG_ENABLE_SEARCH=False):
+            queryset = post_admin.get_search_results(request, Post.objects.all(), "first post")[0]
+            self.assertEqual(list(queryset), [posts[0]])
+            self.assertEqual({post.search_rank for post in queryset}, {0.0})
+
+    def test_queue_search_index_migration(self):
+        posts = self.get_posts()
+        process_search_index_queue()
+        PostContent.admin_manager.filter(post=posts[0]).update(search_text="")
+        migration = import_module("djangocms_blog.migrations.0059_queue_search_index")
+
+        migration.queue_search_index(django_apps, connection.schema_editor())
+        pending = set(PostContent.admin_manager.filter(post=posts[0]).values_list("pk", flat=True))
+        self.assertEqual(set(SearchIndexUpdate.objects.values_list("post_content_id", flat=True)), pending)
+        # already queued contents are not queued twice
+        migration.queue_search_index(django_apps, connection.schema_editor())
+        self.assertEqual(SearchIndexUpdate.objects.count(), len(pending))
+        self.assertEqual(process_search_index_queue(), len(pending))
@@ -2,7 +2,11 @@ import os
 from unittest.mock import MagicMock, patch
 
 from cms.api import add_plugin
+from cms.signals import post_placeholder_operation
+from django.test import override_settings
 
+from djangocms_blog.media.base import media_params_cache, resolve_media_params
+from djangocms_blog.models import PostContent
 from djangocms_blog.templatetags.djangocms_blog import media_images, media_plugins
 
 from tests.base import BaseTest
@@ -11,9 +15,10 @@ from tests.base import BaseTest
 class MediaTest(BaseTest):
     def setUp(self):
         super().setUp()
+        media_params_cache.clear()
         self.get_pages()
         posts = self.get_posts()
-        self.post = posts[0]
+        self.post = posts[0].postcontent_set.get(language="en")
         self.youtube = add_plugin(
             self.post.media, "YouTubePlugin", language="en", url="https://www.youtube.com/watch?v=szbGc7ymFhQ"
         )
@@ -90,3 +95,57 @@ class MediaTest(BaseTest):
         plugins = media_plugins(context, self.post)
         dst_ids = [media.media_id for media in plugins if hasattr(media, "media_id")]
         self.assertEqual(dst_ids, src_ids)
+
+    @patch("tests.media_app.models.requests.get")
+    def test_media_images_stored(self, get_request):
+        get_request.return_value = self._get_request_mock(os.path.join("fixtures", "vimeo.json"))
+        context = {"request": self.request("/")}
+        images = media_images(context, self.post)
+        self.assertEqual(2, len(images))
+        self.assertEqual(get_request.call_count, 1)
+
+        post_content = PostContent.objects.get(pk=self.post.pk)
+        self.assertEqual(post_content.media_previews["main"], images)
+        with self.assertNumQueries(0):
+            self.assertEqual(media_images(context, post_content, main=False), post_content.media_previews["thumb"])
+
+        # stored previews are refreshed when the media placeholder is changed
+        self.vimeo.delete()
+        post_placeholder_operation.send(
+            sender=PostContent, operation="delete_plugin", request=None, placeholder=self.post.media
+        )
+        post_content = PostContent.objects.get(pk=self.post.pk)
+        self.assertEqual(media_images(context, post_content), images[:1])
+        self.assertEqual(get_request.call_count, 1)
+
+    @patch("tests.media_app.models.requests.get")
+    def test_media_params_cache(self, get_request):
+        get_request.return_value = self._get_request_mock(os.path.join("fixtures", "vimeo.json"))
+        other_vimeo = add_plugin(self.post.content, "VimeoPlugin", language="en", url=self.vimeo.url)
+        self.assertEqual(self.vimeo.media_id, "12915013")
+        self.assertEqual(other_vimeo.media_params, self.vimeo.media_params)
+        self.assertEqual(get_request.call_count, 1)
+
+        # unmatched urls are cached as well
+        unmatched = add_plugin(self.post.content, "YouTubePlugin", language="en", url="https://example.com/")
+        self.assertIsNone(unmatched.media_params)
+        self.assertIsNone(media_params_cache.get(unmatched.get_media_params_key()))
+
+        with override_settings(BLOG_MEDIA_PARAMS_CACHE_SIZE=2):
+            self.assertIsNotNone(self.youtube.media_params)
+            self.assertEqual(len(media_params_cache), 2)
+            self.assertIsNone(media_params_cache.get(self.vimeo.get_media_params_key(), None))
+
+    @patch("tests.media_app.models.requests.get")
+    def test_resolve_media_params(self, get_request):
+        get_request.return_value = self._get_request_mock(os.path.join("fixtures", "vimeo.json"))
+        plugins = [
+            add_plugin(self.post.content, "VimeoPlugin", language="en", url=self.vimeo.url),
+            self.vimeo,
+            self.youtube,
+            self.media_text,
+        ]
+        self.assertEqual(resolve_media_params(plugins), plugins[:3])
+        self.assertEqual(get_request.call_count, 1)
+        self.assertIs(plugins[0]._cached_params, plugins[1]._cached_params)
+        self.assertEqual(plugins[2]._cached_params["media_id"], "szbGc7ymFhQ")
@@ -1,8 +1,13 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.utils.timezone import now
 from django.utils.translation import activate
 from menus.menu_pool import menu_pool
 from parler.utils.context import smart_override, switch_language
 
 from djangocms_blog.cms_appconfig import BlogConfig
+from djangocms_blog.cms_menus import BlogCategoryMenu
 from djangocms_blog.models import BlogCategory
 from djangocms_blog.settings import MENU_TYPE_CATEGORIES, MENU_TYPE_COMPLETE, MENU_TYPE_NONE, MENU_TYPE_POSTS
 from djangocms_blog.views import CategoryEntriesView, PostDetailView
@@ -113,6 +118,54 @@ class MenuTest(BaseTest):
                 self.assertFalse(posts[0].get_absolute_url(lang) in nodes_url)
                 self.assertTrue(posts[1].get_absolute_url(lang) in nodes_url)
 
+    def test_menu_nodes_queries(self):
+        """
+        Tests that menu nodes are built with a fixed number of queries and cached
+        """
+        pages = self.get_pages()
+        posts = self.get_posts()
+        self.reload_urlconf()
+        BlogConfig.objects.filter(pk=self.app_config_1.pk).update(menu_structure=MENU_TYPE_COMPLETE)
+
+        menu = BlogCategoryMenu(menu_pool.get_renderer(self.get_request(pages[1], "en")))
+        menu.instance = pages[1]
+        with smart_override("en"):
+            request = self.get_request(pages[1], "en")
+            # posts, categories of posts, categories and their translations (config is already loaded)
+            with self.assertNumQueries(4):
+                nodes = menu.get_nodes(request)
+            with self.assertNumQueries(0):
+                self.assertEqual([node.id for node in menu.get_nodes(request)], [node.id for node in nodes])
+
+            nodes = {node.id: node for node in nodes}
+            post_content = posts[0].postcontent_set.get(language="en")
+            post_node = nodes[f"PostContent-{post_content.pk}"]
+            self.assertEqual(post_node.title, post_content.title)
+            self.assertEqual(post_node.url, posts[0].get_absolute_url("en"))
+            self.assertEqual(post_node.parent_id, f"BlogCategory-{posts[0].categories.first().pk}")
+            category_node = nodes[f"BlogCategory-{self.category_1.pk}"]
+            self.assertEqual(category_node.title, "category 1")
+            self.assertEqual(category_node.url, self.category_1.get_absolute_url("en"))
+
+            # cache is discarded when posts change
+            post_content.title = "New title"
+            post_content.save()
+            nodes = {node.id: node for node in menu.get_nodes(request)}
+            self.assertEqual(nodes[f"PostContent-{post_content.pk}"].title, "New title")
+
+            # as well as when the post or its sites change
+            with patch("djangocms_blog.cms_menus.menu_pool.clear") as clear:
+                posts[0].date_published = now() - timedelta(days=400)
+                posts[0].save()
+                clear.assert_called_once_with(all=True)
+                nodes = {node.id: node for node in menu.get_nodes(request)}
+                self.assertEqual(nodes[f"PostContent-{post_content.pk}"].url, posts[0].get_absolute_url("en"))
+
+                clear.reset_mock()
+                self.site_2.post_set.add(posts[0])
+                self.assertTrue(clear.called)
+                self.assertNotIn(f"PostContent-{post_content.pk}", [node.id for node in menu.get_nodes(request)])
+
     def test_menu_options(self):
         """
         Tests menu structure based on menu_structure configuration
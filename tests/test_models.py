@@ -1,19 +1,27 @@
 import re
 from contextlib import contextmanager
+from io import StringIO
 from copy import deepcopy
 from datetime import timedelta
+from importlib import import_module
 from unittest import SkipTest
+from unittest.mock import ANY, patch
 from urllib.parse import quote
 
 import parler
 from cms.api import add_plugin
+from cms.signals import urls_need_reloading
 from cms.utils.plugins import copy_plugins_to_placeholder, downcast_plugins
 from django.contrib import admin
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.contenttypes.models import ContentType
 from django.contrib.messages.middleware import MessageMiddleware
 from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.handlers.base import BaseHandler
+from django.core.management import call_command
 from django.http import QueryDict
+from django.template import Context, Template
 from django.test import override_settings
 from django.urls import reverse
 from django.utils.encoding import force_str
@@ -27,9 +35,19 @@ from parler.utils.conf import add_default_language_settings
 from parler.utils.context import smart_override
 from taggit.models import Tag
 
-from djangocms_blog.cms_appconfig import BlogConfig
+from djangocms_blog.cms_appconfig import BlogConfig, config_registry, get_app_instance
 from djangocms_blog.forms import CategoryAdminForm, PostAdminForm
-from djangocms_blog.models import BlogCategory, Post
+from djangocms_blog.models import (
+    BlogCategory,
+    GenericBlogPlugin,
+    LatestPostsPlugin,
+    Post,
+    PostContent,
+    RelatedPostScore,
+    attach_post_contents,
+    get_post_urls,
+)
+from djangocms_blog.related import compute_related_posts, get_related_post_contents
 from djangocms_blog.settings import MENU_TYPE_NONE, PERMALINK_TYPE_CATEGORY, PERMALINK_TYPE_FULL_DATE, get_setting
 
 from tests.base import BaseTest
@@ -1120,6 +1138,360 @@ class ModelsTest(BaseTest):
                     post.set_current_language("it")
                     self.assertEqual(post.get_absolute_url(), post.get_absolute_url("en"))
 
+    def test_bulk_urls(self):
+        self.get_pages()
+        self.get_posts()
+        self.addCleanup(setattr, self.app_config_1, "url_patterns", self.app_config_1.url_patterns)
+        for url_patterns in ("full_date", "short_date", "category", "slug"):
+            self.app_config_1.url_patterns = url_patterns
+            self.app_config_1.save()
+            config_registry.get(self.app_config_1.namespace)
+            for lang in ("en", "it"):
+                expected = [post.get_absolute_url(lang) for post in Post.objects.order_by("pk")]
+                posts = list(Post.objects.order_by("pk"))
+                # slugs (+ category links, categories and their translations), configs are read from the registry
+                with self.assertNumQueries(4 if url_patterns == PERMALINK_TYPE_CATEGORY else 1):
+                    self.assertEqual(get_post_urls(posts, lang), expected)
+                with self.assertNumQueries(0):
+                    self.assertEqual([post.get_absolute_url(lang) for post in posts], expected)
+
+                post_contents = (
+                    PostContent.objects.filter(language=lang)
+                    .select_related("post__app_config")
+                    .prefetch_related("post__categories__translations")
+                    .order_by("post_id")
+                )
+                post_contents = list(post_contents)
+                with self.assertNumQueries(0):
+                    self.assertEqual(get_post_urls(post_contents, lang), expected)
+
+    def test_stored_permalink(self):
+        self.get_pages()
+        posts = self.get_posts()
+        self.addCleanup(setattr, self.app_config_1, "url_patterns", self.app_config_1.url_patterns)
+        post_content = PostContent.objects.get(post=posts[0], language="en")
+        self.assertTrue(post_content.permalink)
+        self.assertEqual(post_content.permalink, posts[0].get_absolute_url("en"))
+        with self.assertNumQueries(0):
+            self.assertEqual(post_content.get_absolute_url(), post_content.permalink)
+
+        # config permalink style change
+        self.app_config_1.url_patterns = PERMALINK_TYPE_CATEGORY
+        self.app_config_1.save()
+        post_content.refresh_from_db()
+        self.assertTrue(post_content.permalink.endswith("/category-1/first-post/"))
+
+        # category slug change
+        self.category_1.set_current_language("en")
+        self.category_1.slug = "new-slug"
+        self.category_1.save()
+        post_content.refresh_from_db()
+        self.assertTrue(post_content.permalink.endswith(f"/new-slug/{post_content.slug}/"))
+
+        # post slug change
+        post_content.slug = "other-slug"
+        post_content.save()
+        post_content.refresh_from_db()
+        self.assertTrue(post_content.permalink.endswith("/new-slug/other-slug/"))
+
+        # bulk rebuild
+        PostContent.objects.update(permalink="")
+        call_command("blog_rebuild_permalinks", stdout=StringIO())
+        for post_content in PostContent.objects.all():
+            self.assertEqual(post_content.permalink, post_content.post.get_absolute_url(post_content.language))
+
+        # upgrade backfill, only empty permalinks are computed
+        PostContent.objects.exclude(pk=post_content.pk).update(permalink="")
+        PostContent.objects.filter(pk=post_content.pk).update(permalink="/stale/")
+        import_module("djangocms_blog.migrations.0058_postcontent_permalink_backfill").backfill_permalinks(None, None)
+        for other in PostContent.objects.exclude(pk=post_content.pk):
+            self.assertEqual(other.permalink, other.post.get_absolute_url(other.language))
+        post_content.refresh_from_db()
+        self.assertEqual(post_content.permalink, "/stale/")
+
+        # apphook page url change
+        with patch("djangocms_blog.models.worker.schedule") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                urls_need_reloading.send(sender=None)
+        schedule.assert_called_once_with("permalinks", ANY)
+        schedule.call_args[0][1](set())
+        post_content.refresh_from_db()
+        self.assertEqual(post_content.permalink, post_content.post.get_absolute_url(post_content.language))
+
+    def test_listing_fields(self):
+        self.get_pages()
+        posts = self.get_posts()
+        post_content = posts[0].postcontent_set.get(language="en")
+        self.assertEqual(post_content.listing_app_config, self.app_config_1)
+        self.assertEqual(post_content.listing_pinned, PostContent.UNPINNED)
+        self.assertEqual(post_content.listing_date_created, posts[0].date_created)
+
+        posts[1].pinned = 1
+        posts[1].date_published = now()
+        posts[1].save()
+        for post_content in posts[1].postcontent_set.all():
+            self.assertEqual(post_content.listing_pinned, 1)
+            self.assertEqual(post_content.listing_date_published, posts[1].date_published)
+        post_contents = PostContent.objects.filter(language="en", listing_app_config=self.app_config_1)
+        self.assertEqual(post_contents.first().post, posts[1])
+        self.assertEqual(PostContent.objects.filter(language="en").latest().post, posts[1])
+
+    def test_sites_visibility(self):
+        self.get_pages()
+        posts = self.get_posts()
+        post_contents = PostContent.objects.filter(language="en")
+        self.assertTrue(all(post_content.listing_all_sites for post_content in post_contents))
+
+        posts[0].sites.add(self.site_1, self.site_2)
+        posts[1].sites.add(self.site_2)
+        self.assertFalse(posts[0].all_sites)
+        self.assertFalse(Post.objects.get(pk=posts[1].pk).all_sites)
+        self.assertFalse(posts[1].postcontent_set.get(language="it").listing_all_sites)
+        on_site = post_contents.on_site(self.site_1)
+        self.assertEqual(on_site.count(), Post.objects.count() - 1)
+        self.assertNotIn(posts[1].pk, on_site.values_list("post_id", flat=True))
+        self.assertNotIn("DISTINCT", str(on_site.query))
+        self.assertNotIn("JOIN", str(on_site.order_by().query))
+        category = BlogCategory.objects.get(pk=self.category_1.pk)
+        self.assertEqual(category.count, Post.objects.filter(app_config=self.app_config_1).count() - 1)
+
+        # changes from the site side
+        self.site_2.post_set.clear()
+        self.assertTrue(Post.objects.get(pk=posts[1].pk).all_sites)
+        self.assertFalse(Post.objects.get(pk=posts[0].pk).all_sites)
+        self.site_2.post_set.add(posts[1])
+        self.assertFalse(Post.objects.get(pk=posts[1].pk).all_sites)
+        posts[0].sites.clear()
+        posts[0].save()
+        self.assertTrue(posts[0].postcontent_set.get(language="en").listing_all_sites)
+
+        # posts whose only site is deleted are shown on all the sites again
+        site_3 = Site.objects.create(domain="example.org", name="example 3")
+        posts[2].sites.add(site_3)
+        self.assertFalse(posts[2].postcontent_set.get(language="en").listing_all_sites)
+        site_3.delete()
+        self.assertTrue(Post.objects.get(pk=posts[2].pk).all_sites)
+        self.assertTrue(posts[2].postcontent_set.get(language="en").listing_all_sites)
+
+    def test_get_months(self):
+        self.get_pages()
+        posts = self.get_posts()
+        first_month = now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        previous_month = (first_month - timedelta(days=1)).replace(day=1)
+        posts[0].date_published, posts[0].date_created = None, previous_month
+        posts[1].date_published = previous_month + timedelta(days=3)
+        posts[2].date_published = first_month + timedelta(hours=2)
+        for post in posts[:3]:
+            post.save()
+
+        Site.objects.get_current()
+        with self.assertNumQueries(1):
+            months = PostContent.objects.get_months(PostContent.objects.filter(language="en", post__in=posts[:3]))
+        self.assertEqual(months, [{"date": first_month, "count": 1}, {"date": previous_month, "count": 2}])
+        months = PostContent.objects.get_months(PostContent.objects.filter(language="en", post__in=posts[:2]))
+        self.assertEqual(months, [{"date": previous_month, "count": 2}])
+
+        # cached per plugin namespace and language, invalidated by post changes
+        request = self.request("/", lang="en")
+        plugin = GenericBlogPlugin(app_config=self.app_config_1)
+        calls = []
+
+        def get_months():
+            calls.append(True)
+            return PostContent.objects.get_months(plugin.post_content_queryset(request), current_site=False)
+
+        with smart_override("en"):
+            months = plugin.get_cached(request, "archive", get_months)
+            self.assertEqual(plugin.get_cached(request, "archive", get_months), months)
+            self.assertEqual(len(calls), 1)
+            posts[2].save()
+            plugin.get_cached(request, "archive", get_months)
+            self.assertEqual(len(calls), 2)
+        with smart_override("it"):
+            plugin.get_cached(request, "archive", get_months)
+            self.assertEqual(len(calls), 3)
+        with override_settings(BLOG_AGGREGATES_CACHE_TIMEOUT=0), smart_override("en"):
+            plugin.get_cached(request, "archive", get_months)
+            self.assertEqual(len(calls), 4)
+
+    def test_attach_post_contents(self):
+        self.get_pages()
+        self.get_posts()
+        posts = list(Post.objects.order_by("pk"))
+        expected = {post.pk: post.postcontent_set.get(language="en").title for post in posts}
+        ContentType.objects.get_for_model(PostContent)
+        # contents and their placeholders
+        with self.assertNumQueries(2):
+            attach_post_contents(posts, show_draft_content=True)
+        with self.assertNumQueries(0):
+            for post in posts:
+                self.assertEqual(post.safe_translation_getter("title", language_code="en"), expected[post.pk])
+                self.assertEqual(post.get_content("it", show_draft_content=True).post, post)
+                self.assertEqual(sorted(post.get_available_languages()), ["en", "it"])
+
+        posts = list(Post.objects.order_by("pk"))
+        with self.assertNumQueries(2):
+            attach_post_contents(posts, languages=["en", "fr"])
+        with self.assertNumQueries(0):
+            for post in posts:
+                self.assertEqual(post.get_content("en").title, expected[post.pk])
+                self.assertIsNone(post.get_content("fr"))
+
+    def test_attach_post_contents_admin(self):
+        self.get_pages()
+        posts = self.get_posts()
+        post_admin = admin.site._registry[Post]
+        request = self.get_request(None, "en", self.user, path="/en/admin/djangocms_blog/post/")
+        request.GET = QueryDict("language=en")
+        changelist = post_admin.get_changelist_instance(request)
+        with self.assertNumQueries(0):
+            titles = {post.pk: post_admin.title(post) for post in changelist.result_list}
+        self.assertEqual(titles, {post.pk: post.postcontent_set.get(language="en").title for post in posts})
+
+        # labels of the related posts choices
+        formfield = post_admin.formfield_for_manytomany(Post._meta.get_field("related"), request)
+        with self.assertNumQueries(3):
+            choices = dict(formfield.choices)
+        self.assertEqual(choices[posts[0].pk], posts[0].postcontent_set.get(language="en").title)
+
+    def test_related_posts(self):
+        self.get_pages()
+        posts = self.get_posts()
+        posts[0].tags.add("tag 1", "tag 2")
+        posts[1].tags.add("tag 1", "tag 2")
+        posts[2].tags.add("tag 1")
+        # posts of other apphooks share the category, but they are not candidates
+        self.assertEqual(posts[3].app_config, self.app_config_2)
+
+        related = compute_related_posts()
+        self.assertEqual([pk for pk, _score in related[posts[0].pk]], [posts[1].pk, posts[2].pk])
+        self.assertAlmostEqual(related[posts[0].pk][0][1], 4.0, places=1)
+        # same score: most recent first
+        self.assertEqual([pk for pk, _score in related[posts[2].pk]], [posts[1].pk, posts[0].pk])
+        self.assertEqual(related[posts[3].pk], [])
+
+        # posts of other apphooks are candidates if they share a site with the post
+        BlogConfig.objects.filter(pk=self.app_config_2.pk).update(use_related=2)
+        self.assertIn(posts[0].pk, [pk for pk, _score in compute_related_posts()[posts[3].pk]])
+        posts[0].sites.add(self.site_2)
+        related = compute_related_posts(namespaces=["sample_app2"])
+        self.assertIn(posts[0].pk, [pk for pk, _score in related[posts[3].pk]])
+        posts[3].sites.add(self.site_1)
+        self.assertNotIn(posts[0].pk, [pk for pk, _score in compute_related_posts()[posts[3].pk]])
+        posts[0].sites.clear()
+        posts[3].sites.clear()
+        BlogConfig.objects.filter(pk=self.app_config_2.pk).update(use_related=1)
+
+        # older posts score less, manually selected posts are not scored
+        Post.objects.filter(pk=posts[1].pk).update(date_published=now() - timedelta(days=720))
+        posts[0].related.add(posts[3])
+        related = compute_related_posts()
+        self.assertEqual([pk for pk, _score in related[posts[0].pk]], [posts[2].pk, posts[1].pk])
+        self.assertEqual([pk for pk, _score in compute_related_posts(count=1)[posts[0].pk]], [posts[2].pk])
+
+        out = StringIO()
+        call_command("blog_update_related_posts", stdout=out)
+        self.assertEqual(out.getvalue().strip(), f"related posts of {len(related)} posts updated")
+        call_command("blog_update_related_posts", stdout=StringIO())
+        self.assertEqual(RelatedPostScore.objects.filter(post=posts[0]).count(), 2)
+
+        post_content = posts[0].postcontent_set.get(language="en")
+        contents = {index: posts[index].postcontent_set.get(language="en") for index in range(4)}
+        Site.objects.get_current()
+        # manually selected posts come first, then the computed ones, with their categories
+        with self.assertNumQueries(4):
+            related_contents = list(get_related_post_contents(post_content))
+        self.assertEqual(related_contents, [contents[3], contents[2], contents[1]])
+        self.assertEqual(list(get_related_post_contents(post_content, 2)), [contents[3], contents[2]])
+
+        # manual changes are shown without recomputing the scores
+        posts[0].related.set([posts[1], posts[3]])
+        self.assertEqual(list(get_related_post_contents(post_content)), [contents[1], contents[3], contents[2]])
+        posts[0].related.clear()
+        self.assertEqual(list(get_related_post_contents(post_content)), [contents[2], contents[1]])
+        posts[0].related.set([posts[3]])
+        template = Template(
+            "{% load djangocms_blog %}{% related_posts post_content 1 as related %}{{ related|length }}"
+        )
+        self.assertEqual(template.render(Context({"post_content": post_content})), "1")
+
+    def test_config_registry(self):
+        pages = self.get_pages()
+        cache.clear()
+        with self.assertNumQueries(1):
+            config = config_registry.get("sample_app")
+        with self.assertNumQueries(0):
+            self.assertEqual(config_registry.get("sample_app"), self.app_config_1)
+            self.assertIsNot(config_registry.get("sample_app"), config)
+            self.assertEqual(config_registry.get_by_pk(self.app_config_2.pk), self.app_config_2)
+            self.assertIsNone(config_registry.get("missing"))
+        # the registry generation is read once per batch
+        with patch("djangocms_blog.cms_appconfig.cache.get", wraps=cache.get) as cache_get:
+            configs = config_registry.get_many([self.app_config_1.pk, self.app_config_2.pk, self.app_config_1.pk, 0])
+        self.assertEqual(configs, {self.app_config_1.pk: self.app_config_1, self.app_config_2.pk: self.app_config_2})
+        self.assertEqual(cache_get.call_count, 1)
+        # and once per request
+        config_registry.request_started()
+        self.addCleanup(config_registry.request_finished)
+        with patch("djangocms_blog.cms_appconfig.cache.get", wraps=cache.get) as cache_get:
+            config_registry.get("sample_app")
+            config_registry.get_by_pk(self.app_config_2.pk)
+            config_registry.get_many([self.app_config_1.pk])
+        self.assertEqual(cache_get.call_count, 1)
+        config_registry.request_finished()
+
+        # snapshots are detached from the registry, translations included
+        config = config_registry.get("sample_app")
+        config.set_current_language("en")
+        config.app_title = "changed"
+        config.paginate_by = 99
+        other = config_registry.get("sample_app")
+        other.set_current_language("en")
+        self.assertNotEqual(other.app_title, "changed")
+        self.assertNotEqual(other.paginate_by, 99)
+
+        # reloaded when a configuration is saved
+        config = BlogConfig.objects.get(pk=self.app_config_1.pk)
+        config.paginate_by = 7
+        config.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(config_registry.get("sample_app").paginate_by, 7)
+
+        # resolved once per request
+        request = self.get_request(pages[1], "en", AnonymousUser())
+        self.assertEqual(get_app_instance(request), ("sample_app", self.app_config_1))
+        with self.assertNumQueries(0):
+            self.assertEqual(get_app_instance(request), ("sample_app", self.app_config_1))
+
+    def test_category_tree(self):
+        category1 = BlogCategory.objects.create(name="tree category 1", app_config=self.app_config_1)
+        category2 = BlogCategory.objects.create(name="tree category 2", parent=category1, app_config=self.app_config_1)
+        category3 = BlogCategory.objects.create(name="tree category 3", parent=category2, app_config=self.app_config_1)
+        category4 = BlogCategory.objects.create(name="tree category 4", parent=category3, app_config=self.app_config_1)
+        category5 = BlogCategory.objects.create(name="tree category 5", parent=category1, app_config=self.app_config_1)
+
+        self.assertEqual(category4.tree_path, f"/{category1.pk}/{category2.pk}/{category3.pk}/{category4.pk}/")
+        self.assertEqual(category4.get_tree_path_ids(), [category1.pk, category2.pk, category3.pk, category4.pk])
+        self.assertEqual(category1.depth, 0)
+        self.assertEqual(category4.depth, 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(set(category1.descendants()), {category2, category3, category4, category5})
+        with self.assertNumQueries(1):
+            self.assertEqual(category4.ancestors(), [category1, category2, category3])
+        self.assertEqual(category3.breadcrumbs(), [category1, category2, category3])
+        self.assertEqual(category4.descendants(), [])
+
+        # moving a category moves the whole subtree
+        category2.parent = category5
+        category2.save()
+        category4 = BlogCategory.objects.get(pk=category4.pk)
+        self.assertEqual(category4.ancestors(), [category1, category5, category2, category3])
+        self.assertEqual(set(category5.descendants()), {category2, category3, category4})
+        category2.parent = None
+        category2.save()
+        self.assertEqual(BlogCategory.objects.get(pk=category3.pk).tree_path, f"/{category2.pk}/{category3.pk}/")
+        self.assertEqual(set(category1.descendants()), {category5})
+
     def test_manager(self):
         self.get_pages()
         post1 = self._get_post(self._post_data[0]["en"])
@@ -1207,47 +1579,52 @@ class ModelsTest(BaseTest):
             parler.appsettings.PARLER_LANGUAGES[Site.objects.get_current().pk][index]["hide_untranslated"] = False
 
     def test_tag_cloud(self):
+        self.get_pages()
         post1 = self._get_post(self._post_data[0]["en"])
+        post1 = self._get_post(self._post_data[0]["it"], post1, "it")
         post2 = self._get_post(self._post_data[1]["en"])
         post1.tags.add("tag 1", "tag 2", "tag 3", "tag 4")
-        post1.save()
         post2.tags.add("tag 6", "tag 2", "tag 5", "tag 8")
-        post2.save()
 
-        self.assertEqual(len(Post.objects.tag_cloud()), 0)
+        self.assertEqual(len(PostContent.objects.tag_cloud(queryset=PostContent.objects.none())), 0)
+
+        with self.assertNumQueries(1):
+            tags = PostContent.objects.tag_cloud()
+        self.assertEqual(len(tags), 7)
+        self.assertEqual(tags[0].slug, "tag-2")
+        # posts are counted once regardless of the number of translations
+        self.assertEqual(
+            {tag.slug: tag.count for tag in tags}, {tag.slug: 2 if tag.slug == "tag-2" else 1 for tag in tags}
+        )
 
-        tags = []
-        for tag in Tag.objects.all():
-            if tag.slug == "tag-2":
-                tag.count = 2
-            else:
-                tag.count = 1
-            tags.append(tag)
+        tags = PostContent.objects.tag_cloud(queryset=PostContent.objects.filter(post=post1))
+        self.assertEqual({tag.slug for tag in tags}, {"tag-1", "tag-2", "tag-3", "tag-4"})
+        self.assertEqual([tag.count for tag in tags], [1, 1, 1, 1])
 
-        self.assertEqual(Post.objects.tag_cloud(published=True), [])
-        self.assertEqual(set(Post.objects.tag_cloud(published=False)), set(tags))
+        tags = PostContent.objects.tag_cloud(limit=2)
+        self.assertEqual([(tag.slug, tag.count) for tag in tags], [("tag-2", 2), ("tag-1", 1)])
 
-        tags_1 = []
-        for tag in Tag.objects.all():
-            if tag.slug == "tag-2":
-                tag.count = 2
-                tags_1.append(tag)
-            elif tag.slug in ("tag-1", "tag-3", "tag-4"):
-                tag.count = 1
-                tags_1.append(tag)
+        post2.sites.add(self.site_2)
+        tags = PostContent.objects.tag_cloud(on_site=True)
+        self.assertEqual({tag.slug: tag.count for tag in tags}, {"tag-1": 1, "tag-2": 1, "tag-3": 1, "tag-4": 1})
 
-        post1.publish = True
-        post1.save()
-        self.assertEqual(set(Post.objects.tag_cloud()), set(tags_1))
-        self.assertEqual(set(Post.objects.tag_cloud(published=False)), set(tags))
+    def test_tag_list(self):
+        post1 = self._get_post(self._post_data[0]["en"])
+        post2 = self._get_post(self._post_data[1]["en"])
+        post3 = self._get_post(self._post_data[2]["en"])
+        post1.tags.add("tag 1", "tag 2", "tag 3", "tag 4")
+        post2.tags.add("tag 6", "tag 2", "tag 5", "tag 8")
+        post3.tags.add("tag 7")
 
-        tags1 = set(Post.objects.tag_list(Post))
-        tags2 = set(Tag.objects.all())
-        self.assertEqual(tags1, tags2)
+        self.assertEqual(set(PostContent.objects.tag_list(Post)), set(Tag.objects.all()))
+        self.assertEqual(
+            set(PostContent.objects.tag_list(queryset=Post.objects.filter(pk=post1.pk))),
+            set(Tag.objects.filter(slug__in=("tag-1", "tag-2", "tag-3", "tag-4"))),
+        )
 
         self.assertEqual(
-            list(Post.objects.tagged(queryset=Post.objects.filter(pk=post1.pk)).order_by("pk").values_list("pk")),
-            list(Post.objects.filter(pk__in=(post1.pk, post2.pk)).order_by("pk").values_list("pk")),
+            set(PostContent.objects.tagged(queryset=Post.objects.filter(pk=post1.pk)).values_list("post", flat=True)),
+            {post1.pk, post2.pk},
         )
 
     def test_plugin_latest(self):
@@ -1307,6 +1684,135 @@ class ModelsTest2(BaseTest):
         self.assertEqual(len(plugin.get_posts(request)), 2)
         self.assertEqual(plugin.get_authors(request)[0].count, 2)
 
+    def test_plugin_author_entries(self):
+        pages = self.get_pages()
+        other, idle = self.user_staff, self.user_normal
+        post_contents = {}
+        for index, author in enumerate((self.user, self.user, self.user, other)):
+            post = Post.objects.create(
+                author=author, app_config=self.app_config_1, date_published=now() - timedelta(days=index)
+            )
+            post_contents[index] = PostContent.objects.create(post=post, language="en", title=f"author post {index}")
+        plugin = add_plugin(
+            post_contents[0].placeholders.get_or_create(slot="content")[0],
+            "BlogAuthorPostsPlugin",
+            language="en",
+            app_config=self.app_config_1,
+            latest_posts=2,
+        )
+        plugin.authors.add(self.user, other, idle)
+        request = self.get_request(pages[1], "en", AnonymousUser())
+
+        Site.objects.get_current()
+        with smart_override("en"), self.assertNumQueries(4):
+            authors = {author.pk: author for author in plugin.get_authors(request)}
+        self.assertEqual(authors[self.user.pk].count, 3)
+        self.assertEqual(authors[self.user.pk].post_contents, [post_contents[0], post_contents[1]])
+        self.assertEqual(authors[other.pk].count, 1)
+        self.assertEqual(authors[other.pk].post_contents, [post_contents[3]])
+        self.assertEqual(authors[idle.pk].count, 0)
+        self.assertEqual(authors[idle.pk].post_contents, [])
+
+    def test_plugin_latest_cached_entries(self):
+        pages = self.get_pages()
+        posts = self.get_posts()[:3]
+        post_content = PostContent.objects.get(post=posts[0], language="en")
+        plugin = add_plugin(
+            post_content.placeholders.get_or_create(slot="content")[0],
+            "BlogLatestEntriesPluginCached",
+            language="en",
+            app_config=self.app_config_1,
+            latest_posts=5,
+        )
+        plugin_class = plugin.get_plugin_class_instance()
+        request = self.get_request(pages[1], "en", AnonymousUser())
+        self.assertTrue(plugin_class.cache)
+
+        Site.objects.get_current()
+        with smart_override("en"):
+            with patch("djangocms_blog.models.cache.set", wraps=cache.set) as cache_set:
+                cached = plugin_class.get_post_contents(request, plugin)
+            self.assertIn(post_content, cached)
+            # only the ids are cached, post contents are loaded by id with their categories
+            cache_set.assert_called_once_with(ANY, [item.pk for item in cached], timeout=ANY)
+            with self.assertNumQueries(4):
+                self.assertEqual(plugin_class.get_post_contents(request, plugin), cached)
+
+            post_content.title = "changed title"
+            post_content.save()
+            titles = [item.title for item in plugin_class.get_post_contents(request, plugin)]
+            self.assertIn("changed title", titles)
+
+            posts[1].tags.add("cached tag")
+            plugin.tags.add(Tag.objects.get(slug="cached-tag"))
+            self.assertEqual([item.post for item in plugin_class.get_post_contents(request, plugin)], [posts[1]])
+
+            posts[0].tags.add("cached tag")
+            self.assertEqual(
+                {item.post for item in plugin_class.get_post_contents(request, plugin)}, {posts[0], posts[1]}
+            )
+
+        with smart_override("it"):
+            self.assertEqual({item.language for item in plugin_class.get_post_contents(request, plugin)}, {"it"})
+
+    def test_plugin_latest_filter_ids(self):
+        pages = self.get_pages()
+        posts = self.get_posts()[:3]
+        posts[0].tags.add("filter tag")
+        posts[1].tags.add("filter tag", "other tag")
+        category_2 = BlogCategory.objects.create(name="category 2", app_config=self.app_config_1)
+        posts[1].categories.add(category_2)
+        post_content = PostContent.objects.get(post=posts[0], language="en")
+        plugin = add_plugin(
+            post_content.placeholders.get_or_create(slot="content")[0],
+            "BlogLatestEntriesPlugin",
+            language="en",
+            app_config=self.app_config_1,
+        )
+        self.assertEqual((plugin.tag_ids, plugin.category_ids), ([], []))
+        tag = Tag.objects.get(slug="filter-tag")
+        plugin.tags.add(tag)
+        plugin.categories.add(self.category_1)
+        self.assertEqual((plugin.tag_ids, plugin.category_ids), ([tag.pk], [self.category_1.pk]))
+        category_2.latestpostsplugin_set.add(plugin)
+        plugin.refresh_from_db()
+        self.assertEqual(plugin.category_ids, [self.category_1.pk, category_2.pk])
+        category_2.latestpostsplugin_set.clear()
+        plugin.refresh_from_db()
+        self.assertEqual((plugin.tag_ids, plugin.category_ids), ([tag.pk], [self.category_1.pk]))
+
+        request = self.get_request(pages[1], "en", AnonymousUser())
+        Site.objects.get_current()
+        with smart_override("en"):
+            queryset = plugin.get_post_contents(request)
+            self.assertNotIn("DISTINCT", str(queryset.query))
+            # the post contents query and its prefetches
+            with self.assertNumQueries(4):
+                self.assertEqual({item.post for item in queryset}, {posts[0], posts[1]})
+
+        copy = LatestPostsPlugin.objects.get(pk=plugin.pk)
+        copy.pk = copy.id = None
+        copy.tag_ids = copy.category_ids = []
+        copy.position = plugin.position + 1
+        copy.save()
+        copy.copy_relations(plugin)
+        copy.refresh_from_db()
+        self.assertEqual((copy.tag_ids, copy.category_ids), ([tag.pk], [self.category_1.pk]))
+
+        # deleted tags and categories are removed from the filters
+        plugin.categories.add(category_2)
+        key = plugin.get_filter_key()
+        category_2.delete()
+        tag.delete()
+        plugin.refresh_from_db()
+        self.assertEqual((plugin.tag_ids, plugin.category_ids), ([], [self.category_1.pk]))
+        self.assertNotEqual(plugin.get_filter_key(), key)
+        with smart_override("en"):
+            self.assertEqual(
+                {item.post for item in plugin.get_post_contents(request)},
+                {post for post in posts if post.app_config == self.app_config_1},
+            )
+
     def test_copy_plugin_author(self):
         post1 = self._get_post(self._post_data[0]["en"])
         post2 = self._get_post(self._post_data[1]["en"])
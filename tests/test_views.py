@@ -1,9 +1,15 @@
 import os.path
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import ANY, patch
 
 from cms.api import add_plugin
 from cms.toolbar.items import ModalItem
 from cms.utils.apphook_reload import reload_urlconf
 from django.contrib.auth.models import AnonymousUser
+from django.contrib.sites.models import Site
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.core.management import call_command
 from django.http import Http404
@@ -15,10 +21,18 @@ from parler.tests.utils import override_parler_settings
 from parler.utils.conf import add_default_language_settings
 from parler.utils.context import smart_override, switch_language
 
-from djangocms_blog.feeds import FBInstantArticles, FBInstantFeed, LatestEntriesFeed, TagFeed
-from djangocms_blog.models import BLOG_CURRENT_NAMESPACE
+from djangocms_blog.cms_appconfig import get_app_instance
+from djangocms_blog.feeds import (
+    FBInstantArticles,
+    FBInstantFeed,
+    LatestEntriesFeed,
+    TagFeed,
+    render_instant_articles,
+)
+from djangocms_blog.models import BLOG_CURRENT_NAMESPACE, Post, PostContent, get_watermark
+from djangocms_blog.pagination import CursorPaginator
 from djangocms_blog.settings import get_setting
-from djangocms_blog.sitemaps import BlogSitemap
+from djangocms_blog.sitemaps import BlogSitemap, BlogSitemapSections
 from djangocms_blog.views import (
     AuthorEntriesView,
     CategoryEntriesView,
@@ -27,6 +41,7 @@ from djangocms_blog.views import (
     PostListView,
     TaggedListView,
 )
+from djangocms_blog.worker import BackgroundWorker
 
 from tests.base import BaseTest
 from tests.utils import captured_output
@@ -55,6 +70,46 @@ class ViewTest(BaseTest):
             call_command("check", fail_level="DEBUG")
         self.assertEqual(out.getvalue().strip(), "System check identified no issues (0 silenced).")
 
+    def test_conditional_get(self):
+        pages = self.get_pages()
+        posts = self.get_posts()
+        view = PostListView.as_view()
+
+        with smart_override("en"):
+            response = view(self.get_request(pages[1], "en", AnonymousUser()))
+            self.assertEqual(response.status_code, 200)
+            etag = response["ETag"]
+            self.assertTrue(response.has_header("Last-Modified"))
+
+            request = self.get_request(pages[1], "en", AnonymousUser())
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+            # apphook config is already loaded, no post is fetched
+            with self.assertNumQueries(0):
+                self.assertEqual(view(request).status_code, 304)
+
+            request = self.get_request(pages[1], "en", AnonymousUser())
+            request.META["HTTP_IF_MODIFIED_SINCE"] = response["Last-Modified"]
+            self.assertEqual(view(request).status_code, 304)
+
+            # changes in other languages do not affect the watermark
+            posts[0].postcontent_set.get(language="it").save()
+            request = self.get_request(pages[1], "en", AnonymousUser())
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+            self.assertEqual(view(request).status_code, 304)
+
+            posts[0].postcontent_set.get(language="en").save()
+            request = self.get_request(pages[1], "en", AnonymousUser())
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response["ETag"], etag)
+
+            request = self.get_request(pages[1], "en", self.user)
+            request.META["HTTP_IF_NONE_MATCH"] = response["ETag"]
+            response = view(request)
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header("ETag"))
+
     def test_post_list_view_base_urlconf(self):
         pages = self.get_pages()
         self.get_posts()
@@ -134,6 +189,62 @@ class ViewTest(BaseTest):
                 1,
             )
 
+    @override_settings(BLOG_PAGINATION_CURSOR=True)
+    def test_post_list_view_cursor(self):
+        pages = self.get_pages()
+        self.app_config_1.paginate_by = 2
+        self.app_config_1.save()
+        date = now().replace(microsecond=0)
+        for index, (pinned, date_published) in enumerate(
+            [(None, date), (None, date), (1, None), (None, None), (None, date - timedelta(days=1)), (2, date)]
+        ):
+            post = Post.objects.create(
+                author=self.user, app_config=self.app_config_1, pinned=pinned, date_published=date_published
+            )
+            PostContent.objects.create(post=post, language="en", title=f"Post {index}")
+        paginator = CursorPaginator(PostContent.objects.filter(language="en"), 2)
+        expected = list(PostContent.objects.filter(language="en").order_by(*paginator.get_ordering()))
+        self.assertEqual([post_content.post.pinned for post_content in expected[:2]], [1, 2])
+        # same order as the offset pagination, NULL dates are placed by the database
+        self.assertEqual(
+            expected, list(PostContent.objects.filter(language="en").order_by(*PostContent._meta.ordering, "pk"))
+        )
+
+        def get_page(cursor=None):
+            path = reverse("sample_app:posts-latest")
+            if cursor:
+                path = f"{path}?page={cursor}"
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=path)
+            return PostListView.as_view()(request).context_data
+
+        with smart_override("en"):
+            context = get_page()
+            self.assertEqual(context["paginator"].count, 6)
+            self.assertFalse(context["page_obj"].has_previous())
+            post_contents, pages_cursors = list(context["postcontent_list"]), []
+            while context["page_obj"].has_next():
+                context = get_page(context["page_obj"].next_page_number())
+                pages_cursors.append(context["page_obj"].previous_page_number())
+                post_contents.extend(context["postcontent_list"])
+            self.assertEqual(post_contents, expected)
+
+            context = get_page(pages_cursors[-1])
+            self.assertEqual(list(context["postcontent_list"]), expected[2:4])
+            context = get_page(context["page_obj"].previous_page_number())
+            self.assertEqual(list(context["postcontent_list"]), expected[:2])
+            self.assertFalse(context["page_obj"].has_previous())
+
+            with override_settings(BLOG_PAGINATION_COUNT_LIMIT=4):
+                context = get_page()
+                self.assertEqual(context["paginator"].count, 4)
+                self.assertTrue(context["paginator"].count_approximate)
+                response = PostListView.as_view()(
+                    self.get_request(pages[1], "en", AnonymousUser(), path=reverse("sample_app:posts-latest"))
+                )
+                self.assertContains(response.render(), "4+ articles")
+            with self.assertRaises(Http404):
+                get_page("invalid")
+
     def test_get_view_url(self):
         pages = self.get_pages()
         self.get_posts()
@@ -388,54 +499,133 @@ class TaggedItemViewTest(BaseTest):
         pages = self.get_pages()
         posts = self.get_posts()
         posts[0].tags.add("tag 1", "tag 2", "tag 3", "tag 4")
-        posts[0].author = self.user
-        posts[0].save()
         posts[1].tags.add("tag 6", "tag 2", "tag 5", "tag 8")
-        posts[1].save()
-        posts[0].set_current_language("en")
+        post_contents = PostContent.objects.filter(post__app_config=self.app_config_1)
+        latest = list(post_contents.filter(language="en").order_by("-post__date_published", "-post__date_created"))
 
         with smart_override("en"):
-            with switch_language(posts[0], "en"):
-                request = self.get_page_request(pages[1], self.user, path=posts[0].get_absolute_url())
-
-                feed = LatestEntriesFeed()
-                feed.namespace, feed.config = get_app_instance(request)
-                self.assertEqual(list(feed.items()), [posts[0]])
-                self.reload_urlconf()
-                xml = feed(request)
-                self.assertContains(xml, posts[0].get_absolute_url())
-                self.assertContains(xml, "Blog articles on example.com")
-                self.assertContains(xml, "Admin User</dc:creator>")
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=latest[0].get_absolute_url())
+            feed = LatestEntriesFeed()
+            feed.namespace, feed.config = get_app_instance(request)
+            self.assertEqual(list(feed.items()), latest)
+            xml = feed(request)
+            self.assertContains(xml, latest[0].get_absolute_url())
+            self.assertContains(xml, "Blog articles on example.com")
+            self.assertContains(xml, "Admin User</dc:creator>")
+            self.assertContains(xml, "<guid>{}</guid>".format(latest[0].guid))
 
         with smart_override("it"):
-            with switch_language(posts[0], "it"):
-                feed = LatestEntriesFeed()
-                feed.namespace, feed.config = get_app_instance(request)
-                self.assertEqual(list(feed.items()), [posts[0]])
-                request = self.get_page_request(pages[1], self.user, path=posts[0].get_absolute_url())
-                xml = feed(request)
-                self.assertContains(xml, posts[0].get_absolute_url())
-                self.assertContains(xml, "Articoli del blog su example.com")
-
-                feed = TagFeed()
-                feed.namespace = self.app_config_1.namespace
-                feed.config = self.app_config_1
-                self.assertEqual(list(feed.items("tag-2")), [posts[0]])
+            it_content = post_contents.get(post=posts[0], language="it")
+            request = self.get_request(pages[1], "it", AnonymousUser(), path=it_content.get_absolute_url())
+            feed = LatestEntriesFeed()
+            feed.namespace, feed.config = get_app_instance(request)
+            self.assertIn(it_content, list(feed.items()))
+            xml = feed(request)
+            self.assertContains(xml, it_content.get_absolute_url())
+            self.assertContains(xml, "Articoli del blog su example.com")
+
+            feed = TagFeed()
+            feed.namespace = self.app_config_1.namespace
+            feed.config = self.app_config_1
+            self.assertEqual(list(feed.items("tag-2")), list(post_contents.filter(language="it", post__in=posts[:2])))
 
         with smart_override("en"):
-            with switch_language(posts[0], "en"):
-                posts[0].include_in_rss = False
-                posts[0].save()
+            posts[0].include_in_rss = False
+            posts[0].save()
+            feed = LatestEntriesFeed()
+            feed.namespace = self.app_config_1.namespace
+            self.assertNotIn(posts[0], [item.post for item in feed.items()])
 
-                request = self.get_page_request(pages[1], self.user, path=posts[0].get_absolute_url())
+    def test_feed_streaming(self):
+        self.user.first_name = "Admin"
+        self.user.last_name = "User"
+        self.user.save()
+        pages = self.get_pages()
+        posts = self.get_posts()
+        posts[0].tags.add("tag 1", "tag 2")
+        latest = list(
+            PostContent.objects.filter(post__app_config=self.app_config_1, language="en").order_by(
+                "-post__date_published"
+            )
+        )
+        Site.objects.get_current()
 
-                feed = LatestEntriesFeed()
-                feed.namespace, feed.config = get_app_instance(request)
-                self.assertEqual(len(list(feed.items())), 0)
-                self.reload_urlconf()
+        with smart_override("en"):
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=latest[0].get_absolute_url())
+            get_app_instance(request)
+            get_watermark(self.app_config_1.namespace, "en")
+            feed = LatestEntriesFeed()
+            feed.streaming = True
+            with self.assertNumQueries(2):
+                response = feed(request)
+                chunks = list(response.streaming_content)
+            # header, one chunk per item, footer
+            self.assertEqual(len(chunks), len(latest) + 2)
+
+            # streamed feeds are not cached
+            with patch("djangocms_blog.feeds.cache") as feed_cache:
+                response = feed(request)
+                self.assertEqual(list(response.streaming_content), chunks)
+            self.assertEqual(feed_cache.mock_calls, [])
+
+            expected = LatestEntriesFeed()(request)
+            self.assertFalse(expected.streaming)
+            self.assertEqual(response["Content-Type"], expected["Content-Type"])
+            self.assertEqual(b"".join(chunks), expected.content)
+
+            feed = TagFeed()
+            feed.streaming = True
+            response = feed(request, tag="tag-2")
+            xml = b"".join(response.streaming_content).decode("utf-8")
+            self.assertEqual(xml.count("<item>"), 1)
+            self.assertIn("<guid>{}</guid>".format(posts[0].postcontent_set.get(language="en").guid), xml)
+
+    def test_feed_cache(self):
+        pages = self.get_pages()
+        posts = self.get_posts()
+        posts[0].tags.add("tag 1", "tag 2")
+        posts[1].tags.add("tag 2")
+        post_content = posts[0].postcontent_set.get(language="en")
+        Site.objects.get_current()
 
-                posts[0].include_in_rss = True
-                posts[0].save()
+        with smart_override("en"):
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=post_content.get_absolute_url())
+            get_app_instance(request)
+            feed = LatestEntriesFeed()
+            response = feed(request)
+            self.assertContains(response, post_content.title)
+            etag = response["ETag"]
+            self.assertTrue(response["Last-Modified"])
+
+            with self.assertNumQueries(0):
+                cached = feed(request)
+            self.assertEqual(cached.content, response.content)
+            self.assertEqual(cached["ETag"], etag)
+
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+            self.assertEqual(feed(request).status_code, 304)
+            del request.META["HTTP_IF_NONE_MATCH"]
+
+            # tags and languages are cached separately
+            tag_feed = TagFeed()
+            self.assertEqual(tag_feed(request, tag="tag-1").content.count(b"<item>"), 1)
+            self.assertEqual(tag_feed(request, tag="tag-2").content.count(b"<item>"), 2)
+            with smart_override("it"):
+                self.assertNotEqual(feed(request).content, response.content)
+
+            # saving a post invalidates the feeds of its namespace
+            post_content.title = "Changed title"
+            post_content.save()
+            changed = feed(request)
+            self.assertNotEqual(changed["ETag"], etag)
+            self.assertContains(changed, "Changed title")
+            request.META["HTTP_IF_NONE_MATCH"] = etag
+            self.assertEqual(feed(request).status_code, 200)
+            del request.META["HTTP_IF_NONE_MATCH"]
+
+            posts[0].delete()
+            self.assertNotContains(feed(request), "Changed title")
+            self.assertEqual(tag_feed(request, tag="tag-1").content.count(b"<item>"), 0)
 
 
 class SitemapViewTest(BaseTest):
@@ -494,6 +684,40 @@ class SitemapViewTest(BaseTest):
         self.assertEqual(sitemap.priority(None), get_setting("SITEMAP_PRIORITY_DEFAULT"))
         self.assertEqual(sitemap.changefreq(None), get_setting("SITEMAP_CHANGEFREQ_DEFAULT"))
 
+    def test_sitemap_sections(self):
+        self.get_pages()
+        posts = self.get_posts()
+        sections = BlogSitemapSections()
+        self.assertEqual(
+            set(sections), {f"blog-{ns}-{lang}" for ns in ("sample_app", "sample_app2") for lang in ("en", "it", "fr")}
+        )
+
+        sitemap = sections["blog-sample_app-en"]
+        self.assertEqual(sitemap.paginator.count, 3)
+        # one count query for the paginator and one for the page items
+        with self.assertNumQueries(2):
+            urls = sitemap.get_urls(site=Site.objects.get_current(), protocol="http")
+        self.assertEqual(
+            [url["location"] for url in urls],
+            [f"http://example.com{post.get_absolute_url('en')}" for post in posts[:3]],
+        )
+        self.assertEqual(float(urls[0]["priority"]), float(get_setting("SITEMAP_PRIORITY_DEFAULT")))
+        self.assertEqual(sitemap.get_latest_lastmod(), max(post.date_modified for post in posts[:3]))
+        self.assertEqual(sections["blog-sample_app2-it"].paginator.count, 1)
+        self.assertEqual(sections["blog-sample_app2-fr"].paginator.count, 0)
+
+        # post contents without a stored permalink are listed with their computed url
+        PostContent.objects.update(permalink="")
+        urls = sitemap.get_urls(site=Site.objects.get_current(), protocol="http")
+        self.assertEqual(
+            [url["location"] for url in urls],
+            [f"http://example.com{post.get_absolute_url('en')}" for post in posts[:3]],
+        )
+
+        sitemap.limit = 2
+        self.assertEqual(sitemap.paginator.num_pages, 2)
+        self.assertEqual(len(sitemap.get_urls(page=2, site=Site.objects.get_current(), protocol="http")), 1)
+
 
 class InstanctArticlesViewTest(BaseTest):
     def test_instant_articles(self):
@@ -506,25 +730,81 @@ class InstanctArticlesViewTest(BaseTest):
         posts[0].categories.add(self.category_1)
         posts[0].author = self.user
         posts[0].save()
-        add_plugin(posts[0].content, "TextPlugin", language="en", body="<h3>Ciao</h3><p></p><p>Ciao</p>")
+        post_content = posts[0].postcontent_set.get(language="en")
+        add_plugin(post_content.content, "TextPlugin", language="en", body="<h3>Ciao</h3><p></p><p>Ciao</p>")
 
         with smart_override("en"):
-            with switch_language(posts[0], "en"):
-                request = self.get_page_request(pages[1], self.user, path=posts[0].get_absolute_url())
-
-                feed = FBInstantArticles()
-                feed.namespace, feed.config = get_app_instance(request)
-                self.assertEqual(list(feed.items()), [posts[0]])
-                xml = feed(request)
-                self.assertContains(xml, "<guid>{}</guid>".format(posts[0].guid))
-                self.assertContains(xml, "content:encoded")
-                self.assertContains(
-                    xml,
-                    'class="op-modified" datetime="{}"'.format(
-                        posts[0].date_modified.strftime(FBInstantFeed.date_format)
-                    ),
-                )
-                self.assertContains(xml, '<link rel="canonical" href="{}"/>'.format(posts[0].get_full_url()))
-                # Assert text transformation
-                self.assertContains(xml, "<h2>Ciao</h2><p>Ciao</p>")
-                self.assertContains(xml, "<a>Admin User</a>")
+            request = self.get_request(pages[1], "en", AnonymousUser(), path=post_content.get_absolute_url())
+            feed = FBInstantArticles()
+            feed.request = request
+            feed.namespace, feed.config = get_app_instance(request)
+            # only rendered post contents are listed
+            self.assertEqual(list(feed.items()), [])
+
+            # rendering is left to the management command by default, or scheduled after commit
+            with self.captureOnCommitCallbacks() as callbacks:
+                posts[0].save()
+            self.assertEqual(callbacks, [])
+            with override_settings(BLOG_INSTANT_ARTICLES_WORKER="thread"):
+                with self.captureOnCommitCallbacks() as callbacks:
+                    posts[0].save()
+            self.assertEqual(len(callbacks), 1)
+
+            # the cached feed is refreshed once the instant articles are rendered
+            cached = feed(request)
+            self.assertNotContains(cached, "<guid>{}</guid>".format(posts[0].guid))
+            self.assertEqual(render_instant_articles(), PostContent.objects.count())
+            self.assertEqual(render_instant_articles(), 0)
+            response = feed(request)
+            self.assertContains(response, "<guid>{}</guid>".format(posts[0].guid))
+            self.assertNotEqual(response.headers["ETag"], cached.headers["ETag"])
+            # all the contents of a changed post are rendered again
+            post_content.save()
+            out = StringIO()
+            call_command("blog_render_instant_articles", stdout=out)
+            self.assertEqual(out.getvalue().strip(), "2 instant articles rendered")
+
+            post_content.refresh_from_db()
+            self.assertIn(post_content, list(feed.items()))
+            self.assertEqual(feed.item_guid(post_content), posts[0].guid)
+            xml = feed(request)
+            self.assertContains(xml, "<guid>{}</guid>".format(posts[0].guid))
+            self.assertContains(xml, "content:encoded")
+            self.assertContains(
+                xml,
+                'class="op-modified" datetime="{}"'.format(
+                    post_content.post.date_modified.strftime(FBInstantFeed.date_format)
+                ),
+            )
+            self.assertContains(xml, '<link rel="canonical" href="{}"/>'.format(post_content.get_full_url()))
+            # Assert text transformation
+            self.assertContains(xml, "<h2>Ciao</h2><p>Ciao</p>")
+            self.assertContains(xml, "<a>Admin User</a>")
+
+    def test_instant_articles_worker(self):
+        worker = BackgroundWorker()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def render(post_ids):
+            calls.append(set(post_ids))
+            started.set()
+            release.wait(5)
+
+        worker.schedule("instant-articles", render, [1])
+        self.assertTrue(started.wait(5))
+        # tasks scheduled while the first one runs are coalesced, and run in the same thread
+        worker.schedule("instant-articles", render, [2])
+        worker.schedule("instant-articles", render, [2, 3])
+        release.set()
+        worker.join(5)
+        self.assertEqual(calls, [{1}, {2, 3}])
+        self.assertIsNone(worker._thread)
+
+        # the rendering is queued once the transaction is committed
+        posts = self.get_posts()
+        with patch("djangocms_blog.models.worker.schedule") as schedule:
+            with override_settings(BLOG_INSTANT_ARTICLES_WORKER="thread"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    posts[0].save()
+        schedule.assert_called_once_with("instant-articles", ANY, [posts[0].pk])